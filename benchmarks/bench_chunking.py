@@ -0,0 +1,63 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from util import chunking
+from util import markdown_writer
+from benchmarks.bench_markdown_writer import make_elements
+
+# the splitting done by the consumers of the markdown files: read the file again and split it at the headings
+# and then by size at line breaks, without offsets or metadata
+def resplit_markdown(path, max_chars):
+    chunks = []
+    with open(path, "r", encoding="utf-8") as f:
+        sections = []
+        for line in f:
+            if line.startswith("#") or not sections:
+                sections.append([])
+            sections[-1].append(line)
+    for section in sections:
+        chunks += chunking.split_text("".join(section), max_chars)
+    return chunks
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chunking of the elements while the markdown is written")
+    parser.add_argument("--tables", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--cols", type=int, default=5)
+    parser.add_argument("--chunk-chars", type=int, default=chunking.CHUNK_CHARS)
+    parser.add_argument("--overlap", type=int, default=200)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        md_path = os.path.join(work_dir, "doc.md")
+        chunks_path = os.path.join(work_dir, "doc.chunks.jsonl")
+        print(f"{'tables':>7} {'MB':>7} {'markdown (s)':>13} {'+ chunks (s)':>13} {'chunks':>8} {'re-split (s)':>13}")
+        for n_tables in args.tables:
+            elements = make_elements(n_tables, args.rows, args.cols)
+
+            start = time.perf_counter()
+            markdown_writer.write_markdown(elements, md_path)
+            plain = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with chunking.chunk_writer(chunks_path, args.chunk_chars, args.overlap, {"source": "doc.md"}) as chunker:
+                markdown_writer.write_markdown(elements, md_path, on_element=chunker.add)
+            chunked = time.perf_counter() - start
+            n_chunks = chunker.chunk_index
+
+            # writing the markdown and splitting it again afterwards
+            start = time.perf_counter()
+            markdown_writer.write_markdown(elements, md_path)
+            resplit_markdown(md_path, args.chunk_chars)
+            resplit = time.perf_counter() - start
+
+            size = os.path.getsize(md_path) / 1024**2
+            print(f"{n_tables:>7} {size:7.1f} {plain:13.3f} {chunked:13.3f} {n_chunks:>8} {resplit:13.3f}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import time
+import xml.etree.ElementTree as ET
+from util import docx_utils
+from benchmarks.corpus import make_image_docx
+
+namespace = {
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'o': 'urn:schemas-microsoft-com:office:office',
+    'v': 'urn:schemas-microsoft-com:vml',
+}
+R_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+# the detection used by process_docx_files before find_embedded_rids
+# it serializes the paragraph, parses it again and runs one search per kind of object
+def legacy_find(element):
+    r_ids = []
+    root = ET.fromstring(str(element.xml))
+    blip = root.find('.//a:blip', namespaces=namespace)
+    if blip is not None:
+        r_ids.append(blip.get(R_NS + 'embed'))
+    ole_object = root.find('.//o:OLEObject', namespaces=namespace)
+    if ole_object is not None:
+        r_ids.append(ole_object.get(R_NS + 'id'))
+    imagedata = root.find('.//v:imagedata', namespaces=namespace)
+    if imagedata is not None:
+        r_ids.append(imagedata.get(R_NS + 'id'))
+    return r_ids
+
+def time_find(find, elements):
+    start = time.perf_counter()
+    for element in elements:
+        find(element)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detection of embedded objects in docx paragraphs")
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--images", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    print(f"{'images/para':>11} {'legacy (s)':>11} {'in place (s)':>13} {'speedup':>8}")
+    for images in args.images:
+        doc = make_image_docx(args.paragraphs, images)
+        elements = list(doc.element.body.p_lst)
+        legacy = time_find(legacy_find, elements)
+        in_place = time_find(docx_utils.find_embedded_rids, elements)
+        print(f"{images:>11} {legacy:11.3f} {in_place:13.3f} {legacy / in_place:7.1f}x")
+
+if __name__ == "__main__":
+    main()
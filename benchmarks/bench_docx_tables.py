@@ -0,0 +1,81 @@
+import argparse
+import copy
+import os
+import shutil
+import tempfile
+import time
+from docx import Document
+from util import docx_utils
+from util.file_manager import FileManager
+from benchmarks.corpus import make_docx
+
+# the table reader used by process_docx_files before docx_utils.read_table, the python-docx cells of every row
+# a merged cell is returned once per grid cell it covers
+def python_docx_tables(doc):
+    return [[[cell.text for cell in row.cells] for row in table.rows] for table in doc.tables]
+
+# the tables read from the XML by docx_utils.iter_tables
+def xml_tables(doc):
+    tables = []
+    for tbl in doc.element.body.tbl_lst:
+        tables += docx_utils.iter_tables(tbl)
+    return tables
+
+# merge the first two cells of every other row and the last cells of the first two rows of the tables of a document
+def merge_cells(doc):
+    for table in doc.tables:
+        for row_idx in range(0, len(table.rows), 2):
+            table.cell(row_idx, 0).merge(table.cell(row_idx, 1))
+        table.cell(0, len(table.columns) - 1).merge(table.cell(1, len(table.columns) - 1))
+
+# return the best time of repeat calls of function
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the docx table reader on documents with many large tables")
+    parser.add_argument("--tables", type=int, default=1000)
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--merged", action="store_true", help="merge cells of the tables, horizontally and vertically")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        # the tables are copies of the first table, its cells are merged before it is copied
+        doc = make_docx(1, 1, table_rows=args.rows, table_cols=args.cols)
+        if args.merged:
+            merge_cells(doc)
+        template = doc.tables[0]._tbl
+        for _ in range(args.tables - 1):
+            template.addnext(copy.deepcopy(template))
+        path = os.path.join(work_dir, "tables.docx")
+        doc.save(path)
+        cells = args.tables * args.rows * args.cols
+        print(f"{args.tables} tables of {args.rows}x{args.cols} cells, {os.path.getsize(path) / 1024**2:.1f} MB")
+
+        doc = Document(path)
+        print(f"{'reader':>12} {'best (s)':>9} {'us/cell':>8}")
+        for name, reader in [("python-docx", python_docx_tables), ("xml", xml_tables)]:
+            elapsed = best_time(lambda: reader(doc), args.repeat)
+            print(f"{name:>12} {elapsed:9.2f} {elapsed / cells * 1e6:8.2f}")
+        python_docx_text = sum(len(text) for table in python_docx_tables(doc) for row in table for text in row)
+        xml_text = sum(len(text) for table in xml_tables(doc) for row in table for text in row)
+        print(f"cell text: {python_docx_text} characters with python-docx, {xml_text} with the xml reader")
+
+        file_manager = FileManager(root_dir=os.path.join(work_dir, "root"))
+        os.makedirs(file_manager.processed_dir, exist_ok=True)
+        elapsed = best_time(lambda: file_manager.convert_docx_file(path), args.repeat)
+        print(f"convert_docx_file {elapsed:.2f} s")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import time
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from util import docx_utils
+from benchmarks.corpus import make_docx
+
+# the body walk used by process_docx_files before the element -> object index
+# it rebuilds doc.paragraphs for every paragraph and scans doc.tables for every table
+def legacy_walk(doc):
+    blocks = []
+    para_start_index = 0
+    for element in doc.element.body:
+        if element.tag.endswith('p'):
+            for index, para in enumerate(doc.paragraphs[para_start_index:]):
+                if para._element == element:
+                    para_start_index += index + 1
+                    blocks.append((para.text, para.style.name.lower()))
+        elif element.tag.endswith('tbl'):
+            for table in doc.tables:
+                if table._element == element:
+                    blocks.append([[cell.text for cell in row.cells] for row in table.rows])
+                    break
+    return blocks
+
+# the single pass walk used by process_docx_files
+def indexed_walk(doc):
+    blocks = []
+    style_cache = {}
+    for element, block in docx_utils.iter_block_items(doc):
+        if isinstance(block, Paragraph):
+            blocks.append((block.text, docx_utils.get_paragraph_style(block, style_cache)))
+        elif isinstance(block, Table):
+            blocks += docx_utils.iter_tables(element)
+    return blocks
+
+def time_walk(walk, doc):
+    start = time.perf_counter()
+    walk(doc)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the docx body walker")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=1000,
+                        help="largest size to run the quadratic legacy walker on")
+    args = parser.parse_args()
+
+    print(f"{'elements':>10} {'indexed (s)':>12} {'us/element':>11} {'legacy (s)':>11}")
+    for size in args.sizes:
+        # size paragraphs and size tables
+        doc = make_docx(size, size)
+        elapsed = time_walk(indexed_walk, doc)
+        legacy = f"{time_walk(legacy_walk, doc):11.3f}" if size <= args.legacy_max else f"{'-':>11}"
+        print(f"{2 * size:>10} {elapsed:12.3f} {elapsed / (2 * size) * 1e6:11.2f} {legacy}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import copy
+import time
+from util import data_utils
+from util.file_registry import FileRegistry
+
+EXTENSIONS = ["docx", "pdf", "csv", "json", "xlsx", "png", "jpg", "txt"]
+
+# the synthetic raw files of a run: n_files files, one zip file in every zip_every files
+def make_files(n_files, zip_every=100):
+    files = []
+    for idx in range(n_files):
+        if idx % zip_every == 0:
+            files.append((f"raw/archive_{idx}.zip", "zip"))
+        else:
+            files.append((f"raw/dir_{idx // 1000}/file_{idx}.{EXTENSIONS[idx % len(EXTENSIONS)]}", EXTENSIONS[idx % len(EXTENSIONS)]))
+    return files
+
+# the files extracted from a zip file
+def zip_members(zip_file, files_per_zip):
+    base = zip_file[:-len(".zip")]
+    return [(f"{base}/member_{idx}.{EXTENSIONS[idx % len(EXTENSIONS)]}", EXTENSIONS[idx % len(EXTENSIONS)]) for idx in range(files_per_zip)]
+
+# the bookkeeping of process_raw_dir before the registry: lists of paths, a deep copy of them for the originals,
+# pop(0) work queues, a merge of the whole dictionary for every zip file and list lookups of the originals
+def legacy_run(files, files_per_zip):
+    raw_files_dict = {}
+    for path, extension in files:
+        if extension in raw_files_dict:
+            raw_files_dict[extension].append(path)
+        else:
+            raw_files_dict[extension] = [path]
+    original_files_dict = copy.deepcopy(raw_files_dict)
+    zip_files = raw_files_dict.pop("zip", [])
+    while zip_files:
+        zip_file = zip_files.pop(0)
+        new_raw_files_dict = {}
+        for path, extension in zip_members(zip_file, files_per_zip):
+            new_raw_files_dict.setdefault(extension, []).append(path)
+        data_utils.append_dictionaries(raw_files_dict, new_raw_files_dict)
+        zip_file in original_files_dict.get("zip", [])
+    while raw_files_dict:
+        extension, queue = raw_files_dict.popitem()
+        while queue:
+            path = queue.pop(0)
+            path in original_files_dict.get(extension, [])
+
+# the same bookkeeping with the registry
+def registry_run(files, files_per_zip):
+    registry = FileRegistry()
+    for path, extension in files:
+        registry.add(path, extension)
+    zip_files = registry.pop_queue("zip")
+    while zip_files:
+        zip_file = zip_files.popleft()
+        extracted = FileRegistry()
+        for path, extension in zip_members(zip_file, files_per_zip):
+            extracted.add(path, extension, registry.origin(zip_file))
+        registry.merge(extracted)
+        registry.is_original(zip_file)
+    while registry.queues:
+        extension, queue = registry.queues.popitem()
+        while queue:
+            path = queue.popleft()
+            registry.is_original(path)
+
+def time_run(run, files, files_per_zip):
+    start = time.perf_counter()
+    run(files, files_per_zip)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bookkeeping of the raw files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--files-per-zip", type=int, default=10)
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="largest size to run the quadratic legacy bookkeeping on")
+    args = parser.parse_args()
+
+    print(f"{'files':>9} {'registry (s)':>13} {'us/file':>8} {'legacy (s)':>11}")
+    for size in args.sizes:
+        files = make_files(size)
+        elapsed = time_run(registry_run, files, args.files_per_zip)
+        legacy = f"{time_run(legacy_run, files, args.files_per_zip):11.3f}" if size <= args.legacy_max else f"{'-':>11}"
+        print(f"{size:>9} {elapsed:13.3f} {elapsed / size * 1e6:8.2f} {legacy}")
+
+if __name__ == "__main__":
+    main()
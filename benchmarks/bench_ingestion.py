@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from util.file_manager import FileManager
+from benchmarks.corpus import save_corpus
+
+# the cases of the suite: the types of the corpus files copied to the raw directory of the case,
+# the per type cases run the process_*_files method of each type, "zip" only extracts the archives
+# and "full" runs process_raw_dir on the whole corpus
+CASES = {
+    "docx": ["docx"],
+    "pdf": ["pdf"],
+    "csv": ["csv"],
+    "xlsx": ["xlsx"],
+    "json": ["json"],
+    "png": ["png"],
+    "zip": ["zip"],
+    "full": ["docx", "pdf", "csv", "xlsx", "json", "png", "zip"],
+}
+
+# the methods of the file manager timed as the stages of a run, the time of a method includes the methods it calls
+# the converters run in the worker processes when workers > 1, their time is then in process_jobs_parallel
+STAGES = [
+    "list_raw_files", "process_zip_files", "extract_zip_file", "process_jobs_parallel",
+    "process_docx_files", "extract_docx_document", "write_docx_document",
+    "process_pdf_files", "convert_pdf_file", "process_csv_files", "convert_csv_file",
+    "process_xlsx_files", "convert_xlsx_file", "process_json_files", "convert_json_file",
+    "process_png_files", "process_jpg_files", "convert_image_file", "store_original",
+]
+
+# A file manager recording the number of calls and the time of the methods of STAGES in stage_times
+# the class is defined at the module level so it can be sent to the worker processes
+class TimedFileManager(FileManager):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stage_times = {}
+
+# return a method of FileManager which records its time in stage_times
+def timed(name):
+    method = getattr(FileManager, name)
+    def timed_method(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            stage = self.stage_times.setdefault(name, {"calls": 0, "seconds": 0.0})
+            stage["calls"] += 1
+            stage["seconds"] += time.perf_counter() - start
+    return timed_method
+
+for stage_name in STAGES:
+    setattr(TimedFileManager, stage_name, timed(stage_name))
+
+# return the peak resident set size in MB of this process and of its largest finished child process
+def peak_rss_mb():
+    # ru_maxrss is in KB on linux
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024)
+
+# run a case on the files of the corpus directory in a new root directory and return its results
+# this runs in its own process, started by main, so the peak memory is the memory of the case
+def run_case(case, corpus_dir, root_dir, workers):
+    file_manager = TimedFileManager(root_dir=root_dir, workers=workers, pdf_page_strategy=True)
+    file_manager.reset_all_directories()
+    sizes = []
+    for file_type in CASES[case]:
+        for file_name in sorted(os.listdir(os.path.join(corpus_dir, file_type))):
+            shutil.copy(os.path.join(corpus_dir, file_type, file_name), file_manager.raw_dir)
+            sizes.append(os.path.getsize(os.path.join(file_manager.raw_dir, file_name)))
+
+    # the memory of the imports and of the copy, the growth of the peak after it is the memory of the conversion
+    start_rss = peak_rss_mb()[0]
+    start = time.perf_counter()
+    if case == "full":
+        processed_files = file_manager.process_raw_dir()
+    else:
+        processed_files = []
+        for extension, files in list(file_manager.list_raw_files().items()):
+            processed_files += file_manager.process_raw_files(file_manager.registry.pop_queue(extension), extension) or []
+    seconds = time.perf_counter() - start
+
+    rss, children_rss = peak_rss_mb()
+    total_bytes = sum(sizes)
+    return {
+        "files": len(sizes),
+        "bytes": total_bytes,
+        "processed": len(processed_files),
+        "failed": len(file_manager.failed_sources),
+        "seconds": seconds,
+        "docs_per_s": len(sizes) / seconds if seconds else None,
+        "mb_per_s": total_bytes / 1024**2 / seconds if seconds else None,
+        "start_rss_mb": start_rss,
+        "peak_rss_mb": rss,
+        "peak_children_rss_mb": children_rss,
+        "stages": file_manager.stage_times,
+    }
+
+# run a case in a new python process and return its results, the results are the last line of its output
+def run_case_process(case, corpus_dir, work_dir, workers):
+    root_dir = os.path.join(work_dir, f"root_{case}")
+    command = [sys.executable, "-m", "benchmarks.bench_ingestion", "--run-case", case,
+               "--corpus-dir", corpus_dir, "--root-dir", root_dir, "--workers", str(workers)]
+    process = subprocess.run(command, capture_output=True, text=True)
+    try:
+        if process.returncode != 0:
+            raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f"exit code {process.returncode}")
+        return json.loads(process.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+# return the commit of the working tree, None outside of a git repository
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# print the time of the cases of the results next to the time of the same cases in a baseline results file
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\ncompared with {baseline_path} (commit {baseline.get('commit')})")
+    print(f"{'case':>6} {'base (s)':>9} {'now (s)':>9} {'ratio':>7} {'base MB':>8} {'now MB':>8}")
+    for case, result in results["cases"].items():
+        base = baseline["cases"].get(case)
+        if base is None or "error" in base or "error" in result:
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        # the cases of a few milliseconds are too noisy to be compared
+        flag = "  slower" if ratio > 1 + threshold and base["seconds"] >= 0.05 else ""
+        print(f"{case:>6} {base['seconds']:9.2f} {result['seconds']:9.2f} {ratio:7.2f} "
+              f"{base['peak_rss_mb']:8.0f} {result['peak_rss_mb']:8.0f}{flag}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion of a synthetic corpus, per file type and end to end")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--scale", type=int, default=1, help="multiplies the number of files of the corpus")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the sizes of the corpus files")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", default="ingestion_results.json", help="the json file the results are saved to")
+    parser.add_argument("--compare", help="a results file of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="the slowdown reported as a regression by --compare")
+    # the options of a single case run in its own process
+    parser.add_argument("--run-case", choices=list(CASES), help=argparse.SUPPRESS)
+    parser.add_argument("--corpus-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--root-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        result = run_case(args.run_case, args.corpus_dir, args.root_dir, args.workers)
+        print(json.dumps(result))
+        return
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        corpus_dir = os.path.join(work_dir, "corpus")
+        start = time.perf_counter()
+        save_corpus(corpus_dir, scale=args.scale, seed=args.seed)
+        print(f"corpus generated in {time.perf_counter() - start:.1f} s")
+
+        results = {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "scale": args.scale,
+            "seed": args.seed,
+            "workers": args.workers,
+            "cases": {},
+        }
+        print(f"{'case':>6} {'files':>6} {'MB':>7} {'time (s)':>9} {'docs/s':>8} {'MB/s':>7} {'peak MB':>8} {'+MB':>6} {'failed':>7}")
+        for case in args.cases:
+            try:
+                result = run_case_process(case, corpus_dir, work_dir, args.workers)
+            except RuntimeError as e:
+                results["cases"][case] = {"error": str(e)}
+                print(f"{case:>6} error: {e}")
+                continue
+            results["cases"][case] = result
+            print(f"{case:>6} {result['files']:>6} {result['bytes'] / 1024**2:7.1f} {result['seconds']:9.2f} "
+                  f"{result['docs_per_s']:8.1f} {result['mb_per_s']:7.2f} {result['peak_rss_mb']:8.0f} "
+                  f"{result['peak_rss_mb'] - result['start_rss_mb']:6.0f} {result['failed']:>7}")
+
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"results saved to {args.output}")
+        if args.compare:
+            compare(results, args.compare, args.threshold)
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
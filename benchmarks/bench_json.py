@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from util import json_stream
+from util import markdown_writer
+from util.file_manager import FileManager
+from benchmarks.corpus import save_json
+
+# the conversion of a json file loaded at once with json.load, to the same markdown
+# the json lines files are loaded at once as a list of their lines
+def naive_convert(path, md_path):
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            document = json.load(f)
+            records = document if isinstance(document, list) else [document]
+    markdown_writer.write_markdown(list(json_stream.json_elements(records)), md_path)
+
+# run a conversion and return the elapsed seconds and the peak of the memory allocated by python
+def run_convert(convert, trace):
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    convert()
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming json converter against json.load")
+    parser.add_argument("--records", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--no-memory", action="store_true", help="do not trace the memory, tracing slows the conversion down")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        file_manager = FileManager(root_dir=work_dir)
+        os.makedirs(file_manager.processed_dir)
+        print(f"{'file':>6} {'records':>9} {'MB':>7} {'stream (s)':>11} {'peak MB':>8} {'json.load (s)':>14} {'peak MB':>8}")
+        for extension in ["json", "jsonl"]:
+            for n_records in args.records:
+                path = save_json(os.path.join(work_dir, f"records_{n_records}.{extension}"), n_records, lines=extension == "jsonl")
+                size = os.path.getsize(path) / 1024**2
+                results = []
+                for convert in [lambda: file_manager.convert_json_file(path),
+                                lambda: naive_convert(path, os.path.join(work_dir, "naive.md"))]:
+                    elapsed, _ = run_convert(convert, False)
+                    peak = "-" if args.no_memory else f"{run_convert(convert, True)[1] / 1024**2:8.1f}"
+                    results.append((elapsed, peak))
+                with open(os.path.join(file_manager.processed_dir, f"records_{n_records}.md"), "rb") as stream_file:
+                    with open(os.path.join(work_dir, "naive.md"), "rb") as naive_file:
+                        assert stream_file.read() == naive_file.read()
+                (stream, stream_peak), (naive, naive_peak) = results
+                print(f"{extension:>6} {n_records:>9} {size:7.1f} {stream:11.2f} {stream_peak:>8} {naive:14.2f} {naive_peak:>8}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
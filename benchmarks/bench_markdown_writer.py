@@ -0,0 +1,72 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from util import markdown_writer
+
+# the per element writer used by save_elements_to_file before the shared markdown writer
+def legacy_save(elements, new_file_path, embedding_objects_types=["image"]):
+    with open(new_file_path, 'w') as f:
+        for element in elements:
+            element_type = element["type"].lower()
+            if ("list" in element_type) or ("bullet" in element_type):
+                bullet = '-' if 'bullet' in element_type else '1.'
+                f.write(f"{bullet} {element['content']}\n")
+            elif element_type == "title":
+                f.write("# " + element["content"] + "\n")
+            elif element_type.startswith("heading"):
+                heading_level = element_type.replace("heading", "")
+                f.write("#" * int(heading_level) + " " + element["content"] + "\n")
+            elif element_type == "table":
+                table_content = element["content"]
+                header = table_content[0]
+                f.write("| " + " | ".join(header) + " |\n")
+                f.write("|" + " --- |" * len(header) + "\n")
+                for row in table_content[1:]:
+                    f.write("| " + " | ".join(row) + " |\n")
+            elif element_type in embedding_objects_types:
+                f.write(f"![{element['type']}]({element['content']})\n")
+            else:
+                f.write(element["content"] + "\n")
+
+# build a table heavy element list: n_tables tables of rows x cols cells, each after a heading and a paragraph
+def make_elements(n_tables, rows, cols):
+    elements = []
+    for idx in range(n_tables):
+        elements.append({"type": "heading 2", "content": f"Table {idx}"})
+        elements.append({"type": "normal", "content": "Synthetic paragraph text for benchmarking."})
+        elements.append({"type": "table", "content": [[f"r{row}c{col}" for col in range(cols)] for row in range(rows)]})
+    return elements
+
+def time_save(save, elements, path):
+    start = time.perf_counter()
+    save(elements, path)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown writer on table heavy documents")
+    parser.add_argument("--tables", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--rows", type=int, default=50)
+    parser.add_argument("--cols", type=int, default=20)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'tables':>7} {'MB':>8} {'writer (s)':>11} {'MB/s':>8} {'legacy (s)':>11} {'MB/s':>8}")
+        for n_tables in args.tables:
+            elements = make_elements(n_tables, args.rows, args.cols)
+            path = os.path.join(work_dir, f"tables_{n_tables}.md")
+            legacy = time_save(legacy_save, elements, path)
+            with open(path, 'rb') as f:
+                expected = f.read()
+            elapsed = time_save(markdown_writer.write_markdown, elements, path)
+            with open(path, 'rb') as f:
+                assert f.read() == expected
+            size = len(expected) / 1024**2
+            print(f"{n_tables:>7} {size:8.1f} {elapsed:11.3f} {size / elapsed:8.1f} {legacy:11.3f} {size / legacy:8.1f}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
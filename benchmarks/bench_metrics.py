@@ -0,0 +1,44 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from util.file_manager import FileManager
+from util.metrics import Metrics
+from benchmarks.corpus import save_docx, save_csv
+
+# convert a file repeat times with a file manager and return the best time
+def best_time(file_manager, converter, path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        file_manager.run_converter(converter, path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the overhead of the metrics of the file manager")
+    parser.add_argument("--paragraphs", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        docx_path = save_docx(os.path.join(work_dir, "paragraphs.docx"), args.paragraphs, n_tables=args.paragraphs // 100)
+        csv_path = save_csv(os.path.join(work_dir, "rows.csv"), args.rows)
+        print(f"{'file':>6} {'disabled (s)':>13} {'enabled (s)':>12} {'overhead':>9}")
+        for name, path, converter_name in [("docx", docx_path, "convert_docx_file"), ("csv", csv_path, "convert_csv_file")]:
+            times = []
+            for metrics in [None, Metrics()]:
+                file_manager = FileManager(root_dir=os.path.join(work_dir, "root"), metrics=metrics)
+                os.makedirs(file_manager.processed_dir, exist_ok=True)
+                times.append(best_time(file_manager, getattr(file_manager, converter_name), path, args.repeat))
+            disabled, enabled = times
+            print(f"{name:>6} {disabled:13.3f} {enabled:12.3f} {(enabled / disabled - 1) * 100:8.1f}%")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
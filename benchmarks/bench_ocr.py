@@ -0,0 +1,61 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from util import image_utils
+from util.image_utils import ImageTextCache
+from benchmarks.corpus import save_text_png
+
+# build the images of a corpus of n_documents documents, each with a logo shared by all the documents
+# and unique_images images of its own, return the paths of the images in document order
+def make_corpus(work_dir, n_documents, unique_images):
+    logo = save_text_png(os.path.join(work_dir, "logo.png"), "ACME Corporation")
+    paths = []
+    for doc_idx in range(n_documents):
+        # every document has its own copy of the logo, as the docx embedded images of different files
+        doc_logo = os.path.join(work_dir, f"doc{doc_idx}_logo.png")
+        shutil.copyfile(logo, doc_logo)
+        paths.append(doc_logo)
+        for image_idx in range(unique_images):
+            paths.append(save_text_png(os.path.join(work_dir, f"doc{doc_idx}_image{image_idx}.png"), f"Invoice {doc_idx}-{image_idx} total 42"))
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batched OCR of images with the content hash cache")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--unique-images", type=int, default=2, help="images of each document besides the shared logo")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=image_utils.BATCH_SIZE)
+    args = parser.parse_args()
+
+    if not shutil.which("tesseract"):
+        print("tesseract is not installed, the OCR can not be benchmarked")
+        return
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        paths = make_corpus(work_dir, args.documents, args.unique_images)
+        print(f"{len(paths)} images in {args.documents} documents")
+
+        # one image at a time, without the cache
+        start = time.perf_counter()
+        for path in paths:
+            image_utils.ocr_image(path)
+        print(f"{'one by one':>24}: {time.perf_counter() - start:7.2f} s")
+
+        for workers in args.workers:
+            cache_path = os.path.join(work_dir, f"cache_{workers}.jsonl")
+            start = time.perf_counter()
+            _, read, _ = image_utils.read_image_texts(paths, ImageTextCache(cache_path), workers=workers, batch_size=args.batch_size)
+            cold = time.perf_counter() - start
+            # a later run over the same images, loading the cache file
+            start = time.perf_counter()
+            image_utils.read_image_texts(paths, ImageTextCache(cache_path), workers=workers, batch_size=args.batch_size)
+            warm = time.perf_counter() - start
+            print(f"{f'batched, {workers} workers':>24}: {cold:7.2f} s ({read} images read), cached run {warm:7.2f} s")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from util import data_utils
+from util.output_store import FileSystemStore, SQLiteStore
+
+# the output stores of the benchmark
+CASES = ["files", "sqlite"]
+
+# write the outputs of a converted document in processed_dir, as the docx converter does: a markdown file,
+# its chunks and a folder of embedded images, the images are drawn from a shared pool so some are found in many documents
+# return the outputs
+def write_document(processed_dir, index, rng, images, markdown_chars):
+    name = f"doc_{index}"
+    embed_dir = os.path.join(processed_dir, f"{name}_docx_embed")
+    os.makedirs(os.path.join(embed_dir, "media"))
+    links = []
+    for number in range(rng.randint(1, 4)):
+        path = os.path.join(embed_dir, "media", f"image{number}.png")
+        with open(path, "wb") as f:
+            f.write(rng.choice(images))
+        links.append(f"![image]({path})\n")
+    markdown_path = os.path.join(processed_dir, name + ".md")
+    with open(markdown_path, "w", encoding="utf-8") as f:
+        f.write(f"# Document {index}\n" + "".join(links) + "text of the document " * (markdown_chars // 21) + "\n")
+    chunks_path = os.path.join(processed_dir, name + ".chunks.jsonl")
+    with open(chunks_path, "w", encoding="utf-8") as f:
+        f.write('{"index": 0, "text": "text of the document"}\n')
+    return [markdown_path, chunks_path, embed_dir]
+
+# write the outputs of the documents and add them to a store, then time the listing, the copy to an other folder,
+# e.g. to an index server, and the random reads of the markdown of the documents
+def run_case(case, work_dir, documents, images, markdown_chars, reads):
+    rng = random.Random(0)
+    root_dir = os.path.join(work_dir, case)
+    processed_dir = os.path.join(root_dir, "processed")
+    os.makedirs(processed_dir)
+    store = FileSystemStore(processed_dir) if case == "files" else SQLiteStore(os.path.join(root_dir, "processed.sqlite"), processed_dir)
+    pool = [os.urandom(rng.randint(2000, 20000)) for _ in range(images)]
+    start = time.perf_counter()
+    for index in range(documents):
+        store.add(write_document(processed_dir, index, rng, pool, markdown_chars), {"file": f"doc_{index}.docx"})
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    names = store.documents()
+    list_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in rng.sample(names, min(reads, len(names))):
+        store.read_markdown(name)
+    read_seconds = time.perf_counter() - start
+
+    # the files of the root directory are what is copied to an index server
+    files = sum(1 for _ in data_utils.iter_files(root_dir))
+    size = sum(data_utils.file_size(file) for file in data_utils.iter_files(root_dir))
+    start = time.perf_counter()
+    shutil.copytree(root_dir, os.path.join(work_dir, case + "_copy"))
+    copy_seconds = time.perf_counter() - start
+    store.close()
+    return {"write": write_seconds, "list": list_seconds, "read": read_seconds, "copy": copy_seconds, "files": files, "mb": size / 1024**2}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the output stores: the files of the processed directory against a sqlite database")
+    parser.add_argument("--documents", type=int, default=5000, help="the number of documents")
+    parser.add_argument("--images", type=int, default=200, help="the number of distinct images shared by the documents")
+    parser.add_argument("--markdown-chars", type=int, default=4000, help="the size of the markdown of a document")
+    parser.add_argument("--reads", type=int, default=1000, help="the number of documents read at random")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        print(f"{args.documents} documents linking {args.images} distinct images")
+        print(f"{'case':>7} {'write (s)':>10} {'list (s)':>9} {'reads (s)':>10} {'copy (s)':>9} {'files':>7} {'MB':>7}")
+        for case in args.cases:
+            result = run_case(case, work_dir, args.documents, args.images, args.markdown_chars, args.reads)
+            print(f"{case:>7} {result['write']:10.2f} {result['list']:9.3f} {result['read']:10.3f} {result['copy']:9.2f} "
+                  f"{result['files']:>7} {result['mb']:7.1f}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from util import pdf_utils
+from util.file_manager import FileManager
+from benchmarks.corpus import save_pdf
+
+# time the conversion of a pdf file by a file manager, return the elapsed seconds
+def time_convert(file_manager, path):
+    os.makedirs(file_manager.processed_dir, exist_ok=True)
+    start = time.perf_counter()
+    file_manager.convert_pdf_file(path)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-page strategy selection of pdf files")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--convert", action="store_true",
+                        help="also convert the files with partition_pdf, needs the unstructured models")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'pages':>6} {'pre-scan (s)':>13} {'pages/s':>9} {'auto (s)':>9} {'per page (s)':>13}")
+        for n_pages in args.pages:
+            path = save_pdf(os.path.join(work_dir, f"born_digital_{n_pages}.pdf"), n_pages)
+            start = time.perf_counter()
+            strategies = pdf_utils.classify_pages(path)
+            scan = time.perf_counter() - start
+            assert strategies.count("fast") == n_pages
+
+            auto = per_page = "-"
+            if args.convert:
+                auto = f"{time_convert(FileManager(root_dir=os.path.join(work_dir, 'auto')), path):.3f}"
+                per_page = f"{time_convert(FileManager(root_dir=os.path.join(work_dir, 'per_page'), pdf_page_strategy=True), path):.3f}"
+            print(f"{n_pages:>6} {scan:13.3f} {n_pages / scan:9.0f} {auto:>9} {per_page:>13}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
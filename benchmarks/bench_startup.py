@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# the code run in a new python process to time the cold import of the file manager
+# in the eager case the backends of all the converters are imported first, as the file manager did before they were loaded lazily
+IMPORT_CODE = """
+import sys, time, json
+start = time.perf_counter()
+if {eager}:
+    from util import backends
+    backends.load(list(backends.BACKEND_MODULES))
+import util.file_manager
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": len(sys.modules)}}))
+"""
+
+# run python code in a new process, return the wall time of the process and the json of the last line of its output
+def run_process(command):
+    start = time.perf_counter()
+    process = subprocess.run(command, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f"exit code {process.returncode}")
+    return wall, json.loads(process.stdout.strip().splitlines()[-1])
+
+# convert the zip files of raw_dir in a new root directory, this runs in its own process, started by main
+# return the time of the import of the file manager, of the run and the converter backends the run imported
+def run_zip(raw_dir, root_dir):
+    start = time.perf_counter()
+    from util.file_manager import FileManager
+    from util import backends
+    imported = time.perf_counter()
+    file_manager = FileManager(root_dir=root_dir)
+    file_manager.reset_all_directories()
+    for file_name in os.listdir(raw_dir):
+        shutil.copy(os.path.join(raw_dir, file_name), file_manager.raw_dir)
+    file_manager.process_raw_dir()
+    return {
+        "import_seconds": imported - start,
+        "run_seconds": time.perf_counter() - imported,
+        "backends": backends.import_times(),
+        "failed": len(file_manager.failed_sources),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup of the file manager: the cold import of util.file_manager and a zip only run")
+    parser.add_argument("--repeat", type=int, default=5, help="the number of processes timed per case")
+    parser.add_argument("--zips", type=int, default=2, help="the number of zip files of the zip only run")
+    parser.add_argument("--paragraphs", type=int, default=200, help="the paragraphs of the docx files in the zip files")
+    # the options of a zip only run in its own process
+    parser.add_argument("--run-zip", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--raw-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--root-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_zip:
+        print(json.dumps(run_zip(args.raw_dir, args.root_dir)))
+        return
+
+    print(f"{'case':>22} {'median (s)':>11} {'min (s)':>8} {'process (s)':>12} {'modules':>8}")
+    for case, eager in [("import", False), ("import, eager backends", True)]:
+        times, walls = [], []
+        for _ in range(args.repeat):
+            wall, result = run_process([sys.executable, "-c", IMPORT_CODE.format(eager=eager)])
+            times.append(result["seconds"])
+            walls.append(wall)
+        print(f"{case:>22} {statistics.median(times):11.3f} {min(times):8.3f} {statistics.median(walls):12.3f} {result['modules']:>8}")
+
+    # the corpus generators are imported here, the zip only run processes do not import them
+    from benchmarks.corpus import save_docx, save_zip
+    work_dir = tempfile.mkdtemp()
+    try:
+        raw_dir = os.path.join(work_dir, "raw")
+        os.makedirs(raw_dir)
+        for index in range(args.zips):
+            docx_paths = [save_docx(os.path.join(work_dir, f"doc_{index}_{n}.docx"), args.paragraphs, n_tables=2) for n in range(2)]
+            save_zip(os.path.join(raw_dir, f"archive_{index}.zip"), [(os.path.basename(path), path) for path in docx_paths])
+
+        runs = []
+        for _ in range(args.repeat):
+            root_dir = os.path.join(work_dir, "root")
+            wall, result = run_process([sys.executable, "-m", "benchmarks.bench_startup", "--run-zip",
+                                        "--raw-dir", raw_dir, "--root-dir", root_dir])
+            shutil.rmtree(root_dir, ignore_errors=True)
+            runs.append((wall, result))
+        walls = [wall for wall, _ in runs]
+        result = runs[-1][1]
+        print(f"\nzip only run, {args.zips} zip files of 2 docx files:")
+        print(f"  process {statistics.median(walls):.3f} s, import {statistics.median(r['import_seconds'] for _, r in runs):.3f} s, "
+              f"run {statistics.median(r['run_seconds'] for _, r in runs):.3f} s, failed {result['failed']}")
+        print(f"  backends imported: {', '.join(f'{name} {seconds:.3f} s' for name, seconds in result['backends'].items()) or 'none'}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from util.file_manager import FileManager
+from benchmarks.corpus import save_csv, save_xlsx
+
+# convert a file and return the elapsed seconds and the peak of the memory allocated by python during the conversion
+def run_convert(convert, path, trace):
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    convert(path)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming csv and xlsx converters")
+    parser.add_argument("--csv-rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--xlsx-rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--cols", type=int, default=10)
+    parser.add_argument("--table-rows", type=int, default=1000)
+    parser.add_argument("--no-memory", action="store_true", help="do not trace the memory, tracing slows the conversion down")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        file_manager = FileManager(root_dir=work_dir, table_rows=args.table_rows)
+        os.makedirs(file_manager.processed_dir)
+        print(f"{'file':>6} {'rows':>9} {'MB':>7} {'time (s)':>9} {'rows/s':>9} {'peak MB':>8}")
+        for extension, sizes, save, convert in [("csv", args.csv_rows, save_csv, file_manager.convert_csv_file),
+                                                ("xlsx", args.xlsx_rows, save_xlsx, file_manager.convert_xlsx_file)]:
+            for n_rows in sizes:
+                path = save(os.path.join(work_dir, f"table_{n_rows}.{extension}"), n_rows, args.cols)
+                size = os.path.getsize(path) / 1024**2
+                elapsed, _ = run_convert(convert, path, False)
+                peak = "-"
+                if not args.no_memory:
+                    peak = f"{run_convert(convert, path, True)[1] / 1024**2:8.1f}"
+                print(f"{extension:>6} {n_rows:>9} {size:7.1f} {elapsed:9.2f} {n_rows / elapsed:9.0f} {peak:>8}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
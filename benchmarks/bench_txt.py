@@ -0,0 +1,101 @@
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# the cases of the benchmark, each is run in its own process so its peak memory is its own
+# "read" reads the bytes of the file in blocks, the speed of the disk (or of the page cache) the converters are compared to,
+# "naive" reads the whole file with open().read() and splits it with re.split, "stream" is FileManager.convert_txt_file
+CASES = ["read", "naive", "stream"]
+
+# save a text file of about size_mb MB of transcript paragraphs and runs of log lines without blank lines
+def save_text(path, size_mb, seed=0):
+    rng = random.Random(seed)
+    words = ["the", "meeting", "transcript", "speaker", "said", "report", "système", "données", "value", "error", "request"]
+    target = size_mb * 1024**2
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        index = 0
+        while written < target:
+            if index % 4 == 3:
+                block = "".join(f"2024-01-01T00:00:{second % 60:02d} INFO request {index}.{second} served in {rng.randint(1, 999)} ms\n"
+                                for second in range(rng.randint(50, 500)))
+            else:
+                block = "\n".join(" ".join(rng.choice(words) for _ in range(rng.randint(8, 20))) for _ in range(rng.randint(1, 6))) + "\n"
+            block += "\n"
+            f.write(block)
+            written += len(block.encode("utf-8"))
+            index += 1
+    return path
+
+# convert a text file the naive way: the whole file is read and decoded into one string and split in paragraphs
+def naive_convert(path, md_path):
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    paragraphs = [paragraph.strip() for paragraph in re.split(r"\n\s*\n", text)]
+    with open(md_path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(paragraph for paragraph in paragraphs if paragraph) + "\n")
+
+# run a case on a text file and return its time and its peak memory, this runs in its own process, started by main
+def run_case(case, path, root_dir):
+    from util.file_manager import FileManager
+    file_manager = FileManager(root_dir=root_dir)
+    os.makedirs(file_manager.processed_dir, exist_ok=True)
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    if case == "read":
+        with open(path, "rb") as f:
+            while f.read(1024 * 1024):
+                pass
+    elif case == "naive":
+        naive_convert(path, os.path.join(file_manager.processed_dir, "naive.md"))
+    else:
+        file_manager.convert_txt_file(path)
+    seconds = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"seconds": seconds, "start_rss_mb": start_rss, "peak_rss_mb": rss}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the txt converter against reading the whole file with open().read()")
+    parser.add_argument("--mb", type=int, default=256, help="the size of the text file in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of runs of each case, the best is reported")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    # the options of a single case run in its own process
+    parser.add_argument("--run-case", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    parser.add_argument("--root-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.path, args.root_dir)))
+        return
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        path = save_text(os.path.join(work_dir, "dump.txt"), args.mb)
+        size_mb = os.path.getsize(path) / 1024**2
+        print(f"{size_mb:.0f} MB text file")
+        print(f"{'case':>7} {'best (s)':>9} {'MB/s':>8} {'peak MB':>8} {'+MB':>6}")
+        for case in args.cases:
+            results = []
+            for _ in range(args.repeat):
+                root_dir = os.path.join(work_dir, "root")
+                command = [sys.executable, "-m", "benchmarks.bench_txt", "--run-case", case, "--path", path, "--root-dir", root_dir]
+                process = subprocess.run(command, capture_output=True, text=True, check=True)
+                results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+                shutil.rmtree(root_dir, ignore_errors=True)
+            best = min(results, key=lambda result: result["seconds"])
+            print(f"{case:>7} {best['seconds']:9.2f} {size_mb / best['seconds']:8.1f} {best['peak_rss_mb']:8.0f} "
+                  f"{best['peak_rss_mb'] - best['start_rss_mb']:6.0f}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from util.file_manager import FileManager
+from util import watcher
+
+# the watchers of the benchmark, "inotify" is skipped where inotify is not available
+CASES = ["inotify", "polling"]
+
+# write count small txt files in folder, one every gap seconds, and record the time each file is complete by path
+def drop_files(folder, count, gap, dropped):
+    for index in range(count):
+        path = os.path.join(folder, f"note_{index}.txt")
+        # the file is written under a temporary name and renamed, as a download or a copy tool does
+        with open(path + ".part", "w") as f:
+            f.write(f"note {index}\n\n" + "text of the note " * 50 + "\n")
+        os.rename(path + ".part", path)
+        dropped[path] = time.monotonic()
+        time.sleep(gap)
+
+# watch a raw directory holding idle files while files are dropped in it
+# return the seconds from the drop of each file to the end of its conversion, the batches and the seconds of a scan
+def run_case(case, work_dir, idle, count, gap, interval, settle):
+    root_dir = os.path.join(work_dir, case)
+    file_manager = FileManager(root_dir=root_dir)
+    file_manager.ensure_directories()
+    # the idle files are files without a converter left in the raw directory, the polling watcher scans them every interval
+    for index in range(idle):
+        with open(os.path.join(file_manager.raw_dir, f"idle_{index}.bin"), "wb") as f:
+            f.write(b"\x00\x01\x02")
+    daemon = watcher.WatchDaemon(file_manager, interval=interval, settle=settle, polling=case == "polling")
+    daemon.start()
+    if case == "inotify" and not isinstance(daemon.watcher, watcher.InotifyWatcher):
+        daemon.stop()
+        return None
+    start = time.perf_counter()
+    watcher.scan_states(file_manager.raw_dir)
+    scan_seconds = time.perf_counter() - start
+    try:
+        # the idle files are processed by the first batches
+        while daemon.queue_depth():
+            daemon.step()
+        batches = daemon.batches
+        dropped = {}
+        thread = threading.Thread(target=drop_files, args=(file_manager.raw_dir, count, gap, dropped))
+        thread.start()
+        latencies = {}
+        deadline = time.monotonic() + count * gap + 30
+        while len(latencies) < count and time.monotonic() < deadline:
+            for path in daemon.step():
+                latencies[path] = time.monotonic() - dropped[path]
+        thread.join()
+    finally:
+        daemon.stop()
+    return list(latencies.values()), daemon.batches - batches, scan_seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the latency of the watch mode, from the drop of a file in the raw directory to its markdown")
+    parser.add_argument("--files", type=int, default=200, help="the number of files dropped")
+    parser.add_argument("--gap", type=float, default=0.01, help="the seconds between two dropped files")
+    parser.add_argument("--idle", type=int, default=10000, help="the number of idle files in the raw directory")
+    parser.add_argument("--interval", type=float, default=1.0, help="the seconds between the scans of the polling watcher")
+    parser.add_argument("--settle", type=float, default=0.5, help="the seconds a file must stay unchanged before it is converted")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        print(f"{args.files} files dropped every {args.gap} s next to {args.idle} idle files, settle {args.settle} s")
+        print(f"{'case':>8} {'median (s)':>11} {'p95 (s)':>8} {'max (s)':>8} {'batches':>8} {'scan (ms)':>10}")
+        for case in args.cases:
+            result = run_case(case, work_dir, args.idle, args.files, args.gap, args.interval, args.settle)
+            if result is None:
+                print(f"{case:>8} inotify is not available")
+                continue
+            latencies, batches, scan_seconds = result
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{case:>8} {statistics.median(latencies):11.3f} {p95:8.3f} {latencies[-1]:8.3f} {batches:>8} {scan_seconds * 1000:10.1f}")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
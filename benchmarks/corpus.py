@@ -0,0 +1,234 @@
+import io
+import os
+import csv
+import json
+import copy
+import random
+import shutil
+import zipfile
+from docx import Document
+from PIL import Image, ImageDraw
+from openpyxl import Workbook
+
+# build a synthetic docx document in memory with n_paragraphs paragraphs and n_tables tables
+# the paragraphs and tables are interleaved, one table after every n_paragraphs // n_tables paragraphs
+# the body elements are deep copies of a template paragraph and table, which is much faster than the python-docx add_* api
+def make_docx(n_paragraphs, n_tables=0, table_rows=3, table_cols=3):
+    doc = Document()
+    template_p = doc.add_paragraph("Synthetic paragraph text for benchmarking.", style="Normal")._p
+    template_tbl = doc.add_table(rows=table_rows, cols=table_cols)._tbl
+    for row_idx, row in enumerate(doc.tables[0].rows):
+        for col_idx, cell in enumerate(row.cells):
+            cell.text = f"r{row_idx}c{col_idx}"
+    body = doc.element.body
+    sect_pr = body.sectPr
+    body.remove(template_p)
+    body.remove(template_tbl)
+
+    tables_every = n_paragraphs // n_tables if n_tables else 0
+    tables_added = 0
+    for idx in range(n_paragraphs):
+        element = copy.deepcopy(template_p)
+        sect_pr.addprevious(element)
+        if tables_every and (idx + 1) % tables_every == 0 and tables_added < n_tables:
+            sect_pr.addprevious(copy.deepcopy(template_tbl))
+            tables_added += 1
+    while tables_added < n_tables:
+        sect_pr.addprevious(copy.deepcopy(template_tbl))
+        tables_added += 1
+    return doc
+
+# save a synthetic docx document to a file
+def save_docx(path, n_paragraphs, n_tables=0, **kwargs):
+    doc = make_docx(n_paragraphs, n_tables, **kwargs)
+    doc.save(path)
+    return path
+
+# return the bytes of a small png image
+def make_png(width=16, height=16, color=(200, 30, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+# save a png image of a line of black text on a white background, to be read by OCR
+def save_text_png(path, text, width=600, height=80):
+    image = Image.new("RGB", (width, height), "white")
+    ImageDraw.Draw(image).text((10, 20), text, fill="black", font_size=32)
+    image.save(path)
+    return path
+
+# build a synthetic docx document in memory with n_paragraphs empty-text paragraphs holding inline pictures
+# every paragraph has images_per_paragraph pictures of the same embedded image
+def make_image_docx(n_paragraphs, images_per_paragraph=1):
+    doc = Document()
+    para = doc.add_paragraph()
+    for _ in range(images_per_paragraph):
+        para.add_run().add_picture(io.BytesIO(make_png()))
+    template_p = para._p
+    for _ in range(n_paragraphs - 1):
+        template_p.addnext(copy.deepcopy(template_p))
+    return doc
+
+# build a synthetic docx document with n_paragraphs paragraphs, n_tables tables and n_images pictures
+# the pictures are distinct images followed by the logo image shared by all the documents, each in its own paragraph
+def make_mixed_docx(n_paragraphs, n_tables=0, n_images=0, image_seed=0, **kwargs):
+    doc = make_docx(n_paragraphs, n_tables, **kwargs)
+    for idx in range(n_images):
+        color = ((image_seed * 37 + idx * 53) % 256, (image_seed * 11 + idx * 97) % 256, 128)
+        doc.add_paragraph().add_run().add_picture(io.BytesIO(make_png(64, 64, color)))
+    if n_images:
+        doc.add_paragraph().add_run().add_picture(io.BytesIO(make_png(64, 64, (20, 20, 20))))
+    return doc
+
+# build a born-digital pdf document with a text layer, n_pages pages of lines_per_page lines of text
+# the pdf is written by hand with the standard Helvetica font, so no pdf library is needed
+def make_pdf(n_pages, lines_per_page=20):
+    objects = []
+    # 1: catalog, 2: pages, 3: font, then a page and a content stream object per page
+    page_ids = [4 + 2 * idx for idx in range(n_pages)]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {n_pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for page_idx, page_id in enumerate(page_ids):
+        lines = [f"BT /F1 12 Tf 72 {740 - 30 * line_idx} Td (Page {page_idx + 1} line {line_idx + 1} of synthetic benchmark text.) Tj ET"
+                 for line_idx in range(lines_per_page)]
+        if page_idx == 0:
+            lines.insert(0, "BT /F1 20 Tf 72 770 Td (Synthetic Title) Tj ET")
+        content = "\n".join(lines).encode()
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for idx, obj in enumerate(objects):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % (idx + 1) + obj + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+# save a synthetic pdf document to a file
+def save_pdf(path, n_pages, **kwargs):
+    with open(path, "wb") as f:
+        f.write(make_pdf(n_pages, **kwargs))
+    return path
+
+# the values of a synthetic table row: an id, a name, a date, an amount and text columns up to n_cols columns
+def make_row(idx, n_cols):
+    row = [idx, f"name {idx}", f"2024-{idx % 12 + 1:02d}-{idx % 28 + 1:02d}", round(idx * 1.25, 2)]
+    row += [f"text {idx} {col}" for col in range(len(row), n_cols)]
+    return row[:n_cols]
+
+# save a synthetic csv file with a header and n_rows rows of n_cols columns
+def save_csv(path, n_rows, n_cols=10):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([f"column {col}" for col in range(n_cols)])
+        for idx in range(n_rows):
+            writer.writerow(make_row(idx, n_cols))
+    return path
+
+# save a synthetic xlsx workbook with n_sheets sheets of a header and n_rows rows of n_cols columns
+# the workbook is written in write only mode, the rows are not held in memory
+def save_xlsx(path, n_rows, n_cols=10, n_sheets=1):
+    workbook = Workbook(write_only=True)
+    for sheet_idx in range(n_sheets):
+        sheet = workbook.create_sheet(f"Sheet {sheet_idx + 1}")
+        sheet.append([f"column {col}" for col in range(n_cols)])
+        for idx in range(n_rows):
+            sheet.append(make_row(idx, n_cols))
+    workbook.save(path)
+    return path
+
+# a synthetic json log record with a nested object
+def make_record(idx):
+    return {"id": idx, "level": ["info", "warning", "error"][idx % 3], "message": f"synthetic event {idx}",
+            "user": {"name": f"user {idx % 100}", "roles": ["reader", "writer"][: idx % 2 + 1]}, "duration": idx * 0.5}
+
+# save n_records synthetic records as a json array, or as json lines if lines is True
+def save_json(path, n_records, lines=False):
+    with open(path, "w", encoding="utf-8") as f:
+        if lines:
+            for idx in range(n_records):
+                f.write(json.dumps(make_record(idx)) + "\n")
+            return path
+        f.write("[")
+        for idx in range(n_records):
+            f.write((",\n" if idx else "\n") + json.dumps(make_record(idx)))
+        f.write("\n]\n")
+    return path
+
+# save a zip archive of files, members is a list of (name in the archive, path of the file)
+def save_zip(path, members):
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, member_path in members:
+            zip_file.write(member_path, name)
+    return path
+
+# the number of files of each type of the corpus at scale 1, and the range of their sizes
+CORPUS_FILES = {
+    "docx": (4, dict(paragraphs=(200, 2000), tables=(5, 50), images=(0, 8))),
+    "pdf": (2, dict(pages=(5, 30))),
+    "csv": (2, dict(rows=(5000, 50000))),
+    "xlsx": (1, dict(rows=(1000, 3000))),
+    "json": (2, dict(records=(5000, 20000))),
+    "png": (2, dict(size=(64, 512))),
+}
+
+# save a deterministic corpus of raw files in directories by type under corpus_dir, the same seed gives the same files
+# scale multiplies the number of files, the sizes of the files are drawn from the ranges of CORPUS_FILES
+# the zip directory holds a zip archive of docx, csv and json files with a nested zip archive
+# return a dictionary of the paths of the files by type
+def save_corpus(corpus_dir, scale=1, seed=0):
+    rng = random.Random(seed)
+    # return a size drawn from a range
+    def draw(size_range):
+        return rng.randint(*size_range)
+
+    files = {}
+    for file_type, (count, sizes) in CORPUS_FILES.items():
+        type_dir = os.path.join(corpus_dir, file_type)
+        os.makedirs(type_dir, exist_ok=True)
+        paths = files[file_type] = []
+        for idx in range(count * scale):
+            path = os.path.join(type_dir, f"{file_type}_{idx}.{file_type}")
+            if file_type == "docx":
+                make_mixed_docx(draw(sizes["paragraphs"]), draw(sizes["tables"]), draw(sizes["images"]), image_seed=idx).save(path)
+            elif file_type == "pdf":
+                save_pdf(path, draw(sizes["pages"]))
+            elif file_type == "csv":
+                save_csv(path, draw(sizes["rows"]))
+            elif file_type == "xlsx":
+                save_xlsx(path, draw(sizes["rows"]))
+            elif file_type == "json":
+                # every other file is a json lines file
+                if idx % 2:
+                    path = os.path.splitext(path)[0] + ".jsonl"
+                save_json(path, draw(sizes["records"]), lines=bool(idx % 2))
+            elif file_type == "png":
+                size = draw(sizes["size"])
+                with open(path, "wb") as f:
+                    f.write(make_png(size, size, (idx * 40 % 256, 90, 160)))
+            paths.append(path)
+
+    zip_dir = os.path.join(corpus_dir, "zip")
+    os.makedirs(zip_dir, exist_ok=True)
+    files["zip"] = []
+    for idx in range(scale):
+        member_dir = os.path.join(zip_dir, f"members_{idx}")
+        os.makedirs(member_dir, exist_ok=True)
+        docx_paths = [os.path.join(member_dir, f"zipped_{doc_idx}.docx") for doc_idx in range(3)]
+        for doc_idx, path in enumerate(docx_paths):
+            make_mixed_docx(draw((100, 500)), draw((1, 10)), draw((0, 3)), image_seed=100 + doc_idx).save(path)
+        csv_path = save_csv(os.path.join(member_dir, "zipped.csv"), draw((1000, 5000)))
+        json_path = save_json(os.path.join(member_dir, "zipped.json"), draw((1000, 5000)))
+        inner_path = save_zip(os.path.join(member_dir, "inner.zip"), [("inner/nested.docx", docx_paths[0]), ("inner/nested.json", json_path)])
+        members = [(f"docs/{os.path.basename(path)}", path) for path in docx_paths]
+        members += [("data/zipped.csv", csv_path), ("data/zipped.json", json_path), ("inner.zip", inner_path)]
+        files["zip"].append(save_zip(os.path.join(zip_dir, f"archive_{idx}.zip"), members))
+        shutil.rmtree(member_dir)
+    return files
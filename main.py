@@ -1,12 +1,34 @@
+import argparse
 from util.file_manager import *
+from util.watcher import WatchDaemon
+from util.output_store import STORES
 
 # Example usage
 if __name__ == "__main__":
-    file_manager = FileManager()
-    
-    # file_manager.reset_all_directories()
-    file_manager.reset_originals_directory()
-    # raw_files = file_manager.list_raw_files()
-    # print(raw_files)
-
-    processed_files = file_manager.process_raw_dir()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Convert the files of the raw directory to markdown")
+    parser.add_argument("--root-dir", default="./Data")
+    # in watch mode the files dropped in the raw directory are converted as they arrive, the directories are not reset
+    parser.add_argument("--watch", action="store_true", help="watch the raw directory and convert the new and changed files")
+    parser.add_argument("--interval", type=float, default=1.0, help="the seconds between the scans of the polling watcher")
+    parser.add_argument("--settle", type=float, default=0.5, help="the seconds a file must stay unchanged before it is converted")
+    parser.add_argument("--batch-size", type=int, default=256, help="the largest number of files converted in a batch")
+    parser.add_argument("--polling", action="store_true", help="scan the raw directory instead of using inotify")
+    # the raw directory must hold the full set of inputs at each run, the converted files are moved to the originals directory
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip the files converted by an earlier run, the outputs of the files not dropped again in the raw "
+                             "directory are deleted (all the outputs are kept if the raw directory is empty)")
+    parser.add_argument("--output-store", choices=STORES, default="files",
+                        help="write the outputs as files in the processed directory or pack them in a sqlite database")
+    args = parser.parse_args()
+
+    file_manager = FileManager(root_dir=args.root_dir, incremental=args.incremental, output_store=args.output_store)
+
+    if args.watch:
+        WatchDaemon(file_manager, interval=args.interval, settle=args.settle, batch_size=args.batch_size, polling=args.polling).run()
+    else:
+        # file_manager.reset_all_directories()
+        file_manager.reset_originals_directory()
+        # raw_files = file_manager.list_raw_files()
+        # print(raw_files)
+
+        processed_files = file_manager.process_raw_dir()
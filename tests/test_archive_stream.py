@@ -0,0 +1,46 @@
+import unittest
+import os
+import shutil
+import zipfile
+from util import archive_stream
+
+class TestArchiveStream(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "./TestData"
+        os.makedirs(self.test_dir, exist_ok=True)
+        # outer.zip contains a.txt and inner.zip, inner.zip contains b.txt and c.pdf
+        self.inner_zip = os.path.join(self.test_dir, "inner.zip")
+        with zipfile.ZipFile(self.inner_zip, 'w') as zip_file:
+            zip_file.writestr("b.txt", "inner text")
+            zip_file.writestr("docs/c.pdf", "%PDF-1.4 not really a pdf")
+        self.outer_zip = os.path.join(self.test_dir, "outer.zip")
+        with zipfile.ZipFile(self.outer_zip, 'w') as zip_file:
+            zip_file.writestr("a.txt", "outer text")
+            zip_file.write(self.inner_zip, "nested/inner.zip")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_01_iter_zip_members(self):
+        members = {}
+        for label, name, extension, stream in archive_stream.iter_zip_members(self.outer_zip, "outer.zip"):
+            members[label] = (name, extension, stream.read())
+        self.assertEqual(members, {
+            "outer.zip/a.txt": ("a.txt", "txt", b"outer text"),
+            "outer.zip/nested/inner.zip/b.txt": ("b.txt", "txt", b"inner text"),
+            "outer.zip/nested/inner.zip/docs/c.pdf": ("c.pdf", "pdf", b"%PDF-1.4 not really a pdf"),
+        })
+
+    def test_02_iter_zip_members_wanted(self):
+        labels = [label for label, name, extension, stream in archive_stream.iter_zip_members(self.outer_zip, "outer.zip", wanted=lambda extension: extension == "pdf")]
+        self.assertEqual(labels, ["outer.zip/nested/inner.zip/docs/c.pdf"])
+
+    def test_03_iter_zip_members_limits(self):
+        with self.assertRaises(archive_stream.ArchiveLimitError):
+            list(archive_stream.iter_zip_members(self.outer_zip, "outer.zip", max_depth=0))
+        with self.assertRaises(archive_stream.ArchiveLimitError):
+            list(archive_stream.iter_zip_members(self.outer_zip, "outer.zip", max_bytes=100))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import sys
+import json
+import subprocess
+import unittest
+from util import backends
+
+class TestBackends(unittest.TestCase):
+
+    def test_01_lazy_import(self):
+        # the backends are not imported by the import of the file manager, a new process is needed to see it
+        code = ("import sys, json; import util.file_manager; "
+                "print(json.dumps([module for module in sys.modules if module.split('.')[0] in "
+                "('unstructured', 'markitdown', 'openpyxl', 'pypdf', 'pypdfium2', 'unstructured_pytesseract')]))")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(json.loads(output.strip().splitlines()[-1]), [])
+
+    def test_02_load(self):
+        self.assertEqual(backends.extension_backends("docx"), [])
+        backends.load(backends.extension_backends("xlsx"))
+        self.assertIn("xlsx", backends.import_times())
+        # a backend is imported once per process
+        self.assertEqual(backends.load(["xlsx"]), {})
+        self.assertTrue(hasattr(backends.get("xlsx"), "load_workbook"))
+
+if __name__ == "__main__":
+    unittest.main()
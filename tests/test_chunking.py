@@ -0,0 +1,102 @@
+import io
+import os
+import shutil
+import unittest
+from util import chunking
+from util import markdown_writer
+from util.chunking import Chunker
+
+class TestChunking(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "./TestData"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.elements = [
+            {"type": "Title", "content": "Report"},
+            {"type": "Heading 1", "content": "Intro"},
+            {"type": "Normal", "content": "a" * 30},
+            {"type": "Normal", "content": "b" * 30},
+            {"type": "Normal", "content": "c" * 30},
+            {"type": "Heading 1", "content": "Data"},
+            {"type": "table", "content": [["name", "value"]] + [[f"row{idx}", str(idx)] for idx in range(10)]},
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def chunk(self, elements, **kwargs):
+        chunks = []
+        chunker = Chunker(chunks.append, **kwargs)
+        sink = io.StringIO()
+        markdown_writer.render_markdown(elements, sink, on_element=chunker.add)
+        chunker.finish()
+        return chunks, sink.getvalue()
+
+    def test_01_chunker(self):
+        chunks, markdown = self.chunk(self.elements, max_chars=70, metadata={"source": "report.md"})
+        # the text of a chunk is its slice of the markdown
+        for chunk in chunks:
+            self.assertEqual(markdown[chunk["start"]:chunk["end"]], chunk["text"])
+            self.assertEqual(chunk["source"], "report.md")
+        self.assertEqual([chunk["index"] for chunk in chunks], list(range(len(chunks))))
+        # the headings are kept with the first paragraph of their section, the paragraphs are split by size
+        self.assertEqual(chunks[0]["text"], "# Report\n# Intro\n" + "a" * 30 + "\n")
+        self.assertEqual(chunks[0]["headings"], ["Report", "Intro"])
+        self.assertEqual(chunks[1]["text"], "b" * 30 + "\n" + "c" * 30 + "\n")
+        self.assertEqual(chunks[1]["elements"], [3, 4])
+        # a heading starts a new chunk, the table longer than a chunk is split between its rows
+        self.assertTrue(chunks[2]["text"].startswith("# Data\n| name | value |\n"))
+        self.assertEqual(chunks[2]["headings"], ["Report", "Data"])
+        # only the headings leading a chunk may take it over the size
+        self.assertLessEqual(len(chunks[2]["text"]) - len("# Data\n"), 70)
+        self.assertTrue(all(len(chunk["text"]) <= 70 for chunk in chunks[3:]))
+        self.assertEqual(chunks[-1]["end"], len(markdown))
+        self.assertTrue(all(chunk["text"].endswith("\n") for chunk in chunks[2:]))
+
+    def test_02_overlap_and_pages(self):
+        elements = [{"type": "text", "category": "NarrativeText", "content": f"line {idx}", "page": idx // 4 + 1} for idx in range(8)]
+        elements.insert(0, {"type": "text", "category": "Title", "content": "Scan", "page": 1})
+        chunks, markdown = self.chunk(elements, max_chars=30, overlap=7)
+        self.assertEqual(chunks[0]["headings"], ["Scan"])
+        # the last element of a chunk closed for its size starts the next chunk
+        self.assertEqual(chunks[1]["text"][:7], "line 2\n")
+        self.assertEqual(chunks[0]["text"][-7:], "line 2\n")
+        self.assertEqual(chunks[1]["headings"], ["Scan"])
+        self.assertEqual(chunks[-1]["pages"], [2, 2])
+        self.assertEqual(chunks[0]["pages"], [1, 1])
+        for chunk in chunks:
+            self.assertEqual(markdown[chunk["start"]:chunk["end"]], chunk["text"])
+
+    def test_04_overlap_size(self):
+        # the elements of mixed sizes, the element closing a chunk leaves no room for the whole overlap
+        elements = [{"type": "Normal", "content": char * size} for char, size in zip("abcdef", [4, 29, 29, 89, 9, 59])]
+        chunks, markdown = self.chunk(elements, max_chars=100, overlap=60)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk["text"]), 100)
+            self.assertEqual(markdown[chunk["start"]:chunk["end"]], chunk["text"])
+        # the paragraphs b and c do not fit with d, the paragraph e is repeated as it fits with f
+        self.assertEqual([chunk["elements"] for chunk in chunks], [[0, 2], [3, 4], [4, 5]])
+        self.assertEqual(chunks[-1]["end"], len(markdown))
+        # the overlap must be shorter than a chunk
+        with self.assertRaises(ValueError):
+            Chunker(chunks.append, max_chars=100, overlap=100)
+
+    def test_03_chunk_writer_insert_chunk_texts(self):
+        elements = [{"type": "Heading 1", "content": "Logo"}, {"type": "image", "content": "logo.png"}, {"type": "Normal", "content": "text"}]
+        markdown_path = os.path.join(self.test_dir, "doc.md")
+        chunks_path = os.path.join(self.test_dir, "doc.chunks.jsonl")
+        with chunking.chunk_writer(chunks_path, max_chars=25) as chunker:
+            markdown_writer.write_markdown(elements, markdown_path, on_element=chunker.add)
+        insertions = markdown_writer.annotate_images(markdown_path, {"logo.png": "ACME"})
+        chunking.insert_chunk_texts(chunks_path, insertions)
+        with open(markdown_path, 'r', encoding='utf-8') as f:
+            markdown = f.read()
+        chunks = list(chunking.iter_chunks(chunks_path))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[0]["text"], "# Logo\n![image](logo.png)\n> ACME\n")
+        for chunk in chunks:
+            self.assertEqual(markdown[chunk["start"]:chunk["end"]], chunk["text"])
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ["doc.chunks.jsonl", "doc.md"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import unittest
+from PIL import Image
+from docx import Document
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from util import docx_utils
+
+class TestDocxUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.doc = Document()
+        self.doc.add_paragraph("first", style="Title")
+        self.doc.add_table(rows=1, cols=2)
+        self.doc.add_paragraph("second")
+        self.doc.add_paragraph("third", style="Heading 1")
+
+    def test_01_iter_block_items(self):
+        blocks = [block for element, block in docx_utils.iter_block_items(self.doc)]
+        # the body ends with the section properties, which have no block object
+        self.assertIsNone(blocks[-1])
+        blocks = blocks[:-1]
+        self.assertEqual([type(block) for block in blocks], [Paragraph, Table, Paragraph, Paragraph])
+        self.assertEqual([block.text for block in blocks if isinstance(block, Paragraph)], ["first", "second", "third"])
+
+    def test_02_get_paragraph_style(self):
+        style_cache = {}
+        styles = [docx_utils.get_paragraph_style(para, style_cache) for para in self.doc.paragraphs]
+        self.assertEqual(styles, ["title", "normal", "heading 1"])
+        self.assertEqual(len(style_cache), 3)
+
+    def test_03_find_embedded_rids(self):
+        para = self.doc.add_paragraph()
+        for color in [(255, 0, 0), (0, 255, 0)]:
+            image = io.BytesIO()
+            Image.new("RGB", (8, 8), color).save(image, format="PNG")
+            para.add_run().add_picture(image)
+        r_ids = docx_utils.find_embedded_rids(para._p)
+        self.assertEqual(len(r_ids), 2)
+        self.assertTrue(all(self.doc.part.rels[r_id].reltype.endswith("/image") for r_id in r_ids))
+        self.assertEqual(docx_utils.find_embedded_rids(self.doc.paragraphs[0]._p), [])
+
+    def test_04_iter_tables(self):
+        table = self.doc.add_table(rows=3, cols=3)
+        for row in range(3):
+            for col in range(3):
+                table.cell(row, col).text = f"{row}{col}"
+        table.cell(0, 0).merge(table.cell(0, 1))
+        table.cell(1, 2).merge(table.cell(2, 2))
+        nested = table.cell(1, 0).add_table(rows=1, cols=2)
+        nested.cell(0, 0).text = "nested"
+        # the merged cells are written once, the nested table follows its table
+        self.assertEqual(list(docx_utils.iter_tables(table._tbl)), [
+            [["00\n01", "", "02"], ["10\n", "11", "12\n22"], ["20", "21", ""]],
+            [["nested", ""]],
+        ])
+        # the tabs and the breaks of the runs are translated as by python-docx
+        para = table.cell(0, 2).add_paragraph("a\tb")
+        para.add_run("c\nd")
+        self.assertEqual(docx_utils.paragraph_text(para._p), "a\tbc\nd")
+        self.assertEqual(docx_utils.paragraph_text(para._p), para.text)
+        # a row starting after the first grid column is padded
+        tr_pr = table.rows[2]._tr.get_or_add_trPr()
+        grid_before = tr_pr.makeelement(docx_utils.GRID_BEFORE_TAG, {docx_utils.W_VAL: "1"})
+        tr_pr.append(grid_before)
+        self.assertEqual(docx_utils.read_table(table._tbl)[0][2], ["", "20", "21", ""])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,16 @@
 import unittest
 import os
 import shutil
+import asyncio
+import zipfile
+from openpyxl import Workbook
+from PIL import Image, ImageDraw
+from docx import Document
 from util.file_manager import FileManager
+from util import chunking
+from util import data_utils
+from util import markdown_writer
+from util.metrics import Metrics
 
 class TestFileManager(unittest.TestCase):
 
@@ -92,6 +101,10 @@ class TestFileManager(unittest.TestCase):
         for file_name in file_names:
             self.assertTrue(any(f"{file_name}.docx" in file for file in processed_files), msg= f"{file_name}.docx not found in processed_files")
 
+        # the files extracted from the archive are moved to the originals directory with it
+        self.assertEqual(os.listdir(os.path.join(self.file_manager.originals_dir, "zip")), ["test02.zip"])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.file_manager.originals_dir, "docx"))), ["23.docx", "Hello.docx"])
+
         processed_files_list = os.listdir(self.file_manager.processed_dir)
         self.assertEqual(len(processed_files_list), len(expected_processed_files_list), msg= f"Expected {len(expected_processed_files_list)} files in processed_dir, found {len(processed_files_list)}")
 
@@ -136,6 +149,356 @@ class TestFileManager(unittest.TestCase):
                     with open(os.path.join(self.file_manager.processed_dir, processed_files_list[idx]), 'r') as actual_file:
                         self.assertEqual(expected_file.read(), actual_file.read(), msg= f"Expected content of {expected_processed_files_list[idx]} does not match actual content")
 
+    def test_10_process_raw_dir_parallel(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, workers=2)
+        self.file_manager.reset_all_directories()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+        # a broken docx file must not stop the conversion of the other files
+        with open(os.path.join(self.file_manager.raw_dir, "broken.docx"), 'w') as f:
+            f.write("not a docx file")
+
+        shutil.unpack_archive("tests/test02_expected_artifact.zip", self.expected_artifacts_dir)
+        expected_processed_files_list = sorted(os.listdir(self.expected_artifacts_dir))
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 3)
+        self.assertTrue(processed_files[0].endswith("test02.zip"))
+        for file_name in ["23", "Hello"]:
+            self.assertTrue(any(f"{file_name}.docx" in file for file in processed_files), msg= f"{file_name}.docx not found in processed_files")
+        self.assertFalse(any("broken.docx" in file for file in processed_files))
+        # the broken file is left in the raw directory
+        self.assertTrue(os.path.exists(os.path.join(self.file_manager.raw_dir, "broken.docx")))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.file_manager.originals_dir, "docx"))), ["23.docx", "Hello.docx"])
+
+        processed_files_list = sorted(os.listdir(self.file_manager.processed_dir))
+        self.assertEqual(processed_files_list, expected_processed_files_list)
+        for file_name in processed_files_list:
+            if os.path.isfile(os.path.join(self.expected_artifacts_dir, file_name)):
+                with open(os.path.join(self.expected_artifacts_dir, file_name), 'r') as expected_file:
+                    with open(os.path.join(self.file_manager.processed_dir, file_name), 'r') as actual_file:
+                        self.assertEqual(expected_file.read(), actual_file.read(), msg= f"Expected content of {file_name} does not match actual content")
+
+    def test_11_process_raw_dir_incremental(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, incremental=True)
+        self.file_manager.reset_all_directories()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 3)
+        processed_files_list = sorted(os.listdir(self.file_manager.processed_dir))
+
+        # an unchanged file is skipped and its outputs are kept
+        self.file_manager = FileManager(root_dir=self.test_dir, incremental=True)
+        self.file_manager.reset_originals_directory()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(processed_files, [])
+        self.assertEqual(len(self.file_manager.skipped_files), 1)
+        self.assertEqual(sorted(os.listdir(self.file_manager.processed_dir)), processed_files_list)
+
+        # a run on an empty raw directory keeps the outputs
+        self.file_manager.reset_originals_directory()
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(processed_files, [])
+        self.assertEqual(sorted(os.listdir(self.file_manager.processed_dir)), processed_files_list)
+
+        # the outputs of a file missing from a partial drop are removed
+        with open(os.path.join(self.file_manager.raw_dir, "b.csv"), 'w') as f:
+            f.write("a,b\n1,2\n")
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 1)
+        self.assertEqual(os.listdir(self.file_manager.processed_dir), ["b.md"])
+
+    def test_12_process_raw_dir_stream_archives(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, stream_archives=True)
+        self.file_manager.reset_all_directories()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+
+        shutil.unpack_archive("tests/test02_expected_artifact.zip", self.expected_artifacts_dir)
+        expected_processed_files_list = sorted(os.listdir(self.expected_artifacts_dir))
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 3)
+        for file_name in ["23", "Hello"]:
+            self.assertTrue(any(f"test02.zip/{file_name}.docx" in file for file in processed_files), msg= f"{file_name}.docx not found in processed_files")
+        # the archive is not extracted to the raw directory
+        self.assertEqual(os.listdir(self.file_manager.raw_dir), [])
+
+        processed_files_list = sorted(os.listdir(self.file_manager.processed_dir))
+        self.assertEqual(processed_files_list, expected_processed_files_list)
+        for file_name in processed_files_list:
+            if os.path.isfile(os.path.join(self.expected_artifacts_dir, file_name)):
+                with open(os.path.join(self.expected_artifacts_dir, file_name), 'r') as expected_file:
+                    with open(os.path.join(self.file_manager.processed_dir, file_name), 'r') as actual_file:
+                        self.assertEqual(expected_file.read(), actual_file.read(), msg= f"Expected content of {file_name} does not match actual content")
+
+    def test_13_process_raw_dir_stream_archives_limits(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, stream_archives=True, max_archive_bytes=1024)
+        self.file_manager.reset_all_directories()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(processed_files, [])
+        self.assertEqual(os.listdir(self.file_manager.processed_dir), [])
+        # the archive is left in the raw directory
+        self.assertEqual(os.listdir(self.file_manager.raw_dir), ["test02.zip"])
+
+    def test_14_process_docx_files_embedded_parts(self):
+        self.file_manager.reset_all_directories()
+        shutil.unpack_archive("tests/test02.zip", self.file_manager.raw_dir)
+        shutil.copy(os.path.join(self.file_manager.raw_dir, "Hello.docx"), os.path.join(self.file_manager.raw_dir, "Copy.docx"))
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 3)
+
+        # only the parts referenced by the documents are saved
+        embed_dir = os.path.join(self.file_manager.processed_dir, "23_docx_embed")
+        self.assertEqual(sorted(os.listdir(embed_dir)), ["embeddings", "media"])
+
+        # the images of the copy are not saved in its embedding directory, the second document links to the shared folder
+        embed_dirs = [name for name in os.listdir(self.file_manager.processed_dir) if name in ["Hello_docx_embed", "Copy_docx_embed"]]
+        self.assertEqual(len(embed_dirs), 1)
+        shared_dir = os.path.join(self.file_manager.processed_dir, "_blobs")
+        self.assertEqual(len(os.listdir(shared_dir)), 2)
+        linked = [markdown_writer.linked_paths(os.path.join(self.file_manager.processed_dir, name)) for name in ["Hello.md", "Copy.md"]]
+        self.assertEqual([data_utils.file_hash(path) for path in linked[0]], [data_utils.file_hash(path) for path in linked[1]])
+        self.assertEqual(sum(all(path.startswith(shared_dir) for path in paths) for paths in linked), 1)
+
+    def test_15_process_raw_dir_process_pdf_files_windows(self):
+        # the pdf is partitioned in windows of 2 pages in 2 processes, the outputs are the same as for the whole file
+        self.file_manager = FileManager(root_dir=self.test_dir, pdf_window_pages=2, pdf_workers=2)
+        self.file_manager.reset_all_directories()
+        shutil.unpack_archive("tests/test03.zip", self.file_manager.raw_dir)
+        shutil.unpack_archive("tests/test03_expected_artifact.zip", self.expected_artifacts_dir)
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 1)
+        self.assertTrue(any("Hello.pdf" in file for file in processed_files))
+
+        self.assertEqual(sorted(os.listdir(os.path.join(self.file_manager.processed_dir, "Hello_pdf_images"))),
+                         sorted(os.listdir(os.path.join(self.expected_artifacts_dir, "Hello_pdf_images"))))
+        with open(os.path.join(self.expected_artifacts_dir, "Hello.md"), 'r') as expected_file:
+            with open(os.path.join(self.file_manager.processed_dir, "Hello.md"), 'r') as actual_file:
+                self.assertEqual(expected_file.read(), actual_file.read())
+
+    def test_16_aprocess_raw_dir(self):
+        self.file_manager.reset_all_directories()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+        with open(os.path.join(self.file_manager.raw_dir, "broken.docx"), 'w') as f:
+            f.write("not a docx file")
+
+        shutil.unpack_archive("tests/test02_expected_artifact.zip", self.expected_artifacts_dir)
+        expected_processed_files_list = sorted(os.listdir(self.expected_artifacts_dir))
+
+        # queues of a single item, the stages wait for each other
+        processed_files = asyncio.run(self.file_manager.aprocess_raw_dir(queue_size=1))
+        self.assertEqual(len(processed_files), 3)
+        self.assertTrue(processed_files[0].endswith("test02.zip"))
+        for file_name in ["23", "Hello"]:
+            self.assertTrue(any(f"{file_name}.docx" in file for file in processed_files), msg= f"{file_name}.docx not found in processed_files")
+        self.assertTrue(os.path.exists(os.path.join(self.file_manager.raw_dir, "broken.docx")))
+        self.assertEqual(os.listdir(os.path.join(self.file_manager.originals_dir, "zip")), ["test02.zip"])
+
+        processed_files_list = sorted(os.listdir(self.file_manager.processed_dir))
+        self.assertEqual(processed_files_list, expected_processed_files_list)
+        for file_name in processed_files_list:
+            if os.path.isfile(os.path.join(self.expected_artifacts_dir, file_name)):
+                with open(os.path.join(self.expected_artifacts_dir, file_name), 'r') as expected_file:
+                    with open(os.path.join(self.file_manager.processed_dir, file_name), 'r') as actual_file:
+                        self.assertEqual(expected_file.read(), actual_file.read(), msg= f"Expected content of {file_name} does not match actual content")
+
+    def test_17_process_raw_dir_process_csv_xlsx_files(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, table_rows=2)
+        self.file_manager.reset_all_directories()
+        with open(os.path.join(self.file_manager.raw_dir, "table.csv"), 'w') as f:
+            f.write("name,value\na,1\nb,2\nc,3\n")
+        workbook = Workbook()
+        workbook.active.title = "First"
+        workbook.active.append(["name", "value"])
+        workbook.active.append(["a", 1.0])
+        workbook.create_sheet("Second").append(["only", "header"])
+        workbook.save(os.path.join(self.file_manager.raw_dir, "book.xlsx"))
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 2)
+        with open(os.path.join(self.file_manager.processed_dir, "table.md"), 'r') as f:
+            # the rows are split in tables of 2 rows
+            self.assertEqual(f.read(), "| name | value |\n| --- | --- |\n| a | 1 |\n| b | 2 |\n"
+                                       "| name | value |\n| --- | --- |\n| c | 3 |\n")
+        with open(os.path.join(self.file_manager.processed_dir, "book.md"), 'r') as f:
+            self.assertEqual(f.read(), "## First\n| name | value |\n| --- | --- |\n| a | 1 |\n"
+                                       "## Second\n| only | header |\n| --- | --- |\n")
+
+    def test_18_process_raw_dir_process_json_files(self):
+        self.file_manager.reset_all_directories()
+        with open(os.path.join(self.file_manager.raw_dir, "records.json"), 'w') as f:
+            f.write('[{"id": 1, "user": {"name": "a"}}, {"id": 2, "user": {"name": "b"}}]')
+        with open(os.path.join(self.file_manager.raw_dir, "log.jsonl"), 'w') as f:
+            f.write('{"level": "info", "message": "started"}\n{"level": "error", "message": "failed"}\n')
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 2)
+        with open(os.path.join(self.file_manager.processed_dir, "records.md"), 'r') as f:
+            self.assertEqual(f.read(), "| id | user.name |\n| --- | --- |\n| 1 | a |\n| 2 | b |\n")
+        with open(os.path.join(self.file_manager.processed_dir, "log.md"), 'r') as f:
+            self.assertEqual(f.read(), "| level | message |\n| --- | --- |\n| info | started |\n| error | failed |\n")
+
+    def test_19_process_raw_dir_process_image_files(self):
+        self.file_manager.reset_all_directories()
+        Image.new("RGB", (40, 20), "white").save(os.path.join(self.file_manager.raw_dir, "scan.png"))
+        Image.new("RGB", (40, 20), "white").save(os.path.join(self.file_manager.raw_dir, "photo.jpeg"))
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 2)
+        self.assertEqual(sorted(os.listdir(self.file_manager.processed_dir)), ["photo.md", "photo_jpeg_images", "scan.md", "scan_png_images"])
+        image_path = os.path.join(self.file_manager.processed_dir, "scan_png_images", "scan.png")
+        self.assertTrue(os.path.exists(image_path))
+        with open(os.path.join(self.file_manager.processed_dir, "scan.md"), 'r') as f:
+            self.assertEqual(f.read(), f"![Image]({image_path})\n")
+        self.assertEqual(os.listdir(os.path.join(self.file_manager.originals_dir, "jpg")), ["photo.jpeg"])
+
+    @unittest.skipUnless(shutil.which("tesseract"), "tesseract is not installed")
+    def test_20_process_raw_dir_ocr_images(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, ocr_images=True, ocr_workers=2)
+        self.file_manager.reset_all_directories()
+        image = Image.new("RGB", (400, 80), "white")
+        ImageDraw.Draw(image).text((10, 30), "Invoice 42", fill="black", font_size=32)
+        image.save(os.path.join(self.file_manager.raw_dir, "scan.png"))
+        image.save(os.path.join(self.file_manager.raw_dir, "copy.png"))
+
+        self.file_manager.process_raw_dir()
+        with open(os.path.join(self.file_manager.processed_dir, "scan.md"), 'r') as f:
+            self.assertIn("> Invoice", f.read())
+        # the copy has the same content, its text is read once
+        self.assertEqual(len(self.file_manager.image_text_cache), 1)
+
+    def test_21_process_raw_dir_chunks(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, chunk_chars=200, chunk_overlap=50)
+        self.file_manager.reset_all_directories()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+        shutil.unpack_archive("tests/test02_expected_artifact.zip", self.expected_artifacts_dir)
+
+        self.file_manager.process_raw_dir()
+        # the markdown files are the same, with a chunks file next to each of them
+        processed_files_list = sorted(os.listdir(self.file_manager.processed_dir))
+        expected_processed_files_list = sorted(os.listdir(self.expected_artifacts_dir) + ["23.chunks.jsonl", "Hello.chunks.jsonl"])
+        self.assertEqual(processed_files_list, expected_processed_files_list)
+        for file_name in ["23", "Hello"]:
+            with open(os.path.join(self.file_manager.processed_dir, f"{file_name}.md"), 'r') as f:
+                markdown = f.read()
+            with open(os.path.join(self.expected_artifacts_dir, f"{file_name}.md"), 'r') as f:
+                self.assertEqual(markdown, f.read())
+            chunks = list(chunking.iter_chunks(os.path.join(self.file_manager.processed_dir, f"{file_name}.chunks.jsonl")))
+            self.assertTrue(chunks)
+            self.assertEqual(chunks[-1]["end"], len(markdown))
+            for chunk in chunks:
+                self.assertEqual(chunk["source"], f"{file_name}.md")
+                self.assertEqual(markdown[chunk["start"]:chunk["end"]], chunk["text"])
+
+    def test_22_process_raw_dir_metrics(self):
+        events = []
+        self.file_manager = FileManager(root_dir=self.test_dir, workers=2, metrics=Metrics(callback=events.append), profile_file="Hello.docx")
+        self.file_manager.reset_all_directories()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+
+        self.file_manager.process_raw_dir()
+        metrics = self.file_manager.metrics
+        # the stages of the worker processes are added to the metrics of the run
+        for stage in ["list", "zip_extract", "convert", "docx_read", "docx_scan", "blob_write", "render"]:
+            self.assertIn(stage, metrics.stages)
+        self.assertEqual(metrics.stages["convert"][0], 2)
+        self.assertEqual(metrics.counters["files_extracted"], 2)
+        self.assertGreater(metrics.counters["elements"], 0)
+        self.assertGreater(metrics.counters["bytes_written"], 0)
+        self.assertEqual(sorted(os.path.basename(event["file"]) for event in events if event["event"] == "file"), ["23.docx", "Hello.docx"])
+        self.assertEqual(os.listdir(os.path.join(self.test_dir, "profiles")), ["Hello.docx.prof"])
+
+    def test_23_process_raw_dir_txt_files(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, stream_archives=True, txt_section_chars=20)
+        self.file_manager.reset_all_directories()
+        with open(os.path.join(self.file_manager.raw_dir, "notes.txt"), "w", encoding="cp1252", newline="") as f:
+            f.write("Café notes\r\n\r\nfirst line\r\nsecond line\r\n\r\n\r\nlast\r\n")
+        with zipfile.ZipFile(os.path.join(self.file_manager.raw_dir, "logs.zip"), "w") as zip_file:
+            zip_file.writestr("log.txt", "\ufeffstart\n\nend\n".encode("utf-8"))
+
+        processed_files = self.file_manager.process_raw_dir()
+        self.assertEqual(len(processed_files), 3)
+        with open(os.path.join(self.file_manager.processed_dir, "notes.md"), "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "## Part 1 (line 1)\nCafé notes\n\n## Part 2 (line 3)\nfirst line\nsecond line\n\n## Part 3 (line 7)\nlast\n\n")
+        with open(os.path.join(self.file_manager.processed_dir, "log.md"), "r", encoding="utf-8") as f:
+            self.assertEqual(f.read(), "## Part 1 (line 1)\nstart\n\nend\n\n")
+        self.assertEqual(os.listdir(os.path.join(self.file_manager.originals_dir, "txt")), ["notes.txt"])
+
+    def test_24_process_batch(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, incremental=True)
+        self.file_manager.ensure_directories()
+        for name in ["a.txt", "b.txt"]:
+            with open(os.path.join(self.file_manager.raw_dir, name), "w") as f:
+                f.write(f"text of {name}\n")
+        self.file_manager.process_raw_dir()
+        with open(os.path.join(self.file_manager.raw_dir, "c.txt"), "w") as f:
+            f.write("text of c.txt\n")
+        with open(os.path.join(self.file_manager.raw_dir, "d.txt"), "w") as f:
+            f.write("text of d.txt\n")
+
+        # only the files of the batch are processed, the directories and the manifest entries of the other files are kept
+        processed_files = self.file_manager.process_batch([os.path.join(self.file_manager.raw_dir, "c.txt")])
+        self.assertEqual(processed_files, [os.path.join(self.file_manager.raw_dir, "c.txt")])
+        self.assertEqual(os.listdir(self.file_manager.raw_dir), ["d.txt"])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.file_manager.originals_dir, "txt"))), ["a.txt", "b.txt", "c.txt"])
+        self.assertEqual(sorted(os.listdir(self.file_manager.processed_dir)), ["a.md", "b.md", "c.md"])
+        self.assertEqual(sorted(self.file_manager.manifest.sources()), ["a.txt", "b.txt", "c.txt"])
+
+    def test_25_process_raw_dir_incremental_shared_objects(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, incremental=True)
+        self.file_manager.reset_all_directories()
+        shutil.unpack_archive("tests/test02.zip", self.artifacts_dir)
+        for name in ["a.docx", "b.docx"]:
+            shutil.copy(os.path.join(self.artifacts_dir, "Hello.docx"), os.path.join(self.file_manager.raw_dir, name))
+        self.file_manager.process_raw_dir()
+
+        # a.docx is changed, the objects linked by the unchanged b.md are kept
+        document = Document(os.path.join(self.artifacts_dir, "Hello.docx"))
+        document.add_paragraph("A new paragraph")
+        self.file_manager = FileManager(root_dir=self.test_dir, incremental=True)
+        self.file_manager.reset_originals_directory()
+        document.save(os.path.join(self.file_manager.raw_dir, "a.docx"))
+        shutil.copy(os.path.join(self.artifacts_dir, "Hello.docx"), os.path.join(self.file_manager.raw_dir, "b.docx"))
+        self.assertEqual(self.file_manager.process_raw_dir(), [os.path.join(self.file_manager.raw_dir, "a.docx")])
+        for name in ["a.md", "b.md"]:
+            paths = markdown_writer.linked_paths(os.path.join(self.file_manager.processed_dir, name))
+            self.assertEqual(len(paths), 2)
+            self.assertTrue(all(os.path.exists(path) for path in paths))
+
+        # the shared objects are deleted with the last document linking them
+        self.file_manager.reset_originals_directory()
+        with open(os.path.join(self.file_manager.raw_dir, "c.csv"), 'w') as f:
+            f.write("a,b\n1,2\n")
+        self.file_manager.process_raw_dir()
+        self.assertEqual(list(data_utils.iter_files(self.file_manager.processed_dir)), [os.path.join(self.file_manager.processed_dir, "c.md")])
+
+    def test_26_process_raw_dir_sqlite_store(self):
+        self.file_manager = FileManager(root_dir=self.test_dir, incremental=True, chunk_chars=200, output_store="sqlite")
+        self.file_manager.reset_all_directories()
+        shutil.copy("tests/test02.zip", self.file_manager.raw_dir)
+        self.file_manager.process_raw_dir()
+        store = self.file_manager.output_store
+        # the outputs are in the database, not in the processed directory
+        self.assertEqual(os.listdir(self.file_manager.processed_dir), [])
+        self.assertEqual(store.documents(), ["23.md", "Hello.md"])
+        self.assertEqual(store.metadata("Hello.md"), {"file": os.path.join("test02", "Hello.docx"), "type": "docx", "version": "1"})
+        self.assertTrue(store.read_markdown("Hello.md").startswith("# This is my title\n"))
+        self.assertGreater(len(list(store.iter_chunks("Hello.md"))), 0)
+        self.assertGreater(len(store.list_files("Hello_docx_embed")), 0)
+
+        # the outputs of the sources deleted from the raw directory are deleted from the database
+        with open(os.path.join(self.file_manager.raw_dir, "notes.txt"), "w") as f:
+            f.write("notes\n")
+        self.file_manager.process_raw_dir()
+        self.assertEqual(store.documents(), ["notes.md"])
+        self.assertEqual(store.list_files("Hello_docx_embed"), [])
+        self.assertEqual(store.export(os.path.join(self.test_dir, "export")), 2)
+        store.close()
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,38 @@
+import unittest
+from util.file_registry import FileRegistry, PENDING, PROCESSED
+
+class TestFileRegistry(unittest.TestCase):
+
+    def test_01_add(self):
+        registry = FileRegistry()
+        registry.add("raw/a.docx", "docx")
+        registry.add("raw/b.zip", "zip")
+        registry.add("raw/c.docx", "docx")
+        # a file is registered once
+        registry.add("raw/a.docx", "docx")
+        self.assertEqual(len(registry), 3)
+        self.assertEqual(list(registry.queues["docx"]), ["raw/a.docx", "raw/c.docx"])
+        self.assertEqual(list(registry.pop_queue("zip")), ["raw/b.zip"])
+        self.assertEqual(list(registry.pop_queue("zip")), [])
+        self.assertTrue(registry.is_original("raw/a.docx"))
+        self.assertFalse(registry.is_original("raw/d.docx"))
+
+    def test_02_merge(self):
+        registry = FileRegistry()
+        registry.add("raw/b.zip", "zip")
+        registry.pop_queue("zip")
+        extracted = FileRegistry()
+        extracted.add("raw/b/a.docx", "docx", origin=registry.origin("raw/b.zip"))
+        extracted.add("raw/b/c.zip", "zip", origin=registry.origin("raw/b.zip"))
+        registry.merge(extracted)
+        self.assertEqual(list(registry.queues), ["docx", "zip"])
+        self.assertFalse(registry.is_original("raw/b/a.docx"))
+        self.assertEqual(registry.origin("raw/b/a.docx"), "raw/b.zip")
+        self.assertEqual(registry.origin("raw/b.zip"), "raw/b.zip")
+
+        registry.set_status("raw/b/a.docx", PROCESSED)
+        self.assertEqual(registry.files_with_status(PROCESSED), ["raw/b/a.docx"])
+        self.assertEqual(registry.files_with_status(PENDING), ["raw/b.zip", "raw/b/c.zip"])
+
+if __name__ == "__main__":
+    unittest.main()
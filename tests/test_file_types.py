@@ -0,0 +1,108 @@
+import io
+import os
+import shutil
+import unittest
+import zipfile
+from util import file_types
+from util.file_types import FileTypeDetector
+
+class TestFileTypes(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "./TestData"
+        os.makedirs(self.test_dir, exist_ok=True)
+        shutil.unpack_archive("tests/test02.zip", self.test_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, content):
+        path = os.path.join(self.test_dir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_01_detect(self):
+        detector = FileTypeDetector()
+        # the extension of the name does not matter for the types with a signature
+        self.assertEqual(detector.detect(self.write("REPORT.PDF", b"%PDF-1.4\n")), "pdf")
+        self.assertEqual(detector.detect(self.write("scan", b"\x89PNG\r\n\x1a\n" + b"\x00" * 16)), "png")
+        self.assertEqual(detector.detect(self.write("photo.jpeg", b"\xff\xd8\xff\xe0" + b"\x00" * 16)), "jpg")
+        os.rename(os.path.join(self.test_dir, "Hello.docx"), os.path.join(self.test_dir, "Hello"))
+        self.assertEqual(detector.detect(os.path.join(self.test_dir, "Hello")), "docx")
+        os.rename(os.path.join(self.test_dir, "23.docx"), os.path.join(self.test_dir, "23.DOCX"))
+        self.assertEqual(detector.detect(os.path.join(self.test_dir, "23.DOCX")), "docx")
+
+        # a zip file named as a pdf file is a zip file, a text file named as a docx file is not a docx file
+        with zipfile.ZipFile(os.path.join(self.test_dir, "archive.pdf"), 'w') as zip_file:
+            zip_file.writestr("a.txt", "text")
+        self.assertEqual(detector.detect(os.path.join(self.test_dir, "archive.pdf")), "zip")
+        self.assertEqual(detector.detect(self.write("broken.docx", b"not a docx file")), "other")
+
+        # the text files
+        self.assertEqual(detector.detect(self.write("notes.TXT", b"some text")), "txt")
+        self.assertEqual(detector.detect(self.write("table", b"a,b,c\n1,2,3\n4,5,6\n")), "csv")
+        self.assertEqual(detector.detect(self.write("data", b'\n{"a": 1}')), "json")
+        self.assertEqual(detector.detect(self.write("readme", b"some text")), "txt")
+        self.assertEqual(detector.detect(self.write("program.exe", b"MZ\x90\x00\x03")), "exe")
+        self.assertEqual(detector.detect(self.write("blob", b"\x01\x02\x00")), "other")
+
+    def test_04_detect_extension(self):
+        detector = FileTypeDetector()
+        # the extensions of the text files are trusted, their content is not sniffed
+        self.assertEqual(detector.detect(self.write("letter.rtf", b"{\\rtf1\\ansi Hello}")), "rtf")
+        self.assertEqual(detector.detect(self.write("page.html", b"<html><body>Hello</body></html>")), "html")
+        self.assertEqual(detector.detect(self.write("feed.xml", b"<?xml version=\"1.0\"?><feed/>")), "xml")
+        self.assertEqual(detector.detect(self.write("config.yaml", b"a: 1\nb: 2\n")), "yaml")
+        self.assertEqual(detector.detect(self.write("notes.txt", b"%PDF- is the header of a pdf file")), "txt")
+        # a pdf header after a few bytes of garbage is only trusted in a file named as a pdf file
+        self.assertEqual(detector.detect(self.write("report.pdf", b"\r\n%PDF-1.4\n")), "pdf")
+        self.assertEqual(detector.detect(self.write("dump.bin", b"\x01\x02%PDF-1.4\n")), "bin")
+        self.assertEqual(detector.detect(self.write("manual", b"see the %PDF-1.4 header")), "txt")
+        # the text files with an unknown extension keep it
+        self.assertEqual(detector.detect(self.write("data.dat", b"a,b,c\n1,2,3\n4,5,6\n")), "dat")
+
+    def test_02_detect_cache(self):
+        detector = FileTypeDetector()
+        path = self.write("REPORT.PDF", b"%PDF-1.4\n")
+        detector.detect(path)
+        # the moved file is not read again
+        moved_path = os.path.join(self.test_dir, "moved.PDF")
+        os.rename(path, moved_path)
+        self.assertEqual(detector.detect(moved_path), "pdf")
+        self.assertEqual(len(detector.cache), 1)
+
+    def test_03_detect_stream(self):
+        stream = io.BytesIO(b"%PDF-1.4\n")
+        self.assertEqual(file_types.detect_stream(stream, "c.bin"), "pdf")
+        self.assertEqual(stream.tell(), 0)
+        with open(os.path.join(self.test_dir, "Hello.docx"), 'rb') as f:
+            stream = io.BytesIO(f.read())
+        self.assertEqual(file_types.detect_stream(stream, "Hello"), "docx")
+        self.assertEqual(stream.tell(), 0)
+
+    def test_05_detect_stored_archive(self):
+        detector = FileTypeDetector()
+        # the names of the members of the stored docx files are in the local headers of the archive
+        path = os.path.join(self.test_dir, "documents.zip")
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as zip_file:
+            zip_file.write(os.path.join(self.test_dir, "Hello.docx"), "Hello.docx")
+            zip_file.write(os.path.join(self.test_dir, "23.docx"), "23.docx")
+        self.assertEqual(detector.detect(path), "zip")
+        with open(path, 'rb') as f:
+            self.assertEqual(file_types.detect_stream(io.BytesIO(f.read()), "documents"), "zip")
+        # a stored office document is still detected from its own members
+        stored_path = os.path.join(self.test_dir, "stored")
+        with zipfile.ZipFile(os.path.join(self.test_dir, "Hello.docx")) as source:
+            with zipfile.ZipFile(stored_path, 'w', zipfile.ZIP_STORED) as zip_file:
+                for info in source.infolist():
+                    zip_file.writestr(info.filename, source.read(info))
+        self.assertEqual(detector.detect(stored_path), "docx")
+        slides_path = os.path.join(self.test_dir, "slides.zip")
+        with zipfile.ZipFile(slides_path, 'w') as zip_file:
+            zip_file.writestr("[Content_Types].xml", "<Types/>")
+            zip_file.writestr("ppt/presentation.xml", "<presentation/>")
+        self.assertEqual(detector.detect(slides_path), "pptx")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import shutil
+import unittest
+from PIL import Image, ImageDraw
+from util import image_utils
+from util.image_utils import ImageTextCache
+
+# Return the color of the first pixel of an image as its text, to count the images read without tesseract
+def color_text(path, lang="eng"):
+    with Image.open(path) as image:
+        return "color " + "-".join(map(str, image.convert("RGB").getpixel((0, 0))))
+
+class TestImageUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "./TestData"
+        os.makedirs(self.test_dir, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def save_image(self, name, color, text=None):
+        path = os.path.join(self.test_dir, name)
+        image = Image.new("RGB", (400, 80), color)
+        if text:
+            ImageDraw.Draw(image).text((10, 30), text, fill="black", font_size=32)
+        image.save(path)
+        return path
+
+    def test_01_read_image_texts_cache(self):
+        red = self.save_image("red.png", "red")
+        logo = self.save_image("logo.png", "blue")
+        # the same logo in another document
+        logo_copy = os.path.join(self.test_dir, "logo_copy.png")
+        shutil.copy(logo, logo_copy)
+        cache_path = os.path.join(self.test_dir, "image_text.jsonl")
+
+        texts, read, cached = image_utils.read_image_texts([red, logo, logo_copy, red], ImageTextCache(cache_path), batch_size=1, ocr=color_text)
+        self.assertEqual(texts, {red: "color 255-0-0", logo: "color 0-0-255", logo_copy: "color 0-0-255"})
+        self.assertEqual((read, cached), (2, 0))
+
+        # a later run reads the cached images from the cache file
+        green = self.save_image("green.png", "green")
+        cache = ImageTextCache(cache_path)
+        self.assertEqual(len(cache), 2)
+        texts, read, cached = image_utils.read_image_texts([logo, green], cache, workers=2, ocr=color_text)
+        self.assertEqual(texts, {logo: "color 0-0-255", green: "color 0-128-0"})
+        self.assertEqual((read, cached), (1, 1))
+
+        # an image which can not be read is left out
+        with open(os.path.join(self.test_dir, "broken.png"), 'wb') as f:
+            f.write(b"not an image")
+        texts, read, cached = image_utils.read_image_texts([os.path.join(self.test_dir, "broken.png")], cache, ocr=color_text)
+        self.assertEqual(texts, {})
+        self.assertEqual((read, cached), (0, 0))
+        self.assertEqual(len(cache), 3)
+
+    @unittest.skipUnless(shutil.which("tesseract"), "tesseract is not installed")
+    def test_02_ocr_image(self):
+        path = self.save_image("text.png", "white", "Invoice 42")
+        self.assertIn("Invoice", image_utils.ocr_image(path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import io
+import json
+import unittest
+from util import json_stream
+
+class TestJsonStream(unittest.TestCase):
+
+    def test_01_iter_json_records(self):
+        records = [{"a": 1, "b": "x]y,\"z\""}, [1, 2, {"c": None}], 12345.5, "text", True]
+        text = json.dumps(records, indent=2)
+        # the small chunks cut the values, including the numbers, at every position
+        for chunk_size in [1, 3, 7, 64]:
+            self.assertEqual(list(json_stream.iter_json_records(io.StringIO(text), chunk_size=chunk_size)), records)
+        # concatenated documents and a single top level object
+        text = '{"a": 1}\n{"a": 2}\n[]\n[3] 4'
+        self.assertEqual(list(json_stream.iter_json_records(io.StringIO(text), chunk_size=2)), [{"a": 1}, {"a": 2}, 3, 4])
+        with self.assertRaises(ValueError):
+            list(json_stream.iter_json_records(io.StringIO("[1 2]")))
+        with self.assertRaises(ValueError):
+            list(json_stream.iter_json_records(io.StringIO("[1, {")))
+
+    def test_02_iter_jsonl_records(self):
+        self.assertEqual(list(json_stream.iter_jsonl_records(io.StringIO('{"a": 1}\n\n{"a": 2}\n'))), [{"a": 1}, {"a": 2}])
+        with self.assertRaises(ValueError):
+            list(json_stream.iter_jsonl_records(io.StringIO('{"a": 1}\n{"a"\n')))
+
+    def test_03_json_elements(self):
+        self.assertEqual(json_stream.flatten({"a": {"b": {"c": 1}}, "d": [1]}, max_depth=2), {"a.b": '{"c":1}', "d": "[1]"})
+        records = [{"a": 1, "b": True}, {"a": 2, "b": None}, {"a": 3, "b": False}, {"config": "x|y"}, "end"]
+        self.assertEqual(list(json_stream.json_elements(records, table_rows=2)), [
+            {"type": "table", "content": [["a", "b"], ["1", "true"], ["2", "null"]]},
+            {"type": "table", "content": [["a", "b"], ["3", "false"]]},
+            # a single object is a table of keys and values
+            {"type": "table", "content": [["key", "value"], ["config", "x\\|y"]]},
+            {"type": "text", "content": "end"},
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import os
+import shutil
+from util.manifest import Manifest
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "./TestData"
+        self.processed_dir = os.path.join(self.test_dir, "processed")
+        os.makedirs(self.processed_dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.test_dir, "manifest.jsonl")
+        self.source_path = os.path.join(self.test_dir, "a.txt")
+        with open(self.source_path, 'w') as f:
+            f.write("content")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write_output(self, path):
+        path = os.path.join(self.processed_dir, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write("output")
+        return path
+
+    def test_01_is_unchanged(self):
+        manifest = Manifest(self.manifest_path, self.processed_dir)
+        self.assertFalse(manifest.is_unchanged("a.txt", self.source_path, "1"))
+        manifest.record("a.txt", manifest.file_state(self.source_path), "1", [self.write_output("a.md")])
+
+        # the manifest is reloaded from its file
+        manifest = Manifest(self.manifest_path, self.processed_dir)
+        self.assertTrue(manifest.is_unchanged("a.txt", self.source_path, "1"))
+        self.assertFalse(manifest.is_unchanged("a.txt", self.source_path, "2"))
+        # same content with a new mtime
+        os.utime(self.source_path, ns=(0, 0))
+        self.assertTrue(manifest.is_unchanged("a.txt", self.source_path, "1"))
+        # new content with the same size
+        with open(self.source_path, 'w') as f:
+            f.write("CONTENT")
+        self.assertFalse(manifest.is_unchanged("a.txt", self.source_path, "1"))
+
+    def test_02_delete_keeps_shared_outputs(self):
+        manifest = Manifest(self.manifest_path, self.processed_dir)
+        state = manifest.file_state(self.source_path)
+        shared_image = self.write_output("a_embed/media/image1.png")
+        own_image = self.write_output("a_embed/media/image2.png")
+        manifest.record("a.txt", state, "1", [self.write_output("a.md"), os.path.join(self.processed_dir, "a_embed")])
+        manifest.record("b.txt", state, "1", [self.write_output("b.md"), shared_image])
+
+        manifest.delete("a.txt")
+        self.assertFalse(os.path.exists(os.path.join(self.processed_dir, "a.md")))
+        self.assertFalse(os.path.exists(own_image))
+        self.assertTrue(os.path.exists(shared_image))
+
+        manifest.delete("b.txt")
+        self.assertFalse(os.path.exists(shared_image))
+        self.assertEqual(Manifest(self.manifest_path, self.processed_dir).entries, {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import io
+import os
+import shutil
+import unittest
+from util import markdown_writer
+
+class TestMarkdownWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "./TestData"
+        os.makedirs(self.test_dir, exist_ok=True)
+        self.elements = [
+            {"type": "title", "content": "Title"},
+            {"type": "heading 2", "content": "Heading"},
+            {"type": "list bullet", "content": "bullet"},
+            {"type": "list number", "content": "number"},
+            {"type": "table", "content": [["a", "b"], ["1", "2"]]},
+            {"type": "image", "content": "media/image1.png"},
+            # the types of the embedded objects are compared in lower case
+            {"type": "oleObject", "content": "embeddings/oleObject1.bin"},
+            {"type": "normal", "content": "text"},
+        ]
+        self.expected = ("# Title\n## Heading\n- bullet\n1. number\n| a | b |\n| --- | --- |\n| 1 | 2 |\n"
+                         "![image](media/image1.png)\nembeddings/oleObject1.bin\ntext\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_01_render_markdown(self):
+        sink = io.StringIO()
+        written = markdown_writer.render_markdown(self.elements, sink, embedding_objects_types=["image", "oleObject"])
+        self.assertEqual(sink.getvalue(), self.expected)
+        self.assertEqual(written, len(self.expected))
+
+        # a small buffer writes the same markdown in several writes
+        sink = io.StringIO()
+        markdown_writer.render_markdown(iter(self.elements), sink, embedding_objects_types=["image", "oleObject"], buffer_chars=8)
+        self.assertEqual(sink.getvalue(), self.expected)
+
+    def test_02_write_markdown(self):
+        path = os.path.join(self.test_dir, "test.md")
+        markdown_writer.write_markdown(self.elements + [{"type": "normal", "content": "é"}], path, embedding_objects_types=["image", "oleObject"])
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.expected + "é\n")
+
+        # a failed rendering keeps the previous file and leaves no temporary file
+        def failing_elements():
+            yield {"type": "normal", "content": "partial"}
+            raise ValueError("conversion failed")
+        with self.assertRaises(ValueError):
+            markdown_writer.write_markdown(failing_elements(), path)
+        self.assertEqual(os.listdir(self.test_dir), ["test.md"])
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.expected + "é\n")
+
+    def test_03_annotate_images(self):
+        path = os.path.join(self.test_dir, "test.md")
+        markdown_writer.write_markdown(self.elements, path, embedding_objects_types=["image", "oleObject"])
+        self.assertEqual(markdown_writer.linked_paths(path), ["media/image1.png"])
+        insertions = markdown_writer.annotate_images(path, {"media/image1.png": "Invoice 42\n\nTotal | 10\n", "embeddings/oleObject1.bin": "ignored"})
+        # the annotation is inserted after the line of the link
+        offset = self.expected.index("![image]") + len("![image](media/image1.png)\n")
+        self.assertEqual(insertions, [(offset, "> Invoice 42\n> Total | 10\n")])
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), self.expected.replace("![image](media/image1.png)\n", "![image](media/image1.png)\n> Invoice 42\n> Total | 10\n"))
+        self.assertEqual(os.listdir(self.test_dir), ["test.md"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import pickle
+import unittest
+from util.metrics import Metrics, NullMetrics
+
+class TestMetrics(unittest.TestCase):
+
+    def test_01_metrics(self):
+        events = []
+        metrics = Metrics(callback=events.append)
+        with metrics.file_scope("a.docx"):
+            with metrics.timer("convert"):
+                metrics.count("bytes_read", 10)
+                elements = [{"type": "Image", "content": "a.png", "page": 1}, {"type": "text", "content": "a", "page": 2}]
+                self.assertEqual(list(metrics.counted(elements)), elements)
+        metrics.count("bytes_written", 5, file="a.docx")
+        metrics.event("file", file="a.docx", status="processed")
+
+        self.assertEqual(metrics.stages["convert"][0], 1)
+        self.assertEqual(dict(metrics.counters), {"bytes_read": 10, "elements": 2, "images": 1, "pages": 2, "bytes_written": 5})
+        self.assertEqual(dict(metrics.files["a.docx"]["counters"]), dict(metrics.counters))
+        self.assertEqual([event["event"] for event in events], ["stage", "file"])
+        self.assertEqual(metrics.summary()["slowest_files"][0][0], "a.docx")
+        self.assertIn("Run summary: 1 processed", metrics.report({"processed": 1}, 1.0))
+
+    def test_02_worker_metrics(self):
+        metrics = Metrics(callback=print)
+        # the metrics of a worker are sent to the worker process, without the callback
+        worker = pickle.loads(pickle.dumps(metrics.worker_copy()))
+        with worker.file_scope("b.pdf"):
+            with worker.timer("pdf_partition"):
+                worker.count("pages", 3)
+        records = pickle.loads(pickle.dumps(worker.drain()))
+        self.assertEqual(worker.stages, {})
+        metrics.merge(records)
+        metrics.merge(None)
+        self.assertEqual(metrics.counters["pages"], 3)
+        self.assertEqual(metrics.stages["pdf_partition"][0], 1)
+        self.assertIn("pdf_partition", metrics.files["b.pdf"]["stages"])
+
+        # the disabled metrics do nothing
+        metrics = NullMetrics()
+        elements = [{"type": "text", "content": "a"}]
+        with metrics.file_scope("a.docx"), metrics.timer("convert"):
+            metrics.count("elements")
+        self.assertIs(metrics.counted(elements), elements)
+        self.assertEqual(metrics.report({"processed": 1}), "")
+
+if __name__ == "__main__":
+    unittest.main()
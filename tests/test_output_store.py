@@ -0,0 +1,86 @@
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from util.output_store import FileSystemStore, SQLiteStore
+
+class TestOutputStore(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.processed_dir = os.path.join(self.test_dir, "processed")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, content):
+        path = os.path.join(self.processed_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    # write the outputs of two documents linking the same image
+    def write_outputs(self):
+        first = [self.write("a.md", "# A\n![image](a_docx_embed/media/image1.png)\n".encode("utf-8")),
+                 self.write("a.chunks.jsonl", (json.dumps({"index": 0, "text": "# A"}) + "\n").encode("utf-8")),
+                 os.path.dirname(os.path.dirname(self.write("a_docx_embed/media/image1.png", b"\x89PNG same image")))]
+        second = [self.write("b.md", "# B é\n".encode("utf-8")),
+                  os.path.dirname(self.write("b_images/figure-1-1.png", b"\x89PNG same image"))]
+        return first, second
+
+    def test_01_sqlite_store(self):
+        store = SQLiteStore(os.path.join(self.test_dir, "processed.sqlite"), self.processed_dir)
+        first, second = self.write_outputs()
+        store.add(first, {"file": "a.docx"})
+        store.add(second, {"file": "b.pdf"})
+        # the outputs are moved into the database and the image is stored once
+        self.assertEqual(os.listdir(self.processed_dir), [])
+        self.assertEqual(store.documents(), ["a.md", "b.md"])
+        self.assertEqual(store.metadata("b.md"), {"file": "b.pdf"})
+        self.assertEqual(store.read_markdown("b.md"), "# B é\n")
+        self.assertEqual(list(store.iter_chunks("a.md")), [{"index": 0, "text": "# A"}])
+        self.assertEqual(list(store.iter_chunks("b.md")), [])
+        self.assertEqual([name for name, _, _ in store.iter_documents()], ["a.md", "b.md"])
+        with store.open_file("a_docx_embed/media/image1.png") as f:
+            f.seek(5)
+            self.assertEqual(f.read(4), b"same")
+        self.assertEqual(store.list_files("a_docx_embed"), ["a_docx_embed/media/image1.png"])
+        self.assertEqual(sorted(store.list_files("a.chunks.jsonl")), ["a.chunks.jsonl"])
+        with sqlite3.connect(store.path) as connection:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM blobs").fetchone()[0], 1)
+
+        export_dir = os.path.join(self.test_dir, "export")
+        self.assertEqual(store.export(export_dir), 5)
+        with open(os.path.join(export_dir, "b_images", "figure-1-1.png"), "rb") as f:
+            self.assertEqual(f.read(), b"\x89PNG same image")
+
+        # a blob is deleted with the last file linking it
+        store.delete("a.md")
+        store.delete("a_docx_embed")
+        self.assertEqual(store.documents(), ["b.md"])
+        self.assertRaises(FileNotFoundError, store.open_file, "a_docx_embed/media/image1.png")
+        with sqlite3.connect(store.path) as connection:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM blobs").fetchone()[0], 1)
+        store.delete("b_images")
+        with sqlite3.connect(store.path) as connection:
+            self.assertEqual(connection.execute("SELECT COUNT(*) FROM blobs").fetchone()[0], 0)
+        store.close()
+
+    def test_02_file_system_store(self):
+        store = FileSystemStore(self.processed_dir)
+        first, second = self.write_outputs()
+        store.add(first + second)
+        self.assertEqual(store.documents(), ["a.md", "b.md"])
+        self.assertEqual(store.read_markdown("b.md"), "# B é\n")
+        self.assertEqual(list(store.iter_chunks("a.md")), [{"index": 0, "text": "# A"}])
+        self.assertEqual(store.list_files("a_docx_embed"), [os.path.join("a_docx_embed", "media", "image1.png")])
+        self.assertEqual(store.export(os.path.join(self.test_dir, "export")), 5)
+        store.delete("a_docx_embed")
+        self.assertFalse(os.path.exists(os.path.join(self.processed_dir, "a_docx_embed")))
+        self.assertRaises(FileNotFoundError, store.metadata, "c.md")
+
+if __name__ == "__main__":
+    unittest.main()
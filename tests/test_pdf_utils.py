@@ -0,0 +1,97 @@
+import unittest
+import os
+import io
+import shutil
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from util import pdf_utils
+
+# return the bytes of a one page pdf document with a line of text
+def make_text_pdf(text):
+    content = f"BT /F1 12 Tf 72 700 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+    ]
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for idx, obj in enumerate(objects):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % (idx + 1) + obj + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b"%010d 00000 n \n" % offset
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+class TestPdfUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = "./TestData"
+        os.makedirs(self.test_dir, exist_ok=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_01_page_windows(self):
+        self.assertEqual(pdf_utils.page_windows(7, 3), [(1, 3), (4, 6), (7, 7)])
+        self.assertEqual(pdf_utils.page_windows(2, 5), [(1, 2)])
+        self.assertEqual(pdf_utils.page_windows(0, 5), [])
+
+    def test_02_extract_pages(self):
+        writer = PdfWriter()
+        for width in range(100, 600, 100):
+            writer.add_blank_page(width=width, height=100)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        reader = pdf_utils.open_pdf(buffer)
+
+        window = PdfReader(io.BytesIO(pdf_utils.extract_pages(reader, 2, 4)))
+        self.assertEqual([int(page.mediabox.width) for page in window.pages], [200, 300, 400])
+
+    def test_03_renumber_window_images(self):
+        elements = []
+        for name in ["figure-3-1.jpg", "figure-3-2.jpg", "table-4-1.jpg"]:
+            path = os.path.join(self.test_dir, name)
+            with open(path, 'w') as f:
+                f.write(name)
+            element_type = "Image" if name.startswith("figure") else "text"
+            elements.append({"type": element_type, "content": path if element_type == "Image" else "t", "image_path": path})
+
+        pdf_utils.renumber_window_images(elements, {"figure": 1, "table": 0})
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ["figure-3-2.jpg", "figure-3-3.jpg", "table-4-1.jpg"])
+        self.assertEqual([os.path.basename(element["image_path"]) for element in elements], ["figure-3-2.jpg", "figure-3-3.jpg", "table-4-1.jpg"])
+        self.assertEqual(elements[0]["content"], elements[0]["image_path"])
+        # the content of the images was not overwritten
+        with open(elements[1]["image_path"], 'r') as f:
+            self.assertEqual(f.read(), "figure-3-2.jpg")
+
+    def test_04_classify_pages(self):
+        # a text page, a scanned page (an image covering the page) and an empty page
+        writer = PdfWriter()
+        writer.append(io.BytesIO(make_text_pdf("A born-digital page with a text layer to extract.")))
+        scan = io.BytesIO()
+        Image.new("RGB", (200, 260), (255, 255, 255)).save(scan, format="PDF")
+        writer.append(io.BytesIO(scan.getvalue()))
+        writer.add_blank_page(width=612, height=792)
+        pdf_path = os.path.join(self.test_dir, "mixed.pdf")
+        with open(pdf_path, 'wb') as f:
+            writer.write(f)
+
+        self.assertEqual(pdf_utils.classify_pages(pdf_path), ["fast", "hi_res", "hi_res"])
+        with open(pdf_path, 'rb') as f:
+            self.assertEqual(pdf_utils.classify_pages(f), ["fast", "hi_res", "hi_res"])
+            # the file is ready to be read again
+            self.assertEqual(f.tell(), 0)
+
+    def test_05_strategy_windows(self):
+        strategies = ["fast", "fast", "fast", "hi_res", "fast"]
+        self.assertEqual(pdf_utils.strategy_windows(strategies), [(1, 3, "fast"), (4, 4, "hi_res"), (5, 5, "fast")])
+        self.assertEqual(pdf_utils.strategy_windows(strategies, 2), [(1, 2, "fast"), (3, 3, "fast"), (4, 4, "hi_res"), (5, 5, "fast")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import io
+import datetime
+import unittest
+from util import table_utils
+
+class TestTableUtils(unittest.TestCase):
+
+    def test_01_cell_text(self):
+        self.assertEqual(table_utils.cell_text(None), "")
+        self.assertEqual(table_utils.cell_text(3.0), "3")
+        self.assertEqual(table_utils.cell_text(3.5), "3.5")
+        self.assertEqual(table_utils.cell_text(datetime.datetime(2024, 1, 2)), "2024-01-02")
+        self.assertEqual(table_utils.cell_text("a|b\nc"), "a\\|b c")
+
+    def test_02_iter_csv_rows(self):
+        stream = io.BytesIO("\ufeffa;b\n1;\"x;y\"\n".encode("utf-8"))
+        self.assertEqual(list(table_utils.iter_csv_rows(stream)), [["a", "b"], ["1", "x;y"]])
+        # the binary file object is not closed
+        self.assertFalse(stream.closed)
+
+    def test_03_table_elements(self):
+        rows = [[], ["a", "b", None], ["1", "2"], ["3"], ["", ""], ["5", "6"]]
+        elements = list(table_utils.table_elements(rows, table_rows=2))
+        self.assertEqual(elements, [
+            {"type": "table", "content": [["a", "b"], ["1", "2"], ["3", ""]]},
+            {"type": "table", "content": [["a", "b"], ["5", "6"]]},
+        ])
+        self.assertEqual(list(table_utils.table_elements([["a", "b"]])), [{"type": "table", "content": [["a", "b"]]}])
+        self.assertEqual(list(table_utils.table_elements([])), [])
+        # a row wider than the header widens the header and the rows of its table
+        rows = [["a", "b"], ["1"], ["2", "3", "4"], ["5", "6"], ["7", "8"]]
+        elements = list(table_utils.table_elements(rows, table_rows=3))
+        self.assertEqual(elements, [
+            {"type": "table", "content": [["a", "b", ""], ["1", "", ""], ["2", "3", "4"], ["5", "6", ""]]},
+            {"type": "table", "content": [["a", "b", ""], ["7", "8", ""]]},
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
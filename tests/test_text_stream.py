@@ -0,0 +1,72 @@
+import io
+import os
+import codecs
+import shutil
+import tempfile
+import unittest
+from util import text_stream
+
+class TestTextStream(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_01_detect_encoding(self):
+        self.assertEqual(text_stream.detect_encoding(codecs.BOM_UTF8 + b"text"), ("utf-8", 3))
+        self.assertEqual(text_stream.detect_encoding(codecs.BOM_UTF16_LE + "text".encode("utf-16-le")), ("utf-16-le", 2))
+        self.assertEqual(text_stream.detect_encoding(codecs.BOM_UTF32_LE + "text".encode("utf-32-le")), ("utf-32-le", 4))
+        self.assertEqual(text_stream.detect_encoding("text".encode("utf-16-be")), ("utf-16-be", 0))
+        # a character cut by the end of the head is still utf-8
+        head = ("a" * (text_stream.HEAD_SIZE - 1) + "é").encode("utf-8")
+        self.assertEqual(text_stream.detect_encoding(head[:text_stream.HEAD_SIZE]), ("utf-8", 0))
+        self.assertEqual(text_stream.detect_encoding("café".encode("cp1252")), ("cp1252", 0))
+
+    def test_02_iter_paragraphs(self):
+        text = "Title\r\n\r\nfirst line\r\nsecond line  \n \t\n\nthird\n\n\n"
+        expected = [(1, "Title"), (3, "first line\nsecond line"), (7, "third")]
+        path = os.path.join(self.test_dir, "a.txt")
+        with open(path, "wb") as f:
+            f.write(codecs.BOM_UTF16_LE + text.encode("utf-16-le"))
+        # the small blocks cut the characters and the paragraph breaks at every position
+        for block_size in [1, 3, 7, 1024]:
+            paragraphs = text_stream.iter_paragraphs(text_stream.iter_text_blocks(path, block_size=block_size))
+            self.assertEqual([paragraph for paragraph in paragraphs if paragraph[1]], expected)
+        with open(path, "rb") as f:
+            paragraphs = list(text_stream.iter_paragraphs(text_stream.iter_text_blocks(io.BytesIO(f.read()), block_size=5)))
+        self.assertEqual([paragraph for paragraph in paragraphs if paragraph[1]], expected)
+        empty_path = os.path.join(self.test_dir, "empty.txt")
+        open(empty_path, "wb").close()
+        self.assertEqual(list(text_stream.text_elements(text_stream.iter_paragraphs(text_stream.iter_text_blocks(empty_path)))), [])
+
+    def test_03_long_paragraphs_and_sections(self):
+        # a log without blank lines is cut at line breaks
+        lines = [f"2024-01-01 event {index}" for index in range(100)]
+        paragraphs = list(text_stream.iter_paragraphs(iter(["\n".join(lines[:50]), "\n" + "\n".join(lines[50:])]), max_chars=300))
+        self.assertTrue(all(len(paragraph) <= 300 for _, paragraph in paragraphs))
+        self.assertEqual("\n".join(paragraph for _, paragraph in paragraphs).splitlines(), lines)
+        for line, paragraph in paragraphs:
+            self.assertEqual(lines[line - 1], paragraph.splitlines()[0])
+
+        elements = list(text_stream.text_elements([(1, "a" * 10), (3, "b" * 10), (5, "c" * 10)], section_chars=20))
+        self.assertEqual(elements, [
+            {"type": "Heading 2", "content": "Part 1 (line 1)"},
+            {"type": "text", "content": "a" * 10 + "\n"},
+            {"type": "text", "content": "b" * 10 + "\n"},
+            {"type": "Heading 2", "content": "Part 2 (line 5)"},
+            {"type": "text", "content": "c" * 10 + "\n"},
+        ])
+
+    def test_04_iter_paragraphs_block_sizes(self):
+        # the blank lines hold spaces, a block may end in them
+        text = "one\n \t\n  \n two\nthree \r\n\r\n\t\nfour\n\n   \n\n five\n \n"
+        expected = list(text_stream.iter_paragraphs(iter([text])))
+        self.assertEqual([paragraph for paragraph in expected if paragraph[1]], [(1, "one"), (4, " two\nthree"), (8, "four"), (12, " five")])
+        for block_size in range(1, len(text) + 1):
+            blocks = [text[offset:offset + block_size] for offset in range(0, len(text), block_size)]
+            self.assertEqual(list(text_stream.iter_paragraphs(iter(blocks))), expected, block_size)
+
+if __name__ == "__main__":
+    unittest.main()
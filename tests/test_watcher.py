@@ -0,0 +1,84 @@
+import os
+import time
+import shutil
+import tempfile
+import unittest
+from util import watcher
+from util.file_manager import FileManager
+
+class TestWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.test_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def check_watcher(self, file_watcher):
+        first = self.write("first.txt", "first")
+        self.assertEqual(file_watcher.scan(), [first])
+        second = self.write("sub/second.txt", "second")
+        self.write("first.txt", "first changed")
+        changes = set()
+        deadline = time.monotonic() + 5
+        while changes != {first, second} and time.monotonic() < deadline:
+            changes.update(file_watcher.changes(0.1))
+        self.assertEqual(changes, {first, second})
+        file_watcher.close()
+
+    def test_01_polling_watcher(self):
+        self.check_watcher(watcher.PollingWatcher(self.test_dir, interval=0.05))
+
+    def test_02_inotify_watcher(self):
+        try:
+            file_watcher = watcher.InotifyWatcher(self.test_dir)
+        except (OSError, AttributeError, TypeError):
+            self.skipTest("inotify is not available")
+        self.check_watcher(file_watcher)
+
+    def test_03_debouncer(self):
+        path = self.write("a.txt", "partial")
+        debouncer = watcher.Debouncer(settle=1.0)
+        debouncer.add(path, now=0.0)
+        debouncer.add(self.write("b.txt.part", "temporary"), now=0.0)
+        self.assertEqual(len(debouncer), 1)
+        self.assertEqual(debouncer.ready(now=0.5), [])
+        # a file still being written waits settle seconds from its last change
+        self.write("a.txt", "partial and complete")
+        self.assertEqual(debouncer.ready(now=0.9), [])
+        self.assertEqual(debouncer.next_timeout(now=0.9), 1.0)
+        self.assertEqual(debouncer.ready(now=1.5), [])
+        self.assertEqual([file for file, _, _ in debouncer.ready(now=2.0)], [path])
+        self.assertIsNone(debouncer.next_timeout())
+
+    def test_04_watch_daemon(self):
+        file_manager = FileManager(root_dir=self.test_dir)
+        daemon = watcher.WatchDaemon(file_manager, interval=0.05, settle=0.05, polling=True)
+        daemon.start()
+        try:
+            self.write("raw/notes.txt", "notes")
+            self.write("raw/data.bin", "\x00\x01\x02")
+            processed_files = []
+            deadline = time.monotonic() + 5
+            while not processed_files and time.monotonic() < deadline:
+                processed_files += daemon.step()
+            self.assertEqual(processed_files, [os.path.join(file_manager.raw_dir, "notes.txt")])
+            self.assertEqual(os.listdir(file_manager.processed_dir), ["notes.md"])
+            # the file without a converter is left in the raw directory and not processed again until it changes
+            self.assertEqual(os.listdir(file_manager.raw_dir), ["data.bin"])
+            for _ in range(5):
+                daemon.step()
+            self.assertEqual(daemon.batches, 1)
+            self.assertEqual(daemon.queue_depth(), 0)
+        finally:
+            daemon.stop()
+
+if __name__ == "__main__":
+    unittest.main()
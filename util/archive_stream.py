@@ -0,0 +1,55 @@
+import posixpath
+import shutil
+import zipfile
+from . import file_types
+from tempfile import SpooledTemporaryFile
+
+# Raised when an archive goes over the nesting depth or the uncompressed size limits
+class ArchiveLimitError(Exception):
+    pass
+
+# Iterate over the members of a zip archive without extracting them to disk
+# yield (label, name, extension, stream) for each member that is not a directory or a nested zip,
+# label is the path of the member inside the archive, prefixed with the label of the archive
+# the stream is a seekable spooled buffer, kept in memory up to spool_size bytes, and it is only valid
+# until the next member is requested
+# nested zips are opened from their buffer and their members are yielded in place, up to max_depth levels
+# the uncompressed size of all the members, nested ones included, is limited to max_bytes (None for no limit)
+# wanted is an optional function of the extension that selects the members to be read
+def iter_zip_members(archive, label, max_depth=5, max_bytes=None, spool_size=64 * 1024 * 1024, wanted=None):
+    budget = {"limit": max_bytes, "left": max_bytes}
+    yield from _iter_zip_members(archive, label, 0, max_depth, budget, spool_size, wanted)
+
+def _iter_zip_members(archive, label, depth, max_depth, budget, spool_size, wanted):
+    with zipfile.ZipFile(archive) as zip_file:
+        members = [info for info in zip_file.infolist() if not info.is_dir()]
+        # zipfile stops reading a member at its declared size, so the declared sizes bound the bytes read
+        _charge(budget, sum(info.file_size for info in members), label)
+        for info in members:
+            member_label = label + "/" + info.filename
+            name = posixpath.basename(info.filename)
+            # the members are skipped by the extension of their name before being read,
+            # the members without a known extension are read and their type is detected from their content
+            extension = file_types.name_extension(name)
+            if extension and extension != "zip" and wanted is not None and not wanted(extension):
+                continue
+            with SpooledTemporaryFile(max_size=spool_size) as stream:
+                with zip_file.open(info) as member:
+                    shutil.copyfileobj(member, stream)
+                stream.seek(0)
+                extension = file_types.detect_stream(stream, name)
+                if extension != "zip" and wanted is not None and not wanted(extension):
+                    continue
+                if extension == "zip" and depth + 1 > max_depth:
+                    raise ArchiveLimitError(f"{member_label} is nested deeper than {max_depth} archives")
+                if extension == "zip":
+                    yield from _iter_zip_members(stream, member_label, depth + 1, max_depth, budget, spool_size, wanted)
+                else:
+                    yield member_label, name, extension, stream
+
+def _charge(budget, size, label):
+    if budget["left"] is None:
+        return
+    budget["left"] -= size
+    if budget["left"] < 0:
+        raise ArchiveLimitError(f"{label} goes over the limit of {budget['limit']} uncompressed bytes")
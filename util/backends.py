@@ -0,0 +1,55 @@
+import time
+import importlib
+import threading
+
+# The modules of the converter backends by name, they are heavy to import, e.g. unstructured loads torch and onnxruntime,
+# so each one is imported the first time a file that needs it is dispatched, a run without pdf files never imports it
+BACKEND_MODULES = {
+    "pdf": "unstructured.partition.pdf",
+    "pypdf": "pypdf",
+    "pdfium": "pypdfium2",
+    "xlsx": "openpyxl",
+    "ocr": "unstructured_pytesseract",
+}
+
+# The backends used by the converter of each extension
+EXTENSION_BACKENDS = {
+    "pdf": ["pdf", "pypdf", "pdfium"],
+    "xlsx": ["xlsx"],
+}
+
+# The backend modules imported by this process and the seconds their import took
+_modules = {}
+_import_times = {}
+# the backends are imported by the conversion and the writer threads of the asyncio pipeline
+_lock = threading.Lock()
+
+# Return the backends used by the converter of an extension
+def extension_backends(extension):
+    return EXTENSION_BACKENDS.get(extension, [])
+
+# Return the module of a backend, imported on its first use
+def get(name):
+    module = _modules.get(name)
+    if module is None:
+        load([name])
+        module = _modules[name]
+    return module
+
+# Import the backends of names which are not imported yet
+# return the seconds of the imports done by this call by backend name, the backends already imported are left out
+def load(names):
+    imported = {}
+    with _lock:
+        for name in names:
+            if name in _modules:
+                continue
+            start = time.perf_counter()
+            _modules[name] = importlib.import_module(BACKEND_MODULES[name])
+            imported[name] = _import_times[name] = time.perf_counter() - start
+    return imported
+
+# Return the seconds of the imports of the backends imported by this process by backend name
+def import_times():
+    with _lock:
+        return dict(_import_times)
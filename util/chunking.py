@@ -0,0 +1,189 @@
+import os
+import json
+from contextlib import contextmanager
+from . import markdown_writer
+
+# the default size of the chunks in characters, about 500 tokens of english text
+CHUNK_CHARS = 2000
+
+# Return the level of a heading element, None if the element is not a heading
+# the docx titles and headings have the level of their style, the titles of the pdf elements have level 1
+def heading_level(element):
+    lower_type = element["type"].lower()
+    if lower_type == "title":
+        return 0
+    if lower_type.startswith("heading"):
+        level = lower_type.replace("heading", "").strip()
+        return int(level) if level.isdigit() else 1
+    if element.get("category") == "Title":
+        return 1
+    return None
+
+# Split the markdown of an element longer than max_chars in pieces of at most max_chars characters,
+# at line breaks when possible, e.g. between the rows of a table
+def split_text(text, max_chars):
+    pieces = []
+    piece = ""
+    for line in text.splitlines(keepends=True):
+        if piece and len(piece) + len(line) > max_chars:
+            pieces.append(piece)
+            piece = ""
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        piece += line
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+# Raise ValueError if overlap characters of a chunk can not be repeated in a chunk of max_chars characters
+def check_overlap(max_chars, overlap):
+    if overlap < 0 or overlap >= max_chars:
+        raise ValueError(f"The chunk overlap must be at least 0 and less than the chunk size {max_chars}, got {overlap}")
+
+# Split the elements of a document in chunks as their markdown is written, see markdown_writer.render_markdown
+# a chunk holds whole elements of a single section: a heading starts a new chunk and the headings of the section
+# are recorded in the metadata of its chunks, a chunk is closed before it grows over max_chars characters,
+# the headings leading a chunk are kept with its first element, they may take the chunk over max_chars
+# the last elements of a chunk closed for its size are repeated at the start of the next one,
+# as many as fit in overlap characters and leave room for the element closing it, an element longer than max_chars is split in several chunks
+# the text of a chunk is the markdown of its elements, start and end are its offsets in the markdown file
+# the finished chunks are passed to sink with the metadata added to each of them
+class Chunker:
+    def __init__(self, sink, max_chars=CHUNK_CHARS, overlap=0, metadata=None):
+        check_overlap(max_chars, overlap)
+        self.sink = sink
+        self.max_chars = max_chars
+        self.overlap = overlap
+        self.metadata = metadata or {}
+        # the parts of the current chunk: (start offset, text, element index, page, is heading)
+        self.parts = []
+        self.size = 0
+        # the (level, text) of the headings of the current section, from the top level down
+        self.headings = []
+        # the headings of the current chunk, set by its first element which is not a heading
+        self.chunk_headings = None
+        self.offset = 0
+        self.element_index = 0
+        self.chunk_index = 0
+
+    # Add an element and its markdown, the chunks finished by the element are passed to sink
+    def add(self, element, text):
+        start = self.offset
+        self.offset += len(text)
+        index = self.element_index
+        self.element_index += 1
+        page = element.get("page")
+        level = heading_level(element)
+        if level is not None:
+            if self.has_content():
+                self.flush()
+            while self.headings and self.headings[-1][0] >= level:
+                self.headings.pop()
+            self.headings.append((level, element["content"]))
+            self.append_part((start, text, index, page, True))
+            return
+        for piece in split_text(text, self.max_chars) if len(text) > self.max_chars else [text]:
+            if self.has_content() and self.size + len(piece) > self.max_chars:
+                self.flush(overlap=True, next_size=len(piece))
+            if self.chunk_headings is None:
+                self.chunk_headings = [heading for _, heading in self.headings]
+            self.append_part((start, piece, index, page, False))
+            start += len(piece)
+
+    def append_part(self, part):
+        self.parts.append(part)
+        self.size += len(part[1])
+
+    # Return True if the current chunk holds an element which is not a heading
+    def has_content(self):
+        return any(not part[4] for part in self.parts)
+
+    # Pass the current chunk to sink and start a new one, starting with the overlapping parts if overlap is True
+    # the overlapping parts leave room for next_size characters, the size of the piece added after them
+    def flush(self, overlap=False, next_size=0):
+        if not self.parts:
+            return
+        pages = [part[3] for part in self.parts if part[3] is not None]
+        chunk = dict(self.metadata)
+        chunk.update({
+            "index": self.chunk_index,
+            "start": self.parts[0][0],
+            "end": self.parts[-1][0] + len(self.parts[-1][1]),
+            "elements": [self.parts[0][2], self.parts[-1][2]],
+            "pages": [min(pages), max(pages)] if pages else None,
+            "headings": self.chunk_headings if self.chunk_headings is not None else [heading for _, heading in self.headings],
+            "text": "".join(part[1] for part in self.parts),
+        })
+        self.sink(chunk)
+        self.chunk_index += 1
+
+        carried = []
+        if overlap and self.overlap:
+            limit = min(self.overlap, self.max_chars - next_size)
+            size = 0
+            for part in reversed(self.parts[1:]):
+                size += len(part[1])
+                if size > limit:
+                    break
+                carried.insert(0, part)
+        chunk_headings = self.chunk_headings
+        self.parts = []
+        self.size = 0
+        self.chunk_headings = None
+        for part in carried:
+            self.append_part(part)
+        if carried:
+            # the repeated parts belong to the section of the closed chunk
+            self.chunk_headings = chunk_headings
+
+    # Pass the last chunk to sink
+    def finish(self):
+        self.flush()
+
+# Open a JSON lines file of chunks and yield a Chunker writing its chunks to the file, one per line
+# the file is written to a temporary file and renamed once the chunker is finished, as by markdown_writer.write_markdown
+@contextmanager
+def chunk_writer(path, max_chars=CHUNK_CHARS, overlap=0, metadata=None):
+    temp_path = markdown_writer.temp_file_path(path)
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            chunker = Chunker(lambda chunk: f.write(json.dumps(chunk, ensure_ascii=False) + "\n"), max_chars, overlap, metadata)
+            yield chunker
+            chunker.finish()
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+# Yield the chunks of a JSON lines file of chunks
+def iter_chunks(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+# Update the chunks of a markdown file to text inserted in the markdown file, e.g. by markdown_writer.annotate_images
+# insertions are the (offset, text) of the inserted texts in the order of the file, the offsets are those of the file
+# before the insertions, a text inserted at the end of a chunk is added to the chunk, not to the chunk after it
+def insert_chunk_texts(path, insertions):
+    temp_path = markdown_writer.temp_file_path(path)
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for chunk in iter_chunks(path):
+                start, end = chunk["start"], chunk["end"]
+                before = sum(len(inserted) for offset, inserted in insertions if offset <= start)
+                inside = [(offset, inserted) for offset, inserted in insertions if start < offset <= end]
+                text = chunk["text"]
+                # the insertions are applied from the last one so the positions in text stay valid
+                for offset, inserted in reversed(inside):
+                    text = text[:offset - start] + inserted + text[offset - start:]
+                chunk["start"] = start + before
+                chunk["end"] = end + before + sum(len(inserted) for offset, inserted in inside)
+                chunk["text"] = text
+                f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -1,3 +1,7 @@
+import io
+import os
+import hashlib
+from contextlib import contextmanager, nullcontext
 from collections import defaultdict
 
 # a function to merge a dictionary to another dictionary
@@ -24,3 +28,75 @@ def append_dictionaries(dict1, dict2):
     new_dict = merge_dictionaries(dict1, dict2)
     dict1.clear()
     dict1.update(new_dict)
+
+# a function to return the size of a file in bytes, 0 if the file can not be read
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+# a function to return the size of a file or of the files in a folder and its subfolders in bytes, 0 if the path does not exist
+def path_size(path):
+    if not os.path.isdir(path):
+        return file_size(path)
+    return sum(file_size(file) for file in iter_files(path))
+
+# a function to return a path that does not exist yet
+# if the path exists, a counter is added to the file name, e.g. file_1.txt, file_2.txt
+def unique_path(path):
+    if not os.path.exists(path):
+        return path
+    base, extension = os.path.splitext(path)
+    counter = 1
+    while os.path.exists(f"{base}_{counter}{extension}"):
+        counter += 1
+    return f"{base}_{counter}{extension}"
+
+# a function to return the sha256 hex digest of the content of a file
+# the file is read in chunks so large files are not loaded into memory
+def file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# a function to open a path for binary reading
+# a file object is returned as it is, and it is not closed at the end of the with block
+def open_binary(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb")
+    return nullcontext(source)
+
+# a function to open a path or a binary file object for reading text
+# the undecodable bytes are replaced, a binary file object is detached at the end of the with block, not closed
+@contextmanager
+def open_text(source, encoding="utf-8-sig"):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding=encoding, errors="replace", newline="") as f:
+            yield f
+        return
+    f = io.TextIOWrapper(source, encoding=encoding, errors="replace", newline="")
+    try:
+        yield f
+    finally:
+        f.detach()
+
+# a function to yield the paths of the files in a folder and its subfolders as they are found
+# the folders are read one at a time with os.scandir, the whole tree is not listed first
+# the subfolders in skip_dirs are not read, the set can grow while the files are being read
+def iter_files(root, skip_dirs=()):
+    folders = [root]
+    while folders:
+        try:
+            entries = os.scandir(folders.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in skip_dirs:
+                        folders.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
@@ -0,0 +1,142 @@
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+
+BLIP_TAG = qn("a:blip")
+OLE_OBJECT_TAG = "{urn:schemas-microsoft-com:office:office}OLEObject"
+IMAGEDATA_TAG = "{urn:schemas-microsoft-com:vml}imagedata"
+R_EMBED = qn("r:embed")
+R_ID = qn("r:id")
+
+TR_TAG = qn("w:tr")
+TR_PR_TAG = qn("w:trPr")
+TC_TAG = qn("w:tc")
+TC_PR_TAG = qn("w:tcPr")
+P_TAG = qn("w:p")
+TBL_TAG = qn("w:tbl")
+GRID_BEFORE_TAG = qn("w:gridBefore")
+GRID_SPAN_TAG = qn("w:gridSpan")
+V_MERGE_TAG = qn("w:vMerge")
+W_VAL = qn("w:val")
+R_TAG = qn("w:r")
+T_TAG = qn("w:t")
+HYPERLINK_TAG = qn("w:hyperlink")
+# the other elements of a run translated to text, see paragraph_text
+RUN_TEXT_TAGS = {qn(tag) for tag in ("w:br", "w:cr", "w:noBreakHyphen", "w:ptab", "w:tab")}
+
+# walk the body of a docx document once and yield (element, block) pairs in document order
+# block is the Paragraph or Table object for the element, or None for other body elements (e.g. sectPr)
+# the element -> object index is built once per document, so the walk is linear in the number of body elements
+def iter_block_items(doc):
+    block_index = build_block_index(doc)
+    for element in doc.element.body:
+        yield element, block_index.get(element)
+
+# build a dictionary that maps the body elements of a docx document to their Paragraph/Table objects
+def build_block_index(doc):
+    body = doc._body
+    block_index = {}
+    for p in body._element.p_lst:
+        block_index[p] = Paragraph(p, body)
+    for tbl in body._element.tbl_lst:
+        block_index[tbl] = Table(tbl, body)
+    return block_index
+
+# return the lower case style name of a paragraph
+# the style names are cached per style id, so the styles part is only searched once per style
+def get_paragraph_style(para, style_cache):
+    style_id = para._p.style
+    if style_id not in style_cache:
+        style = para.style
+        style_cache[style_id] = "" if style is None else style.name.lower()
+    return style_cache[style_id]
+
+# return the relationship ids of the objects embedded in a paragraph element
+# the images (a:blip) come first, then the OLE objects (o:OLEObject) and the VML images (v:imagedata),
+# each group in document order, a relationship id is only returned once
+# the element is searched in place in a single traversal, without serializing it
+def find_embedded_rids(element):
+    groups = {BLIP_TAG: [], OLE_OBJECT_TAG: [], IMAGEDATA_TAG: []}
+    seen = set()
+    for child in element.iter(BLIP_TAG, OLE_OBJECT_TAG, IMAGEDATA_TAG):
+        r_id = child.get(R_EMBED if child.tag == BLIP_TAG else R_ID)
+        if r_id is not None and r_id not in seen:
+            seen.add(r_id)
+            groups[child.tag].append(r_id)
+    return groups[BLIP_TAG] + groups[OLE_OBJECT_TAG] + groups[IMAGEDATA_TAG]
+
+# return the rows of a table element (w:tbl) as lists of cell texts, and the table elements nested in its cells
+# the XML of the table is read once, without the python-docx cell objects which rebuild the grid of the table per row:
+# a cell spanning several grid columns (gridSpan) has its text in its first column and empty strings in the others,
+# a cell continuing a vertical merge (vMerge) is empty, so the text of a merged cell is written once,
+# the grid columns skipped at the start of a row (gridBefore) are empty cells and the rows are padded to the widest row
+# the text of a cell is the text of its paragraphs joined by "\n", as the text of a python-docx cell, see paragraph_text
+# the children of the elements are iterated and compared by tag, which is much faster than find or xpath in lxml
+def read_table(tbl):
+    rows = []
+    nested = []
+    for tr in tbl.iterchildren(TR_TAG):
+        row = []
+        for child in tr:
+            tag = child.tag
+            if tag == TR_PR_TAG:
+                row += [""] * grid_value(child, GRID_BEFORE_TAG, 0)
+            elif tag == TC_TAG:
+                span = 1
+                continued = False
+                texts = []
+                for block in child:
+                    tag = block.tag
+                    if tag == P_TAG:
+                        texts.append(paragraph_text(block))
+                    elif tag == TC_PR_TAG:
+                        span = grid_value(block, GRID_SPAN_TAG, 1)
+                        for prop in block.iterchildren(V_MERGE_TAG):
+                            # a vMerge without a value continues the merge
+                            continued = prop.get(W_VAL, "continue") == "continue"
+                    elif tag == TBL_TAG:
+                        nested.append(block)
+                row.append("" if continued else "\n".join(texts))
+                row += [""] * (span - 1)
+        rows.append(row)
+    width = max(map(len, rows), default=0)
+    for row in rows:
+        row += [""] * (width - len(row))
+    return rows, nested
+
+# return the text of a paragraph element (w:p), the same as its python-docx text: the text of its runs and of the runs
+# of its hyperlinks, the breaks and tabs of the runs are translated by the python-docx element classes
+def paragraph_text(p):
+    texts = []
+    for child in p:
+        tag = child.tag
+        if tag == R_TAG:
+            runs = (child,)
+        elif tag == HYPERLINK_TAG:
+            runs = child.iterchildren(R_TAG)
+        else:
+            continue
+        for r in runs:
+            for element in r:
+                tag = element.tag
+                if tag == T_TAG:
+                    texts.append(element.text or "")
+                elif tag in RUN_TEXT_TAGS:
+                    texts.append(str(element))
+    return "".join(texts)
+
+# return the integer value of the child of a property element (trPr, tcPr), default if it has none
+def grid_value(properties, tag, default):
+    for child in properties.iterchildren(tag):
+        value = child.get(W_VAL)
+        return int(value) if value and value.isdigit() else default
+    return default
+
+# yield the rows of a table element and then the rows of the tables nested in its cells, in document order, see read_table
+# a table without rows is skipped
+def iter_tables(tbl):
+    rows, nested = read_table(tbl)
+    if rows:
+        yield rows
+    for nested_tbl in nested:
+        yield from iter_tables(nested_tbl)
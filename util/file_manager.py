@@ -1,21 +1,129 @@
+import io
 import os
+import time
 import shutil
 import copy
-from markitdown import MarkItDown
+import asyncio
+import hashlib
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from . import backends
 from . import data_utils
+from . import docx_utils
+from . import archive_stream
+from . import pdf_utils
+from . import markdown_writer
+from . import table_utils
+from . import json_stream
+from . import text_stream
+from . import file_types
+from . import image_utils
+from . import chunking
+from . import metrics as run_metrics
+from .manifest import Manifest
+from .output_store import open_store
+from .file_registry import FileRegistry, PROCESSED, FAILED, SKIPPED
 from docx import Document
-import xml.etree.ElementTree as ET
+from docx.table import Table
+from docx.text.paragraph import Paragraph
 # import PyPDF2
-from unstructured.partition.pdf import partition_pdf
+
+# Version of the converters, recorded in the manifest of the incremental mode
+# change it when the output of a converter changes so the files are converted again
+CONVERTER_VERSION = "1"
+
+# the folder of the processed directory holding the embedded objects found in several documents, named by content hash
+# no document owns it, a document converted again does not delete the objects linked by the others
+SHARED_BLOBS_DIR = "_blobs"
+
+# the subdirectories of the originals directory, the processed files are moved to the subdirectory of their type
+ORIGINALS_SUBDIRS = ["zip", "pdf", "csv", "json", "xlsx", "docx", "png", "jpg", "txt", "other"]
+
+# the types of the files extracted from archives which are deleted once processed,
+# the other extracted files are moved to the originals directory like the raw files
+DELETED_EXTRACTED_TYPES = {"zip", "pdf"}
 
 class FileManager:
-    def __init__(self, root_dir="./Data"):
+    def __init__(self, root_dir="./Data", workers=1, incremental=False,
+                 stream_archives=False, max_archive_depth=5, max_archive_bytes=16 * 1024**3,
+                 pdf_window_pages=None, pdf_workers=1, pdf_page_strategy=False, table_rows=1000,
+                 json_depth=2, txt_section_chars=None, ocr_images=False, ocr_workers=1, ocr_lang="eng", chunk_chars=None, chunk_overlap=0,
+                 metrics=None, profile_file=None, output_store="files"):
+        self.root_dir = root_dir
         self.processed_dir = os.path.join(root_dir, "processed")
         self.raw_dir = os.path.join(root_dir, "raw")
         self.originals_dir = os.path.join(root_dir, "originals")
         self.subdir_dict = {}
-        self.raw_files_dict = {}
-        self.original_files_dict = {}
+        # the type of the raw files is detected from their first bytes
+        self.type_detector = file_types.FileTypeDetector()
+        # the files of the run: the raw files, the files extracted from archives and the queues of files to be processed
+        self.registry = FileRegistry()
+        # number of worker processes used to convert files, 1 converts the files in the main process
+        self.workers = workers
+        # the store of the outputs, "files" for the markdown files and the folders of the processed directory,
+        # "sqlite" for a single database, root_dir/processed.sqlite, the converters write to the processed directory
+        # and the outputs of each converted file are moved into the database, see output_store
+        self.output_store = open_store(output_store, self.processed_dir, os.path.join(root_dir, "processed.sqlite"))
+        # in incremental mode the raw directory holds the full set of inputs,
+        # the files converted by an earlier run are skipped and the outputs of deleted files are removed:
+        # the converted files are moved to the originals directory, so every file has to be dropped in the raw
+        # directory again for each run, the outputs of a file missing from a partial drop are deleted,
+        # a run on an empty raw directory keeps all the outputs, see delete_missing_sources
+        self.manifest = Manifest(os.path.join(root_dir, "manifest.jsonl"), self.processed_dir, self.output_store) if incremental else None
+        # in streaming mode the members of the zip archives are converted from memory instead of being extracted,
+        # the archives are limited in nesting depth and in total uncompressed bytes (None for no limit)
+        self.stream_archives = stream_archives
+        self.max_archive_depth = max_archive_depth
+        self.max_archive_bytes = max_archive_bytes
+        # the pdf files are partitioned in windows of pdf_window_pages pages (None for the whole file at once),
+        # in pdf_workers processes, and the markdown is written as the windows finish
+        self.pdf_window_pages = pdf_window_pages
+        self.pdf_workers = pdf_workers
+        # the pages of the pdf files are classified before partitioning, the pages with a text layer are partitioned
+        # with the fast strategy and only the scanned and image pages with hi_res
+        self.pdf_page_strategy = pdf_page_strategy
+        # the rows of the csv files and of the xlsx sheets are written in markdown tables of at most table_rows rows
+        self.table_rows = table_rows
+        # the nested objects of the json records are flattened down to json_depth levels, the deeper values are kept as json
+        self.json_depth = json_depth
+        # the paragraphs of the txt files are written in sections of about txt_section_chars characters,
+        # each under a heading with its first line number (None for no sections)
+        self.txt_section_chars = txt_section_chars
+        # the text of the images linked by the markdown files of a run is read by OCR and written below their links,
+        # the images of all the documents are read together in ocr_workers processes and their texts are cached
+        # by content hash in the image text cache, so an image found again in a document or in a later run is not read again
+        self.image_text_cache = image_utils.ImageTextCache(os.path.join(root_dir, "image_text.jsonl")) if ocr_images else None
+        self.ocr_workers = ocr_workers
+        self.ocr_lang = ocr_lang
+        # the elements of the documents are split in chunks of at most chunk_chars characters (None for no chunks)
+        # written to a <name>.chunks.jsonl file next to the markdown file, the chunks follow the headings of the
+        # documents and repeat up to chunk_overlap characters of the chunk before them, see chunking.Chunker
+        if chunk_chars is not None:
+            chunking.check_overlap(chunk_chars, chunk_overlap)
+        self.chunk_chars = chunk_chars
+        self.chunk_overlap = chunk_overlap
+        # the timers and counters of the stages of each file, see metrics.Metrics, disabled by default,
+        # a summary of the metrics is printed at the end of process_raw_dir
+        self.metrics = metrics if metrics is not None else run_metrics.NullMetrics()
+        # the name or the path of a file converted under cProfile and tracemalloc, the profile is saved in root_dir/profiles
+        self.profile_file = profile_file
+        # the information reported by the converters for each file, e.g. the pages of each strategy of the pdf files
+        self.file_reports = {}
+        # the outputs of the converted files, by top level raw file
+        self.source_outputs = {}
+        # the top level raw files with a file that failed to convert
+        self.failed_sources = set()
+        # the state of the raw files to be converted in incremental mode
+        self.source_states = {}
+        self.skipped_files = []
+        # the (file, extension, outputs) of the converted files whose outputs are not in the packed output store yet
+        self.unpacked_outputs = deque()
+        # the paths of the saved docx embedded objects, by content hash
+        self.blob_paths = {}
+        # the pool of worker processes kept between runs by open_worker_pool, None starts a pool for each run
+        self.worker_pool = None
 
     # Reset the processed directory
     def reset_processed_directory(self):
@@ -27,6 +135,12 @@ class FileManager:
         # Create a new directory
         os.makedirs(self.processed_dir)
 
+        # The output store and the manifest record the content of the processed directory, reset them as well
+        self.output_store.clear()
+        if self.manifest is not None:
+            self.manifest.clear()
+            self.manifest.save()
+
     # Reset the raw directory
     def reset_raw_directory(self):
         # Check if the directory exists
@@ -48,13 +162,22 @@ class FileManager:
         os.makedirs(self.originals_dir)
 
         # Create subdirectories for different file types and save the addresses in a dictionary
-        subdirs = ["zip", "pdf", "csv", "json", "xlsx", "docx", "png", "jpg", "txt", "other"]
         self.subdir_dict = {}
-        for subdir in subdirs:
+        for subdir in ORIGINALS_SUBDIRS:
             subdir_path = os.path.join(self.originals_dir, subdir)
             os.makedirs(subdir_path)
             self.subdir_dict[subdir] = subdir_path
 
+    # Create the directories which do not exist yet, without deleting any file, e.g. before watching the raw directory
+    def ensure_directories(self):
+        os.makedirs(self.processed_dir, exist_ok=True)
+        os.makedirs(self.raw_dir, exist_ok=True)
+        self.subdir_dict = {}
+        for subdir in ORIGINALS_SUBDIRS:
+            subdir_path = os.path.join(self.originals_dir, subdir)
+            os.makedirs(subdir_path, exist_ok=True)
+            self.subdir_dict[subdir] = subdir_path
+
     # Reset all directories
     def reset_all_directories(self):
         self.reset_processed_directory()
@@ -63,28 +186,64 @@ class FileManager:
 
     # List the files in the raw directory to be processed in a dictionary based on their extensions
     def list_raw_files(self):
-        return self.append_raw_files(self.raw_dir)
+        with self.metrics.timer("list"):
+            return self.append_raw_files(self.raw_dir)
     
-    # Append the files in a folder to the list raw files
-    def append_raw_files(self, raw_dir, raw_files_dict=None):
-        if raw_files_dict is None:
-            raw_files_dict = self.raw_files_dict
+    # Append the files in a folder to the file registry, by default the registry of the file manager
+    # origin is the top level raw file the folder was extracted from, None for the raw directory
+    # return the queues of the files to be processed in a dictionary based on their extensions
+    def append_raw_files(self, raw_dir, registry=None, origin=None):
+        if registry is None:
+            registry = self.registry
         for subdir, dirs, files in os.walk(raw_dir):
             for file in files:
                 file_path = os.path.join(subdir, file)
-                extension = file.split(".")[-1]
-                if extension in raw_files_dict:
-                    raw_files_dict[extension].append(file_path)
-                else:
-                    raw_files_dict[extension] = [file_path]
-        return raw_files_dict
+                registry.add(file_path, self.file_type(file_path), origin)
+        return registry.queues
+
+    # Return the type a file is processed as, detected from its content, see file_types
+    # the type is one of the extensions of process_raw_files, or the lower case extension of the file for the other files
+    def file_type(self, file_path):
+        return self.type_detector.detect(file_path)
+
+    # Reset the records of the previous run
+    def reset_run_state(self):
+        self.registry = FileRegistry()
+        self.source_outputs = {}
+        self.failed_sources = set()
+        self.source_states = {}
+        self.skipped_files = []
+        self.unpacked_outputs = deque()
+        self.file_reports = {}
     
     # Process the files in the raw directory
     def process_raw_dir(self):
+        start = time.perf_counter()
+        self.reset_run_state()
         raw_files_dict = self.list_raw_files()
-        # Append hard copy of raw_files_dict to original_files_dict
-        self.original_files_dict = copy.deepcopy(raw_files_dict)
+        if self.manifest is not None:
+            self.skip_unchanged_files(raw_files_dict)
+        processed_files = self.process_queued_files(raw_files_dict)
+        self.report_metrics(time.perf_counter() - start)
+        return processed_files
 
+    # Process a batch of raw files, e.g. the new and changed files found by a watcher.WatchDaemon
+    # the directories are not reset and the other files of the raw directory are left as they are,
+    # in incremental mode the manifest entries of the files which are not in the batch are kept
+    def process_batch(self, files):
+        self.reset_run_state()
+        with self.metrics.timer("list"):
+            for file in files:
+                # a file may be deleted or moved away before its batch is processed
+                if os.path.isfile(file):
+                    self.registry.add(file, self.file_type(file))
+        raw_files_dict = self.registry.queues
+        if self.manifest is not None:
+            self.skip_unchanged_files(raw_files_dict, delete_missing=False)
+        return self.process_queued_files(raw_files_dict)
+
+    # Process the queues of the files of the registry, raw_files_dict, the archives first, and return the processed files
+    def process_queued_files(self, raw_files_dict):
         processed_files = []
         
         # Search in raw_files for the extensions of compressed files
@@ -92,16 +251,281 @@ class FileManager:
         while compressed_extensions:
             extension = compressed_extensions.pop(0)
             if extension in raw_files_dict:
-                compressed_files = raw_files_dict.pop(extension)
+                compressed_files = self.registry.pop_queue(extension)
                 processed_files += self.process_raw_files(compressed_files, extension)
 
+        # Convert the remaining files in worker processes
+        if self.workers > 1:
+            jobs = []
+            while raw_files_dict:
+                extension, files = raw_files_dict.popitem()
+                if self.get_converter(extension) is not None:
+                    jobs += [(extension, file) for file in files]
+                else:
+                    processed_files += self.process_raw_files(files, extension) or []
+            processed_files += self.process_jobs_parallel(jobs)
+
         # Process remaining files in raw_files_dict
         while raw_files_dict:
             extension, files = raw_files_dict.popitem()
-            processed_files += self.process_raw_files(files, extension)
+            processed_files += self.process_raw_files(files, extension) or []
+
+        if self.image_text_cache is not None:
+            self.annotate_image_texts()
+            self.pack_outputs()
+
+        if self.manifest is not None:
+            self.update_manifest()
 
         return processed_files
+
+    # Print the summary of the metrics of a run which took seconds, if the metrics are enabled
+    def report_metrics(self, seconds):
+        if self.metrics.enabled:
+            print(self.metrics.report(self.registry.status_counts(), seconds))
+
+    # Remove the files converted by an earlier run from the queues of raw_files_dict and move them to the originals directory
+    # the outputs of changed files and of files deleted from the raw directory are removed from the processed directory
+    # the state of the files to be converted is kept in source_states, to be recorded in the manifest
+    # delete_missing is False when raw_files_dict is only a part of the raw directory, e.g. a batch of process_batch
+    def skip_unchanged_files(self, raw_files_dict, delete_missing=True):
+        self.source_states = {}
+        sources = set()
+        for extension in list(raw_files_dict):
+            files = deque(file for file in raw_files_dict[extension] if self.check_source(file, extension, sources))
+            if files:
+                raw_files_dict[extension] = files
+            else:
+                raw_files_dict.pop(extension)
+        if delete_missing:
+            self.delete_missing_sources(sources)
+
+    # Return True if a raw file has to be converted, its source name is added to sources
+    # an unchanged file is moved to the originals directory, the outputs of a changed file are removed
+    def check_source(self, file, extension, sources, original=None):
+        source = os.path.relpath(file, self.raw_dir)
+        sources.add(source)
+        if self.manifest.is_unchanged(source, file, CONVERTER_VERSION):
+            self.store_original(file, extension, original=original)
+            self.registry.set_status(file, SKIPPED)
+            self.skipped_files.append(file)
+            return False
+        self.source_states[file] = self.manifest.file_state(file)
+        self.manifest.remove_outputs(source)
+        return True
+
+    # Delete the entries and the outputs of the sources of the manifest which are not in sources
+    # nothing is deleted if sources is empty, an empty raw directory is a drop which has not arrived yet,
+    # not the deletion of every file
+    def delete_missing_sources(self, sources):
+        if not sources:
+            if self.manifest.sources():
+                print("No file in the raw directory, the outputs of the earlier runs are kept")
+            return
+        for source in self.manifest.sources() - sources:
+            self.manifest.delete(source)
+
+    # Record the archives of the raw directory in the manifest once all their files have been converted
+    # and compact the manifest file
+    def update_manifest(self):
+        with self.metrics.timer("manifest"):
+            for file in list(self.source_states):
+                if file in self.source_outputs and file not in self.failed_sources:
+                    self.record_source(file)
+            self.manifest.save()
+
+    # Record a converted raw file and its outputs in the manifest
+    def record_source(self, file):
+        state = self.source_states.pop(file)
+        source = os.path.relpath(file, self.raw_dir)
+        self.manifest.record(source, state, CONVERTER_VERSION, self.source_outputs[file])
     
+    # Process the files in the raw directory with the asyncio pipeline and return the processed files
+    async def aprocess_raw_dir(self, queue_size=64):
+        return [file async for file in self.aiter_processed(queue_size=queue_size)]
+
+    # Process the files in the raw directory with a pipeline of asyncio tasks and yield the processed files as they finish
+    # the files are found with os.scandir and converted while the rest of the directory is still being read,
+    # the conversions run in the worker processes (in a thread if workers is 1) and the markdown files and
+    # the embedded objects are written by a single writer thread, which also keeps the records of the run
+    # the stages are connected by queues of queue_size items, a slow stage or consumer holds back the stages before it
+    # only the files with a converter and the zip files are processed, the others are left in the raw directory
+    async def aiter_processed(self, queue_size=64, batch_size=256):
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        self.reset_run_state()
+        convert_queue = asyncio.Queue(maxsize=queue_size)
+        write_queue = asyncio.Queue(maxsize=queue_size)
+        results = asyncio.Queue(maxsize=queue_size)
+        # the folders the zip files are extracted in, they are not read as part of the raw directory
+        extract_dirs = set()
+        # the tasks feeding the files extracted from zip files to the conversion stage
+        feeders = set()
+        writer = ThreadPoolExecutor(max_workers=1)
+        pools = [self.start_worker_pool(self.workers) if self.workers > 1 else ThreadPoolExecutor(max_workers=1)]
+
+        # return True if the files of an extension are processed by the pipeline
+        def is_processed(extension):
+            return extension == "zip" or self.get_converter(extension) is not None
+
+        async def discover():
+            sources = set()
+            files = data_utils.iter_files(self.raw_dir, skip_dirs=extract_dirs)
+            while True:
+                batch = await loop.run_in_executor(None, lambda: list(itertools.islice(files, batch_size)))
+                if not batch:
+                    break
+                jobs = [(self.file_type(file), file, True) for file in batch]
+                jobs = [job for job in jobs if is_processed(job[0])]
+                if self.manifest is not None:
+                    jobs = await loop.run_in_executor(writer, lambda: [job for job in jobs if self.check_source(job[1], job[0], sources, original=True)])
+                for job in jobs:
+                    await convert_queue.put(job)
+            if self.manifest is not None:
+                await loop.run_in_executor(writer, self.delete_missing_sources, sources)
+
+        # run the conversion stage of a file in the worker pool, a file which crashes its worker process
+        # is retried in its own worker process, it may have been killed by another file of the pool
+        # the metrics recorded by the worker processes are returned with the results and added to the metrics of the run
+        async def extract(extension, file):
+            executor = pools[0]
+            if self.workers <= 1:
+                return await loop.run_in_executor(executor, self.extract_file, extension, file)
+            try:
+                result, records = await loop.run_in_executor(executor, _extract_in_worker, extension, file)
+                self.metrics.merge(records)
+                return result
+            except BrokenProcessPool:
+                if pools[0] is executor:
+                    pools[0] = self.start_worker_pool(self.workers)
+                    executor.shutdown(wait=False)
+            executor = self.start_worker_pool(1)
+            try:
+                result, records = await loop.run_in_executor(executor, _extract_in_worker, extension, file)
+                self.metrics.merge(records)
+                return result
+            except BrokenProcessPool:
+                raise RuntimeError("the worker process crashed")
+            finally:
+                executor.shutdown(wait=False)
+
+        async def convert():
+            while True:
+                extension, file, original = await convert_queue.get()
+                try:
+                    result = exception = None
+                    try:
+                        if extension != "zip":
+                            result = await extract(extension, file)
+                        elif not self.stream_archives:
+                            extract_dirs.add(os.path.splitext(file)[0])
+                            result = await loop.run_in_executor(None, self.extract_zip_file, file)
+                    except Exception as e:
+                        exception = e
+                    await write_queue.put((extension, file, original, result, exception))
+                finally:
+                    convert_queue.task_done()
+
+        async def feed(jobs):
+            for job in jobs:
+                await convert_queue.put(job)
+
+        async def write():
+            while True:
+                job = await write_queue.get()
+                try:
+                    processed_files, jobs = await loop.run_in_executor(writer, self.write_stage, *job)
+                    jobs = [job for job in jobs if is_processed(job[0])]
+                    if jobs:
+                        feeders.add(asyncio.ensure_future(feed(jobs)))
+                    for file in processed_files:
+                        await results.put(file)
+                finally:
+                    write_queue.task_done()
+
+        # wait for the end of the discovery and for the queues to be drained, then mark the end of the results
+        async def run():
+            try:
+                await discover()
+                while True:
+                    await convert_queue.join()
+                    await write_queue.join()
+                    if not feeders:
+                        break
+                    # the files fed by the zip files may still be on their way to the queues
+                    running_feeders = list(feeders)
+                    feeders.clear()
+                    await asyncio.gather(*running_feeders)
+            finally:
+                await results.put(None)
+
+        tasks = [asyncio.ensure_future(convert()) for _ in range(max(self.workers, 1))]
+        tasks.append(asyncio.ensure_future(write()))
+        coordinator = asyncio.ensure_future(run())
+        try:
+            while True:
+                file = await results.get()
+                if file is None:
+                    break
+                yield file
+            await coordinator
+            # the images are read once all the documents are written, the files have been yielded before their annotation
+            if self.image_text_cache is not None:
+                await loop.run_in_executor(writer, self.annotate_image_texts)
+                await loop.run_in_executor(writer, self.pack_outputs)
+            if self.manifest is not None:
+                await loop.run_in_executor(writer, self.update_manifest)
+            self.report_metrics(time.perf_counter() - start)
+        finally:
+            pending = tasks + [coordinator] + list(feeders)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            await loop.run_in_executor(None, lambda: [executor.shutdown(wait=True) for executor in [writer] + pools])
+
+    # Run the conversion stage of the asyncio pipeline for a file, return (document, outputs, report)
+    # a file with a document writer is read into a document to be written by the writer stage,
+    # the other files are written by their converter and their outputs are returned
+    def extract_file(self, extension, file):
+        self.load_backends(backends.extension_backends(extension))
+        extract, write = self.get_document_stages(extension)
+        if extract is not None:
+            return self.run_converter(extract, file), None, self.file_reports.pop(file, None)
+        return None, self.run_converter(self.get_converter(extension), file), self.file_reports.pop(file, None)
+
+    # Run the writer stage of the asyncio pipeline for a file converted by the conversion stage
+    # return the processed files and the (extension, file, original) jobs of the files extracted from a zip file
+    def write_stage(self, extension, file, original, result, exception):
+        with self.metrics.file_scope(file):
+            return self.write_stage_file(extension, file, original, result, exception)
+
+    def write_stage_file(self, extension, file, original, result, exception):
+        if exception is None:
+            try:
+                if extension == "zip":
+                    if self.stream_archives:
+                        return self.process_zip_files_streaming([file], original=original), []
+                    # the extracted files are fed to the conversion stage instead of the queues of the registry
+                    self.zip_extracted(file, result, original=original, queue=False)
+                    return [file], [(record.extension, record.path, False) for record in result.records.values()]
+                document, outputs, report = result
+                if document is not None:
+                    outputs = self.get_document_stages(extension)[1](document)
+                if report:
+                    self.file_reports[file] = report
+                self.file_finished(file, extension, outputs, original=original)
+                return [file], []
+            except Exception as e:
+                exception = e
+        if extension == "zip":
+            self.registry.set_status(file, FAILED)
+            self.failed_sources.add(self.registry.origin(file))
+            print(f"Error extracting file: {file}")
+            print(f"Exception: {exception}")
+        else:
+            self.file_failed(file, exception)
+        return [], []
+
     # Process a raw file list based on its extension
     def process_raw_files(self, files, extension):
         switch = {
@@ -109,6 +533,8 @@ class FileManager:
             "pdf": self.process_pdf_files,
             "csv": self.process_csv_files,
             "json": self.process_json_files,
+            "jsonl": self.process_json_files,
+            "ndjson": self.process_json_files,
             "xlsx": self.process_xlsx_files,
             "docx": self.process_docx_files,
             "png": self.process_png_files,
@@ -117,279 +543,750 @@ class FileManager:
             "other": self.process_other_files
         }
         process_function = switch.get(extension, self.process_other_files)
+        self.load_backends(backends.extension_backends(extension))
         return process_function(files)
 
+    # Import the converter backends of names which are not imported by this process yet, see backends.load
+    # the time of each import is recorded as an "import_<backend>" stage, a backend which can not be imported is reported
+    # and the files that need it fail when they are converted
+    def load_backends(self, names):
+        try:
+            imported = backends.load(names)
+        except ImportError as e:
+            print(f"Error importing converter backend: {e}")
+            return
+        if self.metrics.enabled:
+            for name, seconds in imported.items():
+                self.metrics.add_time(f"import_{name}", seconds)
+
+    # Return the converter of a single file based on its extension, None if the extension has no converter
+    def get_converter(self, extension):
+        switch = {
+            "pdf": self.convert_pdf_file,
+            "docx": self.convert_docx_file,
+            "csv": self.convert_csv_file,
+            "xlsx": self.convert_xlsx_file,
+            "json": self.convert_json_file,
+            "jsonl": self.convert_json_file,
+            "ndjson": self.convert_json_file,
+            "png": self.convert_image_file,
+            "jpg": self.convert_image_file,
+            "txt": self.convert_txt_file,
+        }
+        return switch.get(extension)
+
+    # Return the (extractor, writer) of the files of an extension whose conversion is split in two stages,
+    # (None, None) if the extension has no such converter
+    # the extractor reads a file into a document without writing anything, the writer writes the document
+    def get_document_stages(self, extension):
+        switch = {
+            "docx": (self.extract_docx_document, self.write_docx_document),
+        }
+        return switch.get(extension, (None, None))
+
+    # Convert a list of files with the converter of their extension
+    # a file that fails to convert is reported and left in place, the remaining files are still converted
+    def process_files(self, files, extension):
+        processed_files = []
+        files = deque(files)
+        while files:
+            file = files.popleft()
+            try:
+                outputs = self.run_converter(self.get_converter(extension), file)
+            except Exception as e:
+                self.file_failed(file, e)
+                continue
+            processed_files.append(file)
+            self.file_finished(file, extension, outputs)
+        return processed_files
+
+    # Convert a list of (extension, file) jobs in a pool of worker processes
+    # the largest files are scheduled first so a big file does not start last and delay the end of the run
+    # the originals are moved by the main process once their conversion has finished
+    # the processed files are returned in the order of the jobs, the same as the sequential processing
+    def process_jobs_parallel(self, jobs):
+        pending = deque(sorted(jobs, key=lambda job: data_utils.file_size(job[1]), reverse=True))
+        finished = set()
+        # jobs that were running when a worker process died, one of them probably crashed the worker
+        suspects = []
+        extensions = {extension for extension, file in jobs}
+
+        # the pool kept by open_worker_pool is used and left running, else a pool is started for these jobs
+        shared = self.worker_pool is not None
+        executor = self.worker_pool if shared else self.start_worker_pool(self.workers, extensions)
+        running = {}
+        try:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    job = pending.popleft()
+                    running[executor.submit(_convert_in_worker, *job)] = job
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                pool_broken = False
+                for future in done:
+                    job = running.pop(future)
+                    if self.finish_job(job, future, suspects):
+                        finished.add(job)
+                    elif isinstance(future.exception(), BrokenProcessPool):
+                        pool_broken = True
+                if pool_broken:
+                    # the remaining running jobs fail with the broken pool as well, collect them and start a new pool
+                    for future in running:
+                        future.exception()
+                        suspects.append(running[future])
+                    running = {}
+                    executor.shutdown(wait=True)
+                    executor = self.start_worker_pool(self.workers, extensions)
+                    if shared:
+                        self.worker_pool = executor
+        finally:
+            if not shared:
+                executor.shutdown(wait=True)
+
+        # retry the suspects one by one in their own worker process, so a crashing file only takes itself down
+        for job in suspects:
+            executor = self.start_worker_pool(1, [job[0]])
+            try:
+                future = executor.submit(_convert_in_worker, *job)
+                wait([future])
+                if self.finish_job(job, future):
+                    finished.add(job)
+                elif isinstance(future.exception(), BrokenProcessPool):
+                    self.file_failed(job[1], "the worker process crashed")
+            finally:
+                executor.shutdown(wait=True)
+
+        return [job[1] for job in jobs if job in finished]
+
+    # Handle a finished conversion of a worker process and return True if the conversion succeeded
+    # a job which failed because the worker process died is appended to suspects if given
+    def finish_job(self, job, future, suspects=None):
+        extension, file = job
+        exception = future.exception()
+        if exception is None:
+            outputs, report, records = future.result()
+            self.metrics.merge(records)
+            if report:
+                self.file_reports[file] = report
+            self.file_finished(file, extension, outputs)
+            return True
+        if isinstance(exception, BrokenProcessPool):
+            if suspects is not None:
+                suspects.append(job)
+            return False
+        self.file_failed(file, exception)
+        return False
+
+    # Convert a file with a converter and return the outputs of the converter, the keyword arguments are passed to it
+    # the time of the conversion and the bytes read are recorded in the metrics of key, by default the file,
+    # the file selected by profile_file is converted under cProfile and tracemalloc, see metrics.profile_call
+    def run_converter(self, converter, file, key=None, **kwargs):
+        if key is None:
+            key = file
+        with self.metrics.file_scope(key):
+            if self.metrics.enabled and isinstance(file, str):
+                self.metrics.count("bytes_read", data_utils.file_size(file))
+            with self.metrics.timer("convert"):
+                if self.profile_file is not None and self.is_profiled(key):
+                    profile_path = os.path.join(self.root_dir, "profiles", os.path.basename(key) + ".prof")
+                    return run_metrics.profile_call(lambda: converter(file, **kwargs), profile_path)
+                return converter(file, **kwargs)
+
+    # Return True if a file is the file selected by profile_file, by path or by name
+    def is_profiled(self, file):
+        return file == self.profile_file or os.path.basename(file) == self.profile_file
+
+    # Record the outputs of a converted file and move it to the originals directory
+    def file_finished(self, file, extension, outputs, original=None):
+        if self.metrics.enabled:
+            self.metrics.count("bytes_written", sum(data_utils.path_size(output) for output in outputs or []), file=file)
+            self.metrics.event("file", file=file, status=PROCESSED)
+        source = self.registry.origin(file)
+        self.registry.set_status(file, PROCESSED)
+        self.source_outputs.setdefault(source, []).extend(outputs or [])
+        # the outputs are packed once the images of the run are annotated, see annotate_image_texts
+        if self.output_store.packed:
+            self.unpacked_outputs.append((file, extension, outputs or []))
+            if self.image_text_cache is None:
+                self.pack_outputs()
+        self.store_original(file, extension, original=original)
+        # a raw file that is not an archive is recorded right away, so an interrupted run keeps its progress
+        if source == file and file in self.source_states:
+            self.record_source(file)
+
+    # Move the outputs of the converted files to the packed output store, with the metadata of their file:
+    # its path relative to the raw directory, its type, the version of the converters and the report of its converter
+    def pack_outputs(self):
+        with self.metrics.timer("pack"):
+            while self.unpacked_outputs:
+                file, extension, outputs = self.unpacked_outputs.popleft()
+                metadata = {"file": os.path.relpath(file, self.raw_dir), "type": extension, "version": CONVERTER_VERSION}
+                if file in self.file_reports:
+                    metadata["report"] = self.file_reports[file]
+                self.output_store.add(outputs, metadata)
+
+    # Report a file that failed to convert
+    def file_failed(self, file, exception):
+        self.metrics.event("file", file=file, status=FAILED, error=str(exception))
+        self.registry.set_status(file, FAILED)
+        self.failed_sources.add(self.registry.origin(file))
+        print(f"Error processing file: {file}")
+        print(f"Exception: {exception}")
+
+    # Start a pool of worker processes to convert files
+    # the backends of the converters of extensions are imported by each worker process as it starts
+    def start_worker_pool(self, workers, extensions=()):
+        names = sorted({name for extension in extensions for name in backends.extension_backends(extension)})
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.worker_copy(), names))
+
+    # Start a pool of worker processes kept between runs, so the workers and their converter backends stay loaded
+    # the workers import the backends of all the converters as they start, does nothing with a single worker
+    def open_worker_pool(self):
+        if self.workers > 1 and self.worker_pool is None:
+            self.worker_pool = self.start_worker_pool(self.workers, list(backends.EXTENSION_BACKENDS))
+
+    # Stop the pool of worker processes started by open_worker_pool
+    def close_worker_pool(self):
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown(wait=True)
+            self.worker_pool = None
+
+    # Return a copy of the file manager without the file lists, to be sent to the worker processes
+    def worker_copy(self):
+        worker = copy.copy(self)
+        worker.registry = FileRegistry()
+        worker.type_detector = file_types.FileTypeDetector()
+        worker.workers = 1
+        worker.manifest = None
+        # the outputs are packed by the main process
+        worker.output_store = None
+        worker.image_text_cache = None
+        worker.metrics = self.metrics.worker_copy()
+        worker.source_outputs = {}
+        worker.source_states = {}
+        worker.blob_paths = {}
+        worker.file_reports = {}
+        return worker
+
+    # Move a processed file to its originals subdirectory, a file extracted from an archive is deleted instead
+    # if its type is in DELETED_EXTRACTED_TYPES
+    # original tells if the file is an original of the raw directory, by default it is looked up in the registry
+    def store_original(self, file, extension, original=None):
+        if original is None:
+            original = self.registry.is_original(file)
+        if original or extension not in DELETED_EXTRACTED_TYPES:
+            subdir = self.subdir_dict[extension] if extension in self.subdir_dict else self.subdir_dict["other"]
+            destination = data_utils.unique_path(os.path.join(subdir, os.path.basename(file)))
+            shutil.move(file, destination)
+        else:
+            os.remove(file)
+
     # Placeholder methods for processing different file types
     def process_zip_files(self, files):
+        if self.stream_archives:
+            return self.process_zip_files_streaming(files)
 
         processed_zip_files = []
+        files = deque(files)
         # loop over the file in files     
         while files:
-            file = files.pop(0)
-            new_raw_files_dict = {}
-            #get the path of the file and file name
-            file_path = os.path.dirname(file)
-            file_name_extension = os.path.basename(file)
-            file_name = os.path.splitext(file_name_extension)[0]
-            # create a folder with the name of the file with extension
-            new_dir = os.path.join(file_path, file_name)
-            os.makedirs(new_dir, exist_ok=True)
-
+            file = files.popleft()
             try:
                 # extract the file
-                shutil.unpack_archive(file, new_dir)
-                self.append_raw_files(new_dir, raw_files_dict=new_raw_files_dict)
-                if "zip" in new_raw_files_dict:
-                    files.extend(new_raw_files_dict["zip"])
-                    new_raw_files_dict.pop("zip")
-                data_utils.append_dictionaries(self.raw_files_dict, new_raw_files_dict)
+                extracted = self.extract_zip_file(file)
             except:
+                self.registry.set_status(file, FAILED)
+                self.failed_sources.add(self.registry.origin(file))
                 print(f"Error extracting file: {file}")
                 continue
 
-            #if the zip file is available in the original_files_dict
-            # move the file to the processed directory
-            # else delete the zip file
-            if file in self.original_files_dict["zip"]:
-                shutil.move(file, self.subdir_dict["zip"])
-            else:
-                os.remove(file)
-            
+            # the extracted files are queued in the registry, the nested zip files are extracted by this loop
+            self.zip_extracted(file, extracted)
+            files.extend(self.registry.pop_queue("zip"))
             processed_zip_files.append(file)
         
         return processed_zip_files
 
-    def process_pdf_files(self, files):
-        # Implement processing logic for pdf files
-        # loop over the file in files
-        processed_pdf_files = []
+    # Extract a zip file in a folder with the name of the file next to it
+    # return a registry of the extracted files, to be merged in the registry of the file manager by zip_extracted
+    def extract_zip_file(self, file):
+        #get the path of the file and file name
+        file_path = os.path.dirname(file)
+        file_name_extension = os.path.basename(file)
+        file_name = os.path.splitext(file_name_extension)[0]
+        # create a folder with the name of the file with extension
+        new_dir = os.path.join(file_path, file_name)
+        os.makedirs(new_dir, exist_ok=True)
+        with self.metrics.file_scope(file):
+            self.metrics.count("bytes_read", data_utils.file_size(file))
+            with self.metrics.timer("zip_extract"):
+                shutil.unpack_archive(file, new_dir)
+            extracted = FileRegistry()
+            self.append_raw_files(new_dir, registry=extracted, origin=self.registry.origin(file))
+            self.metrics.count("files_extracted", len(extracted))
+        return extracted
+
+    # Add the files extracted from a zip file to the registry, queued to be processed if queue is True,
+    # and move the zip file to the originals directory if it is an original, else delete it
+    def zip_extracted(self, file, extracted, original=None, queue=True):
+        self.registry.merge(extracted, queue=queue)
+        self.registry.set_status(file, PROCESSED)
+        self.source_outputs.setdefault(self.registry.origin(file), [])
+        self.store_original(file, "zip", original=original)
+
+    # Convert the members of zip archives from memory, without extracting the archives to disk
+    # nested zips are read from memory as well, the processed members are reported as <archive>/<member>
+    # original tells if the files are originals, by default they are looked up in the registry
+    def process_zip_files_streaming(self, files, original=None):
+        processed_zip_files = []
+        files = deque(files)
         while files:
-            file = files.pop(0)
-            main_file_path, main_file_name = os.path.split(file)
-            output_dir = os.path.join(self.processed_dir, main_file_name.replace(".","_")+"_images")
-
-            rpe = partition_pdf(
-                filename=file,
-                strategy="auto",
-                extract_image_block_types=["Image", "Table"],
-                infer_table_structure=False,
-                # chunking_strategy="title",
-                max_characters=4000,
-                new_after_n_chars=3800,
-                combine_text_under_n_chars=2000,
-                extract_image_block_output_dir = f"{output_dir}",
-                # Add a callback function to update the progress bar
-            #   progress_callback=lambda current_page: pbar.update(1) if current_page else None
+            file = files.popleft()
+            origin = self.registry.origin(file)
+            source_outputs = self.source_outputs.setdefault(origin, [])
+            processed_members = []
+            members = archive_stream.iter_zip_members(
+                file, file,
+                max_depth=self.max_archive_depth,
+                max_bytes=self.max_archive_bytes,
+                wanted=lambda extension: self.get_converter(extension) is not None
             )
+            try:
+                for member, name, extension, stream in members:
+                    self.registry.add(member, extension, origin, queue=False)
+                    self.load_backends(backends.extension_backends(extension))
+                    try:
+                        outputs = self.run_converter(self.get_converter(extension), stream, key=member, name=name)
+                    except Exception as e:
+                        self.file_failed(member, e)
+                        continue
+                    source_outputs.extend(outputs)
+                    self.registry.set_status(member, PROCESSED)
+                    processed_members.append(member)
+            except Exception as e:
+                self.failed_sources.add(origin)
+                print(f"Error extracting file: {file}")
+                print(f"Exception: {e}")
+                continue
 
-            new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
+            self.store_original(file, "zip", original=original)
+            processed_zip_files.append(file)
+            processed_zip_files += processed_members
+        return processed_zip_files
 
-             # Open the markdown file for writing
-            with open(new_file_path, 'w', encoding='utf-8') as md_file:
-                for el in rpe:
-                    if el.category == 'Image' or el.category == 'Figure' or el.category == 'Picture':
-                        md_file.write(f"![Image]({el.metadata.image_path})\n")
-                    else:
-                        md_file.write(f"{el.text}\n")
-            processed_pdf_files.append(file)
-            # if the pdf file is available in the original_files_dict
-            # move the file to the processed directory
-            # else delete the pdf file
-            if file in self.original_files_dict["pdf"]:
-                shutil.move(file, self.subdir_dict["pdf"])
+    def process_pdf_files(self, files):
+        return self.process_files(files, "pdf")
+
+    # Convert a pdf file to a markdown file in the processed directory
+    # return the paths of the markdown file and its chunks (see save_markdown) and of the directory of the extracted images
+    # file is a path or a binary file object, name is the file name used for the outputs, by default the name of the path
+    def convert_pdf_file(self, file, name=None):
+        main_file_name = name if name is not None else os.path.basename(file)
+        output_dir = os.path.join(self.processed_dir, main_file_name.replace(".","_")+"_images")
+
+        if self.pdf_window_pages or self.pdf_page_strategy:
+            elements = self.iter_pdf_window_elements(file, output_dir, report_key=file if isinstance(file, str) else name)
+        else:
+            source = {"filename": file} if isinstance(file, str) else {"file": file}
+            with self.metrics.timer("pdf_partition"):
+                rpe = backends.get("pdf").partition_pdf(**source, **self.pdf_partition_kwargs(output_dir))
+            elements = (pdf_element_dict(el) for el in rpe)
+
+        new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
+
+        # the images are of type "Image", the other elements of type "text"
+        return self.save_markdown(elements, new_file_path, embedding_objects_types=["image"]) + [output_dir]
+
+    # The arguments of partition_pdf for a pdf file, the images are extracted in output_dir
+    def pdf_partition_kwargs(self, output_dir):
+        return dict(
+            strategy="auto",
+            extract_image_block_types=["Image", "Table"],
+            infer_table_structure=False,
+            # chunking_strategy="title",
+            max_characters=4000,
+            new_after_n_chars=3800,
+            combine_text_under_n_chars=2000,
+            extract_image_block_output_dir = f"{output_dir}",
+        )
+
+    # Partition a pdf file in windows of pdf_window_pages pages and yield the element dictionaries in page order
+    # with pdf_page_strategy the windows are runs of pages of the same strategy and the number of pages
+    # of each strategy is reported in file_reports[report_key]["pages"]
+    # the windows are partitioned in pdf_workers processes and the elements of a window are yielded as soon as
+    # it and the windows before it are done, at most 2 windows per worker are held in memory
+    def iter_pdf_window_elements(self, file, output_dir, report_key=None):
+        kwargs = self.pdf_partition_kwargs(output_dir)
+        # the number of figure and table images of the previous windows
+        offsets = {"figure": 0, "table": 0}
+        # the pages are read from the open file when a window is extracted, the file is not loaded at once
+        with data_utils.open_binary(file) as stream:
+            reader = pdf_utils.open_pdf(stream)
+            if self.pdf_page_strategy:
+                strategies = pdf_utils.classify_pages(stream)
+                windows = pdf_utils.strategy_windows(strategies, self.pdf_window_pages)
+                pages = {strategy: strategies.count(strategy) for strategy in ["fast", "hi_res"]}
+                self.file_reports.setdefault(report_key, {})["pages"] = pages
+                print(f"Partitioning {report_key}: {pages['fast']} text layer pages, {pages['hi_res']} hi_res pages")
             else:
-                os.remove(file)
-        return processed_pdf_files
+                windows = [(first, last, None) for first, last in pdf_utils.page_windows(len(reader.pages), self.pdf_window_pages)]
+
+            # the progress of the file is reported to the metrics callback after each window
+            total_pages = len(reader.pages)
+            if self.pdf_workers <= 1:
+                for first, last, strategy in windows:
+                    window_kwargs = dict(kwargs, strategy=strategy) if strategy else kwargs
+                    with self.metrics.timer("pdf_partition"):
+                        elements, counts = _partition_pdf_window(pdf_utils.extract_pages(reader, first, last), first, window_kwargs)
+                    self.metrics.event("progress", file=report_key, stage="pdf_pages", done=last, total=total_pages)
+                    yield from self.finish_pdf_window(elements, counts, offsets)
+                return
+
+            with ProcessPoolExecutor(max_workers=self.pdf_workers) as executor:
+                running = deque()
+                for first, last, strategy in windows:
+                    window_kwargs = dict(kwargs, strategy=strategy) if strategy else kwargs
+                    running.append((last, executor.submit(_partition_pdf_window, pdf_utils.extract_pages(reader, first, last), first, window_kwargs)))
+                    if len(running) >= 2 * self.pdf_workers:
+                        yield from self.finish_pdf_window_future(running.popleft(), offsets, report_key, total_pages)
+                while running:
+                    yield from self.finish_pdf_window_future(running.popleft(), offsets, report_key, total_pages)
+
+    # Wait for a window partitioned in a worker process and return its elements, see finish_pdf_window
+    # running is the (last page, future) of the window, the time waited is the partition time left after the rendering
+    def finish_pdf_window_future(self, running, offsets, report_key, total_pages):
+        last, future = running
+        with self.metrics.timer("pdf_partition"):
+            elements, counts = future.result()
+        self.metrics.event("progress", file=report_key, stage="pdf_pages", done=last, total=total_pages)
+        return self.finish_pdf_window(elements, counts, offsets)
+
+    # Renumber the images of a partitioned window to follow the numbering of the whole document and return its elements
+    def finish_pdf_window(self, elements, counts, offsets):
+        pdf_utils.renumber_window_images(elements, offsets)
+        for basename, count in counts.items():
+            offsets[basename] += count
+        return elements
 
     def process_csv_files(self, files):
-        # Implement processing logic for csv files
-        pass
+        return self.process_files(files, "csv")
+
+    # Convert a csv file to a markdown file in the processed directory, return the paths of the markdown file and its chunks (see save_markdown)
+    # the rows are read one at a time and written in tables of at most table_rows rows, the file is not loaded at once
+    # file is a path or a binary file object, name is the file name used for the outputs, by default the name of the path
+    def convert_csv_file(self, file, name=None):
+        main_file_name = name if name is not None else os.path.basename(file)
+        new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
+        os.makedirs(os.path.dirname(new_file_path), exist_ok=True)
+        elements = table_utils.table_elements(table_utils.iter_csv_rows(file), self.table_rows)
+        return self.save_markdown(elements, new_file_path)
 
     def process_json_files(self, files):
-        # Implement processing logic for json files
-        pass
+        return self.process_files(files, "json")
+
+    # Convert a json or json lines file to a markdown file in the processed directory, return the paths of the markdown file and its chunks (see save_markdown)
+    # the json lines files are read line by line and the json files with an incremental parser which yields
+    # the items of a top level array one at a time, the markdown is written while the file is read
+    # file is a path or a binary file object, name is the file name used for the outputs, by default the name of the path
+    def convert_json_file(self, file, name=None):
+        main_file_name = name if name is not None else os.path.basename(file)
+        new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
+        os.makedirs(os.path.dirname(new_file_path), exist_ok=True)
+        with data_utils.open_text(file) as f:
+            if file_types.name_extension(main_file_name) in ("jsonl", "ndjson"):
+                records = json_stream.iter_jsonl_records(f)
+            else:
+                records = json_stream.iter_json_records(f)
+            return self.save_markdown(json_stream.json_elements(records, self.json_depth, self.table_rows), new_file_path)
 
     def process_xlsx_files(self, files):
-        # Implement processing logic for xlsx files
-        pass
+        return self.process_files(files, "xlsx")
+
+    # Convert a xlsx workbook to a markdown file in the processed directory, return the paths of the markdown file and its chunks (see save_markdown)
+    # each sheet is a heading followed by its rows in tables of at most table_rows rows,
+    # the workbook is read in read only mode so the rows are not loaded at once
+    # file is a path or a binary file object, name is the file name used for the outputs, by default the name of the path
+    def convert_xlsx_file(self, file, name=None):
+        main_file_name = name if name is not None else os.path.basename(file)
+        new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
+        os.makedirs(os.path.dirname(new_file_path), exist_ok=True)
+        return self.save_markdown(table_utils.workbook_elements(file, self.table_rows), new_file_path)
 
     def process_docx_files(self, files):
-        namespace = {
-            'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
-            'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships',
-            'o': 'urn:schemas-microsoft-com:office:office',
-            'v': 'urn:schemas-microsoft-com:vml',
-            'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
-        }
+        return self.process_files(files, "docx")
 
-        processed_docx_files = []
-        while files:
-            file = files.pop(0)
-            # Read docx file and separate content
+    # Convert a docx file to a markdown file in the processed directory
+    # return the paths of the markdown file and its chunks (see save_markdown), of the directory of the embedded objects
+    # and of the embedded objects shared with an earlier document
+    # file is a path or a binary file object, name is the file name used for the outputs, by default the name of the path
+    def convert_docx_file(self, file, name=None):
+        return self.write_docx_document(self.extract_docx_document(file, name=name))
+
+    # Read a docx file into a document to be written by write_docx_document, nothing is written to disk
+    # the document holds the path of the markdown file, the elements, the directory of the embedded objects
+    # and the (path, blob) of the embedded objects referenced by the elements, by content hash
+    def extract_docx_document(self, file, name=None):
+        # Read docx file and separate content
+        with self.metrics.timer("docx_read"):
             doc = Document(file)
-            elements = []
-            para_start_index = 0
-            objects_dict = {}
-            obtype_dict = {}
-            embedding_objects_types = []  
-            main_file_path, main_file_name = os.path.split(file)
-           
-
-            '''
-            todo: currently, the images and emeding objects are saved in the processed directory
-            need to save them in the original directory after processing them into markdown
-            # embed_dir = os.path.join(self.subdir_dict["docx"],main_file_name.replace(".","_")+"_embed")
-            '''
-            embed_dir = os.path.join(self.processed_dir,main_file_name.replace(".","_")+"_embed")
-
-            # delete embeding folder if exists
-            if os.path.exists(embed_dir):
-                shutil.rmtree(embed_dir)
-            os.makedirs(embed_dir, exist_ok=True)
-            # save all the embedded objects in the document
-            for rel in doc.part.rels.values():
-                path, file_name = os.path.split(rel.target_ref)
-                path = os.path.split(path)[-1]
-                path = os.path.join(embed_dir, path)
+        elements = []
+        style_cache = {}
+        objects_dict = {}
+        blobs = {}
+        embedding_objects_types = []  
+        main_file_name = name if name is not None else os.path.basename(file)
+       
+
+        '''
+        todo: currently, the images and emeding objects are saved in the processed directory
+        need to save them in the original directory after processing them into markdown
+        # embed_dir = os.path.join(self.subdir_dict["docx"],main_file_name.replace(".","_")+"_embed")
+        '''
+        embed_dir = os.path.join(self.processed_dir,main_file_name.replace(".","_")+"_embed")
+        rels = doc.part.rels
+
+        # Iterate through document elements
+        with self.metrics.timer("docx_scan"):
+            for element, block in docx_utils.iter_block_items(doc):
+                if isinstance(block, Paragraph):
+                    para = block
+                    para_text = para.text
+                    para_style = docx_utils.get_paragraph_style(para, style_cache)
+
+                    # Check if the paragraph contains an image or text
+                    if para_text != "":
+                        # Append the paragraph to the elements list
+                        elements.append({"type": para_style, "content": para_text})
                 
-                os.makedirs(path, exist_ok=True)
-
-                with open(os.path.join(path,file_name), "wb") as f:
-                    f.write(rel.target_part.blob)
-
-                objects_dict[rel._rId] = os.path.join(path,file_name)
-                obtype_dict[rel._rId] = rel._reltype.split("/")[-1] 
-
-            # Iterate through document elements
-            for element in doc.element.body:
-                if element.tag.endswith('p'):
-                    for index, para in enumerate(doc.paragraphs[para_start_index:]):
-                        if para._element == element:
-                            para_start_index += index + 1 # Update the start index for the next iteration
-                            para_text = para.text
-                            if para.style is None:
-                                para_style = ""
-                            else:
-                                para_style = para.style.name.lower()
-
-                            # Check if the paragraph contains an image or text
-                            if para_text != "":
-                                # Append the paragraph to the elements list
-                                elements.append({"type": para_style, "content": para_text})
-                            
-                            else:
-                                xmlstr = str(element.xml)
-                                root = ET.fromstring(xmlstr)
-                                
-                                 # Retrieve r:embed for images
-                                blip = root.find('.//a:blip', namespaces=namespace)
-                                if blip is not None:
-                                    r_id = blip.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed')
-                                    elements.append({"type": obtype_dict[r_id], "content": objects_dict[r_id]})
-                                    # add obtype_dict[r_id] to embedding_objects_types list if not available
-                                    if obtype_dict[r_id] not in embedding_objects_types:
-                                        embedding_objects_types.append(obtype_dict[r_id])
-                                
-                                # Retrieve r:id for OLEObjects
-                                ole_object = root.find('.//o:OLEObject', namespaces=namespace)
-                                if ole_object is not None:
-                                    r_id = ole_object.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-                                    elements.append({"type": obtype_dict[r_id], "content": objects_dict[r_id]})
-                                    # add obtype_dict[r_id] to embedding_objects_types list if not available
-                                    if obtype_dict[r_id] not in embedding_objects_types:
-                                        embedding_objects_types.append(obtype_dict[r_id])
-                                
-                                # Retrieve r:id for v:imagedata
-                                imagedata = root.find('.//v:imagedata', namespaces=namespace)
-                                if imagedata is not None:
-                                    r_id = imagedata.get('{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id')
-                                    elements.append({"type": obtype_dict[r_id], "content": objects_dict[r_id]})
-                                    # add obtype_dict[r_id] to embedding_objects_types list if not available
-                                    if obtype_dict[r_id] not in embedding_objects_types:
-                                        embedding_objects_types.append(obtype_dict[r_id])
-
-
-                elif element.tag.endswith('tbl'):
-                    # Find the table in doc.tables
-                    for table in doc.tables:
-                        if table._element == element:
-                            table_data = []
-                            for row in table.rows:
-                                row_data = [cell.text for cell in row.cells]
-                                table_data.append(row_data)
-                            elements.append({"type": "table", "content": table_data})
-                            break
+                    else:
+                        # Retrieve the relationship ids of the images and the embedded objects
+                        for r_id in docx_utils.find_embedded_rids(element):
+                            rel = rels.get(r_id)
+                            if rel is None or rel.is_external:
+                                continue
+                            if r_id not in objects_dict:
+                                objects_dict[r_id] = embedded_part_path(rel, embed_dir, blobs)
+                            obtype = rel.reltype.split("/")[-1]
+                            elements.append({"type": obtype, "content": objects_dict[r_id]})
+                            # add obtype to embedding_objects_types list if not available
+                            if obtype not in embedding_objects_types:
+                                embedding_objects_types.append(obtype)
+
+                elif isinstance(block, Table):
+                    # the tables nested in the cells of the table follow it as tables of their own
+                    for table_data in docx_utils.iter_tables(element):
+                        elements.append({"type": "table", "content": table_data})
                 elif element.tag.endswith('sectPr'):
                     # Handle section properties if needed
                     pass
+        self.metrics.count("embedded_objects", len(blobs))
 
-            #save the content of elements to a markdown file        
-            # Construct the new file path in the processed directory
-            new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
-            
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(new_file_path), exist_ok=True)
+        # Construct the new file path in the processed directory
+        new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
+        return {
+            "markdown_path": new_file_path,
+            "embed_dir": embed_dir,
+            "elements": elements,
+            "embedding_objects_types": embedding_objects_types,
+            "blobs": blobs,
+        }
 
-            try:
-                # Save the elements to the markdown file
-                save_elements_to_file(elements, new_file_path, embedding_objects_types=embedding_objects_types)
-                processed_docx_files.append(file)
-                shutil.move(file, self.subdir_dict["docx"])
+    # Write a document read by extract_docx_document: save its embedded objects and its markdown file
+    # the first copy of a blob is saved in the embedding directory of its document, the next documents with the same
+    # blob link to a copy in the shared folder, see SHARED_BLOBS_DIR, saved once per file manager
+    # return the paths of the markdown file and its chunks (see save_markdown), of the directory of the embedded objects
+    # and of the embedded objects shared with an earlier document
+    def write_docx_document(self, document):
+        embed_dir = document["embed_dir"]
+        embedding_objects_types = document["embedding_objects_types"]
+        # delete embeding folder if exists
+        if os.path.exists(embed_dir):
+            shutil.rmtree(embed_dir)
 
+        # the path each embedded object is saved at, by the path planned by extract_docx_document
+        saved_paths = {}
+        with self.metrics.timer("blob_write"):
+            for digest, (path, blob) in document["blobs"].items():
+                saved_path = self.blob_paths.get(digest)
+                if saved_path is None or saved_path == path:
+                    saved_path = path
+                else:
+                    saved_path = os.path.join(self.processed_dir, SHARED_BLOBS_DIR, digest + os.path.splitext(path)[1])
+                if saved_path == path or not os.path.exists(saved_path):
+                    save_blob(blob, saved_path)
+                    self.metrics.count("blob_bytes", len(blob))
+                self.blob_paths[digest] = saved_paths[path] = saved_path
+        elements = [dict(element, content=saved_paths[element["content"]]) if element["type"] in embedding_objects_types else element
+                    for element in document["elements"]]
 
-            except Exception as e:
-                print(f"Error saving file: {new_file_path}")
-                print(f"Exception: {e}")
-                continue
+        #save the content of elements to a markdown file        
+        new_file_path = document["markdown_path"]
         
-        return processed_docx_files
-    
-                    
+        # Ensure the directory exists
+        os.makedirs(os.path.dirname(new_file_path), exist_ok=True)
+
+        # Save the elements to the markdown file
+        outputs = self.save_markdown(elements, new_file_path, embedding_objects_types=embedding_objects_types)
+        # the objects shared with an earlier document are outputs of this document as well
+        shared_objects = [path for path in saved_paths.values() if not path.startswith(embed_dir + os.sep)]
+        return outputs + [embed_dir] + shared_objects
+
+    # Save the elements of a document to a markdown file, and their chunks to a JSON lines file next to it
+    # if chunk_chars is set, see chunking.Chunker, the chunks are made as the markdown is written
+    # return the paths of the markdown file and of the chunks file
+    # the time of the rendering includes the reading of the elements which are read as they are rendered,
+    # e.g. the rows of the csv files or the windows of the pdf files
+    def save_markdown(self, elements, new_file_path, embedding_objects_types=["image"]):
+        elements = self.metrics.counted(elements)
+        with self.metrics.timer("render"):
+            if not self.chunk_chars:
+                written = markdown_writer.write_markdown(elements, new_file_path, embedding_objects_types=embedding_objects_types)
+                self.metrics.count("markdown_chars", written)
+                return [new_file_path]
+            chunks_path = chunks_file_path(new_file_path)
+            metadata = {"source": os.path.relpath(new_file_path, self.processed_dir)}
+            with chunking.chunk_writer(chunks_path, self.chunk_chars, self.chunk_overlap, metadata) as chunker:
+                written = markdown_writer.write_markdown(elements, new_file_path, embedding_objects_types=embedding_objects_types, on_element=chunker.add)
+            self.metrics.count("markdown_chars", written)
+            self.metrics.count("chunks", chunker.chunk_index)
+        return [new_file_path, chunks_path]
+
     def process_png_files(self, files):
-        # Implement processing logic for png files
-        pass
+        return self.process_files(files, "png")
 
     def process_jpg_files(self, files):
-        # Implement processing logic for jpg files
-        pass
+        return self.process_files(files, "jpg")
+
+    # Convert an image file to a markdown file in the processed directory which links a copy of the image
+    # the text of the image is written below the link by annotate_image_texts
+    # return the paths of the markdown file and its chunks (see save_markdown) and of the directory of the image
+    # file is a path or a binary file object, name is the file name used for the outputs, by default the name of the path
+    def convert_image_file(self, file, name=None):
+        main_file_name = name if name is not None else os.path.basename(file)
+        output_dir = os.path.join(self.processed_dir, main_file_name.replace(".","_")+"_images")
+        image_path = os.path.join(output_dir, os.path.basename(main_file_name))
+        os.makedirs(output_dir, exist_ok=True)
+        if isinstance(file, str):
+            shutil.copyfile(file, image_path)
+        else:
+            with open(image_path, "wb") as f:
+                shutil.copyfileobj(file, f)
+
+        new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
+        return self.save_markdown([{"type": "Image", "content": image_path}], new_file_path, embedding_objects_types=["image"]) + [output_dir]
+
+    # Annotate the image links of the markdown files written by the run with the text of the images
+    # the docx embedded images, the pdf image blocks and the image files of all the documents are read in one batch,
+    # see image_utils.read_image_texts, the links of the other embedded objects are left as they are
+    def annotate_image_texts(self):
+        links = {}
+        for outputs in self.source_outputs.values():
+            for output in outputs:
+                if output.endswith(".md") and os.path.isfile(output):
+                    links[output] = [path for path in markdown_writer.linked_paths(output)
+                                     if image_utils.is_image(path) and os.path.isfile(path)]
+        images = [path for paths in links.values() for path in paths]
+        if not images:
+            return
+        self.load_backends(["ocr"])
+        try:
+            with self.metrics.timer("ocr"):
+                texts, read, cached = image_utils.read_image_texts(images, self.image_text_cache, workers=self.ocr_workers, lang=self.ocr_lang)
+            self.metrics.count("images_ocr", read)
+        except image_utils.TesseractMissingError as e:
+            print("Error reading the text of the images")
+            print(f"Exception: {e}")
+            return
+        for path, paths in links.items():
+            if any(texts.get(image) for image in paths):
+                insertions = markdown_writer.annotate_images(path, texts)
+                # the chunks of the markdown file hold the annotations as well
+                if insertions and os.path.exists(chunks_file_path(path)):
+                    chunking.insert_chunk_texts(chunks_file_path(path), insertions)
+        # the texts of the duplicates of an image read by the OCR are counted with it
+        count = len(set(images))
+        print(f"Read the text of {count} images: {len(texts) - cached} by OCR, {cached} from the cache, {count - len(texts)} failed")
 
     def process_txt_files(self, files):
-        # Implement processing logic for txt files
-        pass
+        return self.process_files(files, "txt")
+
+    # Convert a txt file to a markdown file in the processed directory, return the paths of the markdown file and its chunks (see save_markdown)
+    # the file is memory mapped and decoded in blocks, the encoding is detected from its first bytes, and its paragraphs
+    # are written as they are found, the file is never loaded or decoded at once, see text_stream.iter_paragraphs
+    # file is a path or a binary file object, name is the file name used for the outputs, by default the name of the path
+    def convert_txt_file(self, file, name=None):
+        main_file_name = name if name is not None else os.path.basename(file)
+        new_file_path = os.path.join(self.processed_dir, os.path.splitext(main_file_name)[0] + ".md")
+        os.makedirs(os.path.dirname(new_file_path), exist_ok=True)
+        paragraphs = text_stream.iter_paragraphs(text_stream.iter_text_blocks(file))
+        return self.save_markdown(text_stream.text_elements(paragraphs, self.txt_section_chars), new_file_path)
 
     def process_other_files(self, files):
         # Implement processing logic for other files
         pass
 
+# The file manager of a worker process, created once per process by _init_worker
+_worker_file_manager = None
+
+# backend_names are the converter backends imported before the first file
+def _init_worker(file_manager, backend_names=()):
+    global _worker_file_manager
+    _worker_file_manager = file_manager
+    file_manager.load_backends(backend_names)
+
+# Convert a single file in a worker process
+# return the outputs of the converter, the report of the file and the metrics recorded since the last file
+def _convert_in_worker(extension, file):
+    outputs = _worker_file_manager.run_converter(_worker_file_manager.get_converter(extension), file)
+    return outputs, _worker_file_manager.file_reports.pop(file, None), _worker_file_manager.metrics.drain()
+
+# Run the conversion stage of the asyncio pipeline for a single file in a worker process
+# return the result of the stage and the metrics recorded since the last file
+def _extract_in_worker(extension, file):
+    return _worker_file_manager.extract_file(extension, file), _worker_file_manager.metrics.drain()
+
+# Partition the pages of a pdf window, first is the page number of its first page
+# return the element dictionaries and the number of figure and table images of the window
+def _partition_pdf_window(pdf_bytes, first, kwargs):
+    rpe = backends.get("pdf").partition_pdf(file=io.BytesIO(pdf_bytes), starting_page_number=first, **kwargs)
+    return [pdf_element_dict(el) for el in rpe], pdf_utils.count_image_blocks(rpe)
+
+# Return the path a docx part is saved at in the embedding directory of its document
+# the blob of the part is added to blobs by content hash, a blob already in blobs keeps its first path
+def embedded_part_path(rel, embed_dir, blobs):
+    blob = rel.target_part.blob
+    digest = hashlib.sha256(blob).hexdigest()
+    if digest not in blobs:
+        path, file_name = os.path.split(rel.target_ref)
+        path = os.path.split(path)[-1]
+        blobs[digest] = (os.path.join(embed_dir, path, file_name), blob)
+    return blobs[digest][0]
+
+# Save a blob to path, through a temporary file, the shared blobs may be saved by several worker processes at once
+def save_blob(blob, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = markdown_writer.temp_file_path(path)
+    with open(temp_path, "wb") as f:
+        f.write(blob)
+    os.replace(temp_path, path)
+
+# Return the element dictionary of an element returned by partition_pdf
+# the images are of type "Image" with the path of the image as content, the other elements are of type "text"
+def pdf_element_dict(el):
+    element = {"category": el.category, "page": el.metadata.page_number, "image_path": el.metadata.image_path}
+    # the fast strategy finds images without saving them, they are written as text
+    if (el.category == 'Image' or el.category == 'Figure' or el.category == 'Picture') and el.metadata.image_path:
+        element.update({"type": "Image", "content": el.metadata.image_path})
+    else:
+        element.update({"type": "text", "content": el.text})
+    return element
+
+# Return the path of the JSON lines file of the chunks of a markdown file
+def chunks_file_path(markdown_path):
+    return os.path.splitext(markdown_path)[0] + ".chunks.jsonl"
+
+# Save the elements of a document to a markdown file, see markdown_writer for the rendering of the element types
 def save_elements_to_file(elements, new_file_path, embedding_objects_types = ["image"]):
-    with open(new_file_path, 'w') as f:
-        for element in elements:
-            element_type = element["type"].lower()
-            if ("list" in element_type) or ("bullet" in element_type):
-                bullet = '-' if 'bullet' in element_type else '1.'
-                f.write(f"{bullet} {element['content']}\n")
-            elif element_type == "title":
-                f.write("# " + element["content"] + "\n")
-            elif element_type.startswith("heading"):
-                heading_level = element_type.replace("heading", "")
-                f.write("#" * int(heading_level) + " " + element["content"] + "\n")
-            elif element_type == "table":
-                table_content = element["content"]
-                # Write table header
-                header = table_content[0]
-                f.write("| " + " | ".join(header) + " |\n")
-                f.write("|" + " --- |" * len(header) + "\n")
-                # Write table rows
-                for row in table_content[1:]:
-                    f.write("| " + " | ".join(row) + " |\n")
-            elif element_type in embedding_objects_types:
-                # check if the images folder exists and create it if it does not
-                f.write(f"![{element['type']}]({element['content']})\n")
-            else:
-                # Uncomment if you want to have the custom type/style in the markdown file
-                # f.write(f"<!-- Start Custom Type/style: {element["type"]} -->\n")
-                f.write(element["content"] + "\n")
-                # f.write(f"<!-- End Custom Type/style: {element["type"]} -->\n")
+    markdown_writer.write_markdown(elements, new_file_path, embedding_objects_types=embedding_objects_types)
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+from collections import deque
+
+# The status of a file of the registry
+PENDING = "pending"
+PROCESSED = "processed"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# A file of the registry: its path, the extension it is processed as,
+# the top level raw file it was extracted from (None for a raw file) and its status
+class FileRecord:
+    __slots__ = ("path", "extension", "origin", "status")
+
+    def __init__(self, path, extension, origin=None, status=PENDING):
+        self.path = path
+        self.extension = extension
+        self.origin = origin
+        self.status = status
+
+# The files of a run, indexed by path, with a queue of the files to be processed for each extension
+# the lookups are dictionary lookups and the queues are deques, so the bookkeeping stays linear in the number of files
+class FileRegistry:
+    def __init__(self):
+        self.records = {}
+        # the paths of the files to be processed, by extension
+        self.queues = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, path):
+        return path in self.records
+
+    # Add a file to the registry and, if queue is True, to the queue of its extension
+    # a file already in the registry is not added again
+    def add(self, path, extension, origin=None, queue=True):
+        record = self.records.get(path)
+        if record is not None:
+            return record
+        record = self.records[path] = FileRecord(path, extension, origin)
+        if queue:
+            if extension in self.queues:
+                self.queues[extension].append(path)
+            else:
+                self.queues[extension] = deque([path])
+        return record
+
+    # Add the files of another registry, e.g. the files extracted from an archive, without rebuilding the queues
+    def merge(self, registry, queue=True):
+        for record in registry.records.values():
+            self.add(record.path, record.extension, record.origin, queue=queue)
+
+    # Remove and return the queue of the files of an extension, an empty queue if there is none
+    def pop_queue(self, extension):
+        return self.queues.pop(extension, deque())
+
+    # Return True if a file is a raw file, not extracted from an archive
+    def is_original(self, path):
+        record = self.records.get(path)
+        return record is not None and record.origin is None
+
+    # Return the top level raw file a file comes from, the file itself if it is not extracted from an archive
+    def origin(self, path):
+        record = self.records.get(path)
+        if record is None or record.origin is None:
+            return path
+        return record.origin
+
+    def set_status(self, path, status):
+        record = self.records.get(path)
+        if record is not None:
+            record.status = status
+
+    # Return the paths of the files with a status
+    def files_with_status(self, status):
+        return [record.path for record in self.records.values() if record.status == status]
+
+    # Return the number of files of each status
+    def status_counts(self):
+        counts = {}
+        for record in self.records.values():
+            counts[record.status] = counts.get(record.status, 0) + 1
+        return counts
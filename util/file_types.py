@@ -0,0 +1,174 @@
+import os
+import struct
+import zipfile
+
+# the number of bytes read from the start of a file to detect its type
+HEAD_SIZE = 4096
+
+# the signatures of the file types, by first byte so a file is only compared with the signatures it can match
+SIGNATURES = [
+    (b"%PDF-", "pdf"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"PK\x03\x04", "zip"),
+    # an empty zip file
+    (b"PK\x05\x06", "zip"),
+]
+SIGNATURE_INDEX = {}
+for magic, file_type in SIGNATURES:
+    SIGNATURE_INDEX.setdefault(magic[0], []).append((magic, file_type))
+
+# the office documents are zip containers with a [Content_Types].xml member and their parts in a directory
+OOXML_DIRS = [("word/", "docx"), ("xl/", "xlsx"), ("ppt/", "pptx")]
+
+# the local header of a zip member: signature, version, flags, method, time, date, crc, compressed size,
+# size, name length and extra length, the name and the extra field follow it
+LOCAL_HEADER = struct.Struct("<4sHHHHHIIIHH")
+
+# the flag of a member whose sizes are written after its data, in a data descriptor
+DATA_DESCRIPTOR_FLAG = 0x08
+
+# the types which are only detected from their signature, a file with one of these extensions
+# and without the signature is mislabeled and detected as "other"
+SIGNATURE_TYPES = {"pdf", "png", "jpg", "zip", "docx", "xlsx", "pptx"}
+
+# the types of the text files, the extension of a text file with one of them is trusted
+TEXT_TYPES = {"csv", "json", "jsonl", "ndjson", "txt", "md"}
+
+# the extensions of the text files, they are trusted before the content is read: an rtf file starts with "{"
+# like a json file and an html, xml or yaml file is text like a txt file
+TEXT_EXTENSIONS = TEXT_TYPES | {"rtf", "html", "htm", "xml", "yaml", "yml", "tsv", "log", "ini", "cfg", "tex"}
+
+# the other names of the extensions
+EXTENSION_ALIASES = {"jpeg": "jpg"}
+
+# the control characters found in text files
+TEXT_CONTROL_BYTES = set(b"\t\n\r\f\b")
+
+# Return the lower case extension of a file name, "" if it has none
+def name_extension(name):
+    extension = os.path.splitext(name)[1][1:].lower()
+    return EXTENSION_ALIASES.get(extension, extension)
+
+# Detect the type of a file from the first bytes of its content, head, and the extension of its name
+# container is the path or the binary file object of the file, it is only read again for a zip file
+# whose first bytes do not show if it is an office document
+# the extension of a text file is trusted, the other files are detected from their signature,
+# only the text files without an extension are detected from their content, "other" if the file has no extension
+def detect_type(head, extension, container=None):
+    if extension in TEXT_EXTENSIONS:
+        return extension
+    for magic, file_type in SIGNATURE_INDEX.get(head[0], ()) if head else ():
+        if head.startswith(magic):
+            return zip_type(head, container) if file_type == "zip" else file_type
+    # the header of a pdf file can follow a few bytes of garbage
+    if extension == "pdf" and b"%PDF-" in head[:1024]:
+        return "pdf"
+    if extension in SIGNATURE_TYPES:
+        return "other"
+    if extension or not is_text(head):
+        return extension or "other"
+    return text_type(head)
+
+# Return the type of a zip container: docx, xlsx, pptx or zip
+# the type is decided from the names of the members of the container, not of the members of nested archives:
+# the names of the first members are read from their local headers at the start of the file,
+# the central directory is only read if they do not show the type
+def zip_type(head, container=None):
+    names, complete = local_names(head)
+    file_type = ooxml_type(names)
+    if file_type is not None or complete:
+        return file_type or "zip"
+    if container is None:
+        return "zip"
+    position = None if isinstance(container, (str, os.PathLike)) else container.tell()
+    try:
+        with zipfile.ZipFile(container) as zip_file:
+            names = zip_file.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return "zip"
+    finally:
+        if position is not None:
+            container.seek(position)
+    return ooxml_type(names) or "zip"
+
+# Return the names of the first members of a zip file from their local headers in head, skipping the data of each member,
+# and True if all the members are read, i.e. the central directory follows them
+# the walk stops at the end of head and at a member whose size is only known from its data descriptor
+def local_names(head):
+    names = []
+    offset = 0
+    while offset + LOCAL_HEADER.size <= len(head):
+        if head[offset:offset + 4] != b"PK\x03\x04":
+            return names, head[offset:offset + 4] in (b"PK\x01\x02", b"PK\x05\x06")
+        _, _, flags, _, _, _, _, compressed_size, _, name_length, extra_length = LOCAL_HEADER.unpack_from(head, offset)
+        start = offset + LOCAL_HEADER.size
+        if start + name_length > len(head):
+            break
+        names.append(head[start:start + name_length].decode("utf-8", errors="replace"))
+        if flags & DATA_DESCRIPTOR_FLAG:
+            break
+        offset = start + name_length + extra_length + compressed_size
+    return names, False
+
+# Return the type of the office document with the member names, None if they are not those of an office document
+def ooxml_type(names):
+    if "[Content_Types].xml" in names:
+        for directory, file_type in OOXML_DIRS:
+            if any(name.startswith(directory) for name in names):
+                return file_type
+    return None
+
+# Return True if the first bytes of a file look like text: no null byte and few control characters
+def is_text(head):
+    if b"\x00" in head:
+        return False
+    control = sum(1 for byte in head if byte < 32 and byte not in TEXT_CONTROL_BYTES)
+    return control <= len(head) // 100
+
+# Return the type of a text file from its first bytes: json, csv or txt
+# a csv file has at least 2 lines with the same number of commas, semicolons or tabs
+def text_type(head):
+    text = head.decode("utf-8", errors="replace").lstrip("\ufeff \t\r\n")
+    if text[:1] in ("{", "["):
+        return "json"
+    lines = text.splitlines()
+    if len(head) == HEAD_SIZE:
+        # the last line is cut by the read
+        lines = lines[:-1]
+    lines = [line for line in lines[:20] if line.strip()]
+    if len(lines) >= 2:
+        for delimiter in (",", ";", "\t"):
+            count = lines[0].count(delimiter)
+            if count and all(line.count(delimiter) == count for line in lines):
+                return "csv"
+    return "txt"
+
+# Detect the type of a binary file object from its first bytes, its position is restored
+def detect_stream(stream, name):
+    position = stream.tell()
+    head = stream.read(HEAD_SIZE)
+    stream.seek(position)
+    return detect_type(head, name_extension(name), container=stream)
+
+# Detect the types of files from their first bytes, with a single small read per file
+# the types are cached by device, inode, size and mtime, a file moved or detected again is not read again
+class FileTypeDetector:
+    def __init__(self):
+        self.cache = {}
+
+    def detect(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return name_extension(path) or "other"
+        key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        file_type = self.cache.get(key)
+        if file_type is None:
+            try:
+                with open(path, "rb") as f:
+                    head = f.read(HEAD_SIZE)
+            except OSError:
+                return name_extension(path) or "other"
+            file_type = self.cache[key] = detect_type(head, name_extension(path), container=path)
+        return file_type
@@ -0,0 +1,128 @@
+import os
+import json
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from . import backends
+from . import data_utils
+from . import file_types
+
+# the extensions of the images whose text is read, the vector images (emf, wmf) and the other embedded objects are skipped
+IMAGE_EXTENSIONS = {"png", "jpg", "gif", "bmp", "tif", "tiff", "webp"}
+
+# the number of images sent to a worker process at once
+BATCH_SIZE = 16
+
+# Raised when tesseract is not installed, TesseractNotFoundError can not be sent back by a worker process
+class TesseractMissingError(RuntimeError):
+    pass
+
+# Return True if the text of an image file can be read
+def is_image(path):
+    return file_types.name_extension(path) in IMAGE_EXTENSIONS
+
+# Return the text of an image read by tesseract, "" if the image has no text
+def ocr_image(path, lang="eng"):
+    with Image.open(path) as image:
+        return backends.get("ocr").image_to_string(image, lang=lang).strip()
+
+# Read the text of a batch of images, in a worker process
+# return a (text, error) pair per image, the error of an image which can not be read is returned as a string
+# so the other images of the batch are still read, a missing tesseract is raised as it fails all the images
+def ocr_batch(paths, ocr=ocr_image, lang="eng"):
+    results = []
+    pytesseract = backends.get("ocr")
+    for path in paths:
+        try:
+            results.append((ocr(path, lang), None))
+        except pytesseract.TesseractNotFoundError as e:
+            raise TesseractMissingError(str(e))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+# A persistent cache of the text of the images by content hash, saved as a JSON lines file
+# the text of an image found in several documents or in several runs, e.g. a logo, is read once
+class ImageTextCache:
+    def __init__(self, path):
+        self.path = path
+        self.texts = {}
+        self.load()
+
+    # Load the texts from the cache file, a line cut by an interrupted run is skipped
+    def load(self):
+        self.texts = {}
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self.texts[entry["hash"]] = entry["text"]
+
+    # Return the text of an image by content hash, None if it is not cached
+    def get(self, digest):
+        return self.texts.get(digest)
+
+    # Add the texts of images by content hash and append them to the cache file
+    def update(self, texts):
+        if not texts:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for digest, text in texts.items():
+                f.write(json.dumps({"hash": digest, "text": text}) + "\n")
+        self.texts.update(texts)
+
+    def __len__(self):
+        return len(self.texts)
+
+# Read the text of images, return a dictionary of the texts by path, the number of images read by the OCR
+# and the number of paths whose text was found in the cache, the images the OCR failed to read are not counted
+# the images are hashed first, the cached and the duplicate images are not read again,
+# the others are read in batches of batch_size images in a pool of workers processes (in this process if workers is 1)
+# and their texts are added to the cache, the images which can not be read are reported and left out
+def read_image_texts(paths, cache, workers=1, batch_size=BATCH_SIZE, lang="eng", ocr=ocr_image):
+    digests = {}
+    # the first path of each image which is not cached, by content hash
+    missing = {}
+    for path in dict.fromkeys(paths):
+        try:
+            digest = digests[path] = data_utils.file_hash(path)
+        except OSError as e:
+            print(f"Error reading image: {path}")
+            print(f"Exception: {e}")
+            continue
+        if cache.get(digest) is None and digest not in missing:
+            missing[digest] = path
+    cached = len(digests) - sum(1 for digest in digests.values() if digest in missing)
+
+    missing = list(missing.items())
+    batches = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+    read = 0
+    if batches:
+        path_batches = [[path for digest, path in batch] for batch in batches]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(ocr_batch, path_batches, itertools.repeat(ocr), itertools.repeat(lang)))
+        else:
+            results = [ocr_batch(batch, ocr, lang) for batch in path_batches]
+        texts = {}
+        for batch, batch_results in zip(batches, results):
+            for (digest, path), (text, error) in zip(batch, batch_results):
+                if error is None:
+                    texts[digest] = text
+                else:
+                    print(f"Error reading image: {path}")
+                    print(f"Exception: {error}")
+        cache.update(texts)
+        read = len(texts)
+
+    image_texts = {}
+    for path, digest in digests.items():
+        text = cache.get(digest)
+        if text is not None:
+            image_texts[path] = text
+    return image_texts, read, cached
@@ -0,0 +1,168 @@
+import json
+from .table_utils import cell_text
+
+# the number of characters read at once from a json file
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = " \t\n\r"
+
+# Read json values one at a time from a text stream
+# the values are decoded with json.JSONDecoder.raw_decode from a buffer which only holds the value being decoded,
+# a value cut by the end of the buffer is decoded again once more text has been read,
+# the size of the reads doubles while a value does not fit so a large value is not decoded too many times
+class JsonReader:
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    # Read at least size more characters into the buffer, return False at the end of the stream
+    def read(self, size):
+        if self.eof:
+            return False
+        # drop the text which has been decoded already
+        if self.pos:
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(max(size, self.chunk_size))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer += chunk
+        return True
+
+    # Return the next character which is not whitespace without consuming it, "" at the end of the stream
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read(self.chunk_size):
+                return ""
+
+    # Consume the next character which is not whitespace and return it
+    def next_char(self):
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    # Decode and return the next value
+    def decode(self):
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # a number or a literal at the end of the buffer may be cut, e.g. 12 of 123
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read(size)
+            size *= 2
+
+# Yield the records of a json text stream without loading the whole document
+# the items of a top level array are yielded one at a time, the other top level values are yielded whole,
+# several top level values may follow each other, e.g. in a file of concatenated json documents
+def iter_json_records(f, chunk_size=CHUNK_SIZE):
+    reader = JsonReader(f, chunk_size)
+    while True:
+        char = reader.peek()
+        if char == "":
+            return
+        if char != "[":
+            yield reader.decode()
+            continue
+        reader.next_char()
+        if reader.peek() == "]":
+            reader.next_char()
+            continue
+        while True:
+            yield reader.decode()
+            char = reader.next_char()
+            if char == "]":
+                break
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' in a json array, found {char!r}")
+
+# Yield the records of a json lines text stream, one per line, the empty lines are skipped
+def iter_jsonl_records(f):
+    for line_number, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid json on line {line_number}: {e}")
+
+# Flatten a record into a dictionary of keys joined by dots, e.g. {"a": {"b": 1}} into {"a.b": 1}
+# the objects are flattened down to max_depth levels, the deeper values and the arrays are kept as compact json
+def flatten(record, max_depth=2, prefix="", depth=1, flat=None):
+    if flat is None:
+        flat = {}
+    for key, value in record.items():
+        key = f"{prefix}{key}"
+        if isinstance(value, dict) and value and depth < max_depth:
+            flatten(value, max_depth, key + ".", depth + 1, flat)
+        elif isinstance(value, (dict, list)):
+            flat[key] = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        else:
+            flat[key] = value
+    return flat
+
+# Return the text of a value of a record, the json literals are kept as json
+def value_text(value):
+    if value is None or isinstance(value, bool):
+        return json.dumps(value)
+    return cell_text(value)
+
+# Yield the elements of json records
+# the consecutive objects with the same keys, e.g. the objects of an array or the lines of a log file,
+# are written in tables of at most table_rows rows with a column per key, a single object is written
+# as a table of keys and values and the other records as text
+def json_elements(records, max_depth=2, table_rows=1000):
+    header = None
+    table = []
+    # True once a table of the objects with the keys of header has been yielded
+    header_written = False
+
+    # return the element of the current table
+    def table_element():
+        header_cells = [cell_text(key) for key in header]
+        if len(table) == 1 and not header_written:
+            return {"type": "table", "content": [["key", "value"]] + [list(cells) for cells in zip(header_cells, table[0])]}
+        return {"type": "table", "content": [header_cells] + table}
+
+    for record in records:
+        if isinstance(record, dict) and record:
+            flat = flatten(record, max_depth)
+            keys = list(flat)
+            if keys != header:
+                if table:
+                    yield table_element()
+                    table = []
+                header = keys
+                header_written = False
+            table.append([value_text(value) for value in flat.values()])
+            if len(table) == table_rows:
+                yield table_element()
+                table = []
+                header_written = True
+            continue
+        if table:
+            yield table_element()
+            table = []
+        header = None
+        if isinstance(record, (dict, list)):
+            yield {"type": "text", "content": json.dumps(record, ensure_ascii=False, separators=(",", ":"))}
+        else:
+            yield {"type": "text", "content": value_text(record)}
+    if table:
+        yield table_element()
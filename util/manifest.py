@@ -0,0 +1,143 @@
+import os
+import json
+from collections import Counter
+from . import data_utils
+from .output_store import FileSystemStore
+
+# A persistent record of the converted raw files, saved as a JSON lines file
+# each entry holds the state of a source file (size, mtime, content hash), the converter version
+# and the outputs of the conversion relative to the processed directory
+# the changes are appended to the file while a run is going on and the file is compacted by save()
+# the outputs are deleted from store, by default the files of the processed directory, see output_store
+class Manifest:
+    def __init__(self, path, processed_dir, store=None):
+        self.path = path
+        self.processed_dir = processed_dir
+        self.store = store if store is not None else FileSystemStore(processed_dir)
+        self.entries = {}
+        # the number of outputs of all the entries under each path, to find the outputs shared by several entries
+        self.references = Counter()
+        # the number of entries with each output, to find the files inside a folder of another entry
+        self.owners = Counter()
+        self.load()
+
+    # Load the entries from the manifest file, the last line of a source wins
+    def load(self):
+        self.clear()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # a line cut by an interrupted run
+                    continue
+                if entry.get("deleted"):
+                    self.entries.pop(entry["source"], None)
+                else:
+                    self.entries[entry["source"]] = entry
+        for entry in self.entries.values():
+            self.count_references(entry, 1)
+
+    # Remove all the entries
+    def clear(self):
+        self.entries = {}
+        self.references = Counter()
+        self.owners = Counter()
+
+    # Add delta to the references of the outputs of an entry and of the directories containing them
+    def count_references(self, entry, delta):
+        for output in entry["outputs"]:
+            self.owners[output] += delta
+            for path in output_prefixes(output):
+                self.references[path] += delta
+
+    # Rewrite the manifest file with only the current entries
+    def save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry) + "\n")
+        os.replace(temp_path, self.path)
+
+    # Append an entry to the manifest file
+    def append(self, entry):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def sources(self):
+        return set(self.entries)
+
+    # Return the state of a file: size, mtime and content hash
+    def file_state(self, path):
+        stat = os.stat(path)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": data_utils.file_hash(path)}
+
+    # Return True if the file at path is the same as the source converted with the given converter version
+    # the size and mtime are checked first, the content is only hashed if the size matches but the mtime does not
+    def is_unchanged(self, source, path, version):
+        entry = self.entries.get(source)
+        if entry is None or entry["version"] != version:
+            return False
+        stat = os.stat(path)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        if data_utils.file_hash(path) != entry["hash"]:
+            return False
+        # same content with a new mtime, e.g. the file was copied again, remember the new mtime
+        entry["mtime_ns"] = stat.st_mtime_ns
+        self.append(entry)
+        return True
+
+    # Record the conversion of a source file
+    def record(self, source, state, version, outputs):
+        entry = {"source": source, "version": version}
+        entry.update(state)
+        entry["outputs"] = sorted(set(os.path.relpath(output, self.processed_dir) for output in outputs))
+        if source in self.entries:
+            self.count_references(self.entries[source], -1)
+        self.count_references(entry, 1)
+        self.entries[source] = entry
+        self.append(entry)
+
+    # Delete the outputs of a source file from the output store
+    # the outputs shared with other sources, e.g. deduplicated embedded objects, are kept
+    def remove_outputs(self, source):
+        entry = self.entries.get(source)
+        if entry is None:
+            return
+        own_references = Counter(path for output in entry["outputs"] for path in output_prefixes(output))
+        own_outputs = Counter(entry["outputs"])
+        # return True if the output is referenced by another entry: the output or a path under it is an output of
+        # another entry, or the output is inside a folder of another entry, e.g. an object linked by an other document
+        def is_shared(output):
+            if self.references[output] > own_references[output]:
+                return True
+            return any(self.owners[path] > own_outputs[path] for path in output_prefixes(output)[:-1])
+
+        for output in entry["outputs"]:
+            if not is_shared(output):
+                self.store.delete(output)
+                continue
+            # a folder shared with other sources keeps their files
+            for file in self.store.list_files(output):
+                if not is_shared(file):
+                    self.store.delete(file)
+
+    # Delete a source file from the manifest and its outputs from the output store
+    def delete(self, source):
+        self.remove_outputs(source)
+        entry = self.entries.pop(source, None)
+        if entry is not None:
+            self.count_references(entry, -1)
+            self.append({"source": source, "deleted": True})
+
+# Return the path and the paths of the directories containing it, e.g. a, a/b and a/b/c for a/b/c
+def output_prefixes(output):
+    parts = os.path.normpath(output).split(os.sep)
+    return [os.sep.join(parts[:idx]) for idx in range(1, len(parts) + 1)]
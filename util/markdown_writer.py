@@ -0,0 +1,129 @@
+import os
+import threading
+
+# the number of characters rendered before they are written to the sink
+BUFFER_CHARS = 64 * 1024
+
+# Return the function rendering the elements of a type to markdown
+# the rules are those of the element types: list and bullet items, title, headings, tables,
+# embedded objects whose type is in embedding_objects_types, and text for the other types
+def compile_renderer(element_type, embedding_objects_types):
+    lower_type = element_type.lower()
+    if ("list" in lower_type) or ("bullet" in lower_type):
+        prefix = "- " if "bullet" in lower_type else "1. "
+        return lambda element: prefix + element["content"] + "\n"
+    if lower_type == "title":
+        return lambda element: "# " + element["content"] + "\n"
+    if lower_type.startswith("heading"):
+        prefix = "#" * int(lower_type.replace("heading", "")) + " "
+        return lambda element: prefix + element["content"] + "\n"
+    if lower_type == "table":
+        return render_table
+    if lower_type in embedding_objects_types:
+        prefix = f"![{element_type}]("
+        return lambda element: prefix + element["content"] + ")\n"
+    return lambda element: element["content"] + "\n"
+
+# Render a table element, the first row is the header of the table
+def render_table(element):
+    table_content = element["content"]
+    header = table_content[0]
+    text = "| " + " | ".join(header) + " |\n|" + " --- |" * len(header) + "\n"
+    if len(table_content) > 1:
+        # the rows are joined in one pass, the cells of a row by " | " and the rows by " |\n| "
+        text += "| " + " |\n| ".join(map(" | ".join, table_content[1:])) + " |\n"
+    return text
+
+# Render elements to a file-like sink with a write(str) method
+# the elements can be any iterable, e.g. a generator yielding them as they are converted,
+# they are rendered in a buffer which is written to the sink every buffer_chars characters
+# the renderer of each element type is compiled once per call
+# on_element is called with each element and its markdown, e.g. to chunk the document as it is written
+# return the number of characters written
+def render_markdown(elements, sink, embedding_objects_types=("image",), buffer_chars=BUFFER_CHARS, on_element=None):
+    renderers = {}
+    parts = []
+    buffered = 0
+    written = 0
+    for element in elements:
+        element_type = element["type"]
+        renderer = renderers.get(element_type)
+        if renderer is None:
+            renderer = renderers[element_type] = compile_renderer(element_type, embedding_objects_types)
+        text = renderer(element)
+        if on_element is not None:
+            on_element(element, text)
+        parts.append(text)
+        buffered += len(text)
+        if buffered >= buffer_chars:
+            sink.write("".join(parts))
+            written += buffered
+            parts = []
+            buffered = 0
+    if parts:
+        sink.write("".join(parts))
+        written += buffered
+    return written
+
+# Return the path of the temporary file a file is written to before being renamed to path
+# the temporary file is unique to the process and thread writing it
+def temp_file_path(path):
+    return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+# Render elements to a markdown file in utf-8
+# the file is written to a temporary file next to it and renamed when it is complete,
+# a reader never sees a half written file and a failed conversion leaves no file behind
+def write_markdown(elements, path, embedding_objects_types=("image",), buffer_chars=BUFFER_CHARS, on_element=None):
+    temp_path = temp_file_path(path)
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            written = render_markdown(elements, f, embedding_objects_types, buffer_chars, on_element)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return written
+
+# Return the path of the embedded object linked by a line of markdown, None if the line is not a link, see compile_renderer
+def linked_path(line):
+    line = line.rstrip("\r\n")
+    if not (line.startswith("![") and line.endswith(")")) or "](" not in line:
+        return None
+    return line[line.index("](") + 2:-1]
+
+# Return the paths of the embedded objects linked by a markdown file
+def linked_paths(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return [linked for linked in map(linked_path, f) if linked is not None]
+
+# Render the text of an image as a quote below its link
+def render_image_text(text):
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return "".join("> " + line + "\n" for line in lines)
+
+# Annotate the links of a markdown file with the text of the linked images, texts is a dictionary of the texts by path
+# the text of an image is written as a quote below its link, the file is rewritten atomically as by write_markdown
+# return the (offset, text) of the inserted annotations, offset is the character offset of the insertion in the original file
+def annotate_images(path, texts):
+    temp_path = temp_file_path(path)
+    insertions = []
+    offset = 0
+    try:
+        with open(path, 'r', encoding='utf-8', newline='') as source, open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            for line in source:
+                f.write(line)
+                offset += len(line)
+                text = texts.get(linked_path(line))
+                if text:
+                    annotation = render_image_text(text)
+                    if not line.endswith("\n"):
+                        annotation = "\n" + annotation
+                    f.write(annotation)
+                    insertions.append((offset, annotation))
+        if insertions:
+            os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return insertions
@@ -0,0 +1,235 @@
+import os
+import io
+import time
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import nullcontext, contextmanager
+
+# the context manager returned by the disabled metrics, it does nothing
+NULL_CONTEXT = nullcontext()
+
+# The metrics of a file manager when they are disabled, every method does nothing
+# the converters call the metrics of their file manager without checking if they are enabled,
+# a disabled timer or counter costs a method call
+class NullMetrics:
+    enabled = False
+
+    # Return a context manager timing a stage of the current file
+    def timer(self, stage):
+        return NULL_CONTEXT
+
+    # Return a context manager making file the current file of the timers and counters of this thread
+    def file_scope(self, file):
+        return NULL_CONTEXT
+
+    # Add value to a counter of the current file, or of file if given
+    def count(self, name, value=1, file=None):
+        pass
+
+    # Return the elements, counting the elements, the images and the pages of the current file as they are read
+    def counted(self, elements):
+        return elements
+
+    # Send an event to the callback
+    def event(self, event, **data):
+        pass
+
+    # Return the metrics of a worker process, their records are sent back by drain and added by merge
+    def worker_copy(self):
+        return self
+
+    # Return the records since the last call and reset them
+    def drain(self):
+        return None
+
+    # Add the records returned by drain
+    def merge(self, records):
+        pass
+
+    # Return the report of a run
+    def report(self, statuses=None, seconds=None):
+        return ""
+
+# The timers and counters of the stages of the converted files
+# stages holds the [calls, seconds] of each stage, counters the totals of the counters, e.g. bytes_read, elements, pages,
+# and files the seconds of the stages and the counters of each file
+# callback is called with an event dictionary at the end of each timer ("stage"), when a file is finished ("file")
+# and on the progress of a long conversion ("progress"), e.g. the pages of a pdf file partitioned in windows
+class Metrics(NullMetrics):
+    enabled = True
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.stages = {}
+        self.counters = Counter()
+        self.files = {}
+        # the timers and counters are updated by the conversion and the writer threads of the asyncio pipeline
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    # the lock and the thread local data are not sent to the worker processes
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"], state["local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def current_file(self):
+        return getattr(self.local, "file", None)
+
+    @contextmanager
+    def file_scope(self, file):
+        previous = self.current_file()
+        self.local.file = file
+        try:
+            yield
+        finally:
+            self.local.file = previous
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start, self.current_file())
+
+    # Record the time of a stage of a file
+    def add_time(self, stage, seconds, file=None, calls=1):
+        with self.lock:
+            stage_times = self.stages.setdefault(stage, [0, 0.0])
+            stage_times[0] += calls
+            stage_times[1] += seconds
+            if file is not None:
+                file_stages = self.file_record(file)["stages"]
+                file_stages[stage] = file_stages.get(stage, 0.0) + seconds
+        if self.callback is not None:
+            self.callback({"event": "stage", "stage": stage, "file": file, "seconds": seconds})
+
+    def count(self, name, value=1, file=None):
+        if file is None:
+            file = self.current_file()
+        with self.lock:
+            self.counters[name] += value
+            if file is not None:
+                self.file_record(file)["counters"][name] += value
+
+    def counted(self, elements):
+        file = self.current_file()
+        count = images = 0
+        pages = set()
+        try:
+            for element in elements:
+                count += 1
+                if element["type"].lower() == "image":
+                    images += 1
+                page = element.get("page")
+                if page is not None:
+                    pages.add(page)
+                yield element
+        finally:
+            self.count("elements", count, file)
+            self.count("images", images, file)
+            if pages:
+                self.count("pages", len(pages), file)
+
+    def event(self, event, **data):
+        if self.callback is not None:
+            self.callback(dict(data, event=event))
+
+    # Return the record of a file, the lock is held by the caller
+    def file_record(self, file):
+        record = self.files.get(file)
+        if record is None:
+            record = self.files[file] = {"stages": {}, "counters": Counter()}
+        return record
+
+    def worker_copy(self):
+        return Metrics()
+
+    def drain(self):
+        with self.lock:
+            records = {"stages": self.stages, "counters": self.counters, "files": self.files}
+            self.stages = {}
+            self.counters = Counter()
+            self.files = {}
+        return records
+
+    def merge(self, records):
+        if not records:
+            return
+        with self.lock:
+            for stage, (calls, seconds) in records["stages"].items():
+                stage_times = self.stages.setdefault(stage, [0, 0.0])
+                stage_times[0] += calls
+                stage_times[1] += seconds
+            self.counters.update(records["counters"])
+            for file, file_records in records["files"].items():
+                record = self.file_record(file)
+                for stage, seconds in file_records["stages"].items():
+                    record["stages"][stage] = record["stages"].get(stage, 0.0) + seconds
+                record["counters"].update(file_records["counters"])
+
+    # Return the summary of the metrics as a dictionary: the stages by decreasing time, the counters
+    # and the slowest files by their "convert" time
+    def summary(self, slowest=5):
+        with self.lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][1], reverse=True)
+            files = [(file, record) for file, record in self.files.items() if "convert" in record["stages"]]
+            files.sort(key=lambda item: item[1]["stages"]["convert"], reverse=True)
+            return {
+                "stages": {stage: {"calls": calls, "seconds": seconds} for stage, (calls, seconds) in stages},
+                "counters": dict(self.counters),
+                "slowest_files": [(file, record["stages"]["convert"]) for file, record in files[:slowest]],
+            }
+
+    # statuses is a dictionary of the number of files of each status, seconds the time of the run
+    def report(self, statuses=None, seconds=None, slowest=5):
+        summary = self.summary(slowest)
+        lines = []
+        if statuses is not None:
+            line = "Run summary: " + ", ".join(f"{count} {status}" for status, count in statuses.items())
+            lines.append(line + (f" in {seconds:.2f} s" if seconds is not None else ""))
+        if summary["stages"]:
+            lines.append(f"{'stage':<20} {'calls':>7} {'seconds':>9}")
+            for stage, times in summary["stages"].items():
+                lines.append(f"{stage:<20} {times['calls']:>7} {times['seconds']:>9.3f}")
+        if summary["counters"]:
+            lines.append("counters: " + ", ".join(f"{name} {value}" for name, value in sorted(summary["counters"].items())))
+        if summary["slowest_files"]:
+            lines.append("slowest files:")
+            for file, file_seconds in summary["slowest_files"]:
+                lines.append(f"  {file_seconds:9.3f} s  {file}")
+        return "\n".join(lines)
+
+# Call function under cProfile and tracemalloc and return its result
+# the profile is saved to profile_path, to be read with pstats or snakeviz, and the functions with the most
+# cumulative time and the lines with the most allocated memory are printed
+def profile_call(function, profile_path, top=20):
+    os.makedirs(os.path.dirname(os.path.abspath(profile_path)), exist_ok=True)
+    profiler = cProfile.Profile()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        return profiler.runcall(function)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if not tracing:
+            tracemalloc.stop()
+        profiler.dump_stats(profile_path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        print(f"Profile saved to {profile_path}")
+        print(stream.getvalue())
+        print(f"Peak traced memory: {peak / 1024**2:.1f} MB")
+        for stat in snapshot.statistics("lineno")[:top // 2]:
+            print(stat)
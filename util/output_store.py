@@ -0,0 +1,296 @@
+import os
+import io
+import json
+import shutil
+import sqlite3
+import threading
+from . import chunking
+from . import data_utils
+
+# the kinds of output stores, see open_store
+STORES = ["files", "sqlite"]
+
+# the suffix of the chunks file of a markdown file, see file_manager.chunks_file_path
+CHUNKS_SUFFIX = ".chunks.jsonl"
+
+# the number of bytes copied at once between the files and the blobs of the database
+COPY_SIZE = 1024 * 1024
+
+# the tables of the sqlite store
+# documents holds the markdown, the chunks (JSON lines, NULL without chunks) and the metadata (JSON) of each markdown file,
+# files the content hash of the other outputs, e.g. the embedded objects and the images, and blobs their content by hash,
+# so an object found in many documents is stored once
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (name TEXT PRIMARY KEY, metadata TEXT NOT NULL, markdown BLOB NOT NULL, chunks BLOB);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, hash TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL);
+CREATE INDEX IF NOT EXISTS files_hash ON files (hash);
+"""
+
+# Return the output store of a file manager: "files" for the markdown files and the folders of the processed directory,
+# "sqlite" for a single database at path, filled from the processed directory
+def open_store(kind, processed_dir, path):
+    if kind == "files":
+        return FileSystemStore(processed_dir)
+    if kind == "sqlite":
+        return SQLiteStore(path, processed_dir)
+    raise ValueError(f"Unknown output store: {kind}, expected one of {', '.join(STORES)}")
+
+# Return the name of the markdown file of a chunks file
+def chunks_document(path):
+    return path[:-len(CHUNKS_SUFFIX)] + ".md"
+
+# Return the path of the chunks file of a markdown file
+def document_chunks(name):
+    return os.path.splitext(name)[0] + CHUNKS_SUFFIX
+
+# The outputs of the converters as files in the processed directory, the layout of the file manager without a packed store
+# the outputs are named by their path relative to the processed directory, as in the manifest
+class FileSystemStore:
+    packed = False
+
+    def __init__(self, processed_dir):
+        self.processed_dir = processed_dir
+
+    # Add the outputs of a converted file, the paths written in the processed directory, with the metadata of the file
+    # the outputs are already in place, the metadata is not kept
+    def add(self, outputs, metadata=None):
+        pass
+
+    # Remove all the outputs, the processed directory is reset by the file manager
+    def clear(self):
+        pass
+
+    # Return the names of the files of an output: the output itself or the files under it if it is a folder
+    def list_files(self, output):
+        path = os.path.join(self.processed_dir, output)
+        if os.path.isdir(path):
+            return [os.path.relpath(file, self.processed_dir) for file in data_utils.iter_files(path)]
+        return [output] if os.path.exists(path) else []
+
+    # Delete an output, a file or a folder
+    def delete(self, output):
+        path = os.path.join(self.processed_dir, output)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+    # Return the names of the markdown files, sorted
+    def documents(self):
+        if not os.path.isdir(self.processed_dir):
+            return []
+        return sorted(os.path.relpath(file, self.processed_dir) for file in data_utils.iter_files(self.processed_dir)
+                      if file.endswith(".md") and not os.path.basename(file).startswith("."))
+
+    # Yield the name, the metadata and the markdown of each document, see documents
+    def iter_documents(self):
+        for name in self.documents():
+            yield name, self.metadata(name), self.read_markdown(name)
+
+    def metadata(self, name):
+        if not os.path.exists(os.path.join(self.processed_dir, name)):
+            raise FileNotFoundError(name)
+        return {}
+
+    def read_markdown(self, name):
+        with open(os.path.join(self.processed_dir, name), "r", encoding="utf-8", newline="") as f:
+            return f.read()
+
+    # Yield the chunks of a markdown file, nothing if it has no chunks
+    def iter_chunks(self, name):
+        path = os.path.join(self.processed_dir, document_chunks(name))
+        if os.path.exists(path):
+            yield from chunking.iter_chunks(path)
+
+    # Return a binary file object reading an output, e.g. an embedded object linked by a markdown file
+    def open_file(self, path):
+        return open(os.path.join(self.processed_dir, path), "rb")
+
+    # Write all the outputs as files under target_dir, in the layout of the processed directory
+    # return the number of files written
+    def export(self, target_dir):
+        shutil.copytree(self.processed_dir, target_dir, dirs_exist_ok=True)
+        return sum(1 for _ in data_utils.iter_files(target_dir))
+
+    def close(self):
+        pass
+
+# The outputs of the converters packed in a single sqlite database, in place of the files and folders of the processed directory
+# the converters write to the processed directory as before and add moves the outputs of each converted file into the
+# database, a run leaves one file instead of a markdown file and a folder per document
+# the outputs keep their names, the paths relative to the processed directory, and export writes them back as files,
+# the links of the markdown files point to the paths of the embedded objects in the processed directory
+# the blobs are copied in blocks with the incremental blob I/O of sqlite, a large markdown file is never loaded at once
+class SQLiteStore:
+    packed = True
+
+    def __init__(self, path, processed_dir=None):
+        self.path = path
+        self.processed_dir = processed_dir
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # the outputs are added by the writer thread of the asyncio pipeline and read by any thread
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+
+    # Move the outputs of a converted file into the database, the outputs are paths in the processed directory,
+    # the files of a folder are added one by one, metadata is recorded with each markdown file
+    # the outputs are added in a single transaction and deleted from the processed directory once it is committed
+    def add(self, outputs, metadata=None):
+        metadata = json.dumps(metadata or {}, ensure_ascii=False)
+        with self.lock, self.connection:
+            for output in outputs:
+                if os.path.isdir(output):
+                    for file in data_utils.iter_files(output):
+                        self.add_file(file, metadata)
+                elif os.path.isfile(output):
+                    self.add_file(output, metadata)
+        for output in outputs:
+            if os.path.isdir(output):
+                shutil.rmtree(output)
+            elif os.path.exists(output):
+                os.remove(output)
+
+    # Add a file of the processed directory, the lock is held by the caller
+    def add_file(self, path, metadata):
+        name = os.path.relpath(path, self.processed_dir)
+        size = os.path.getsize(path)
+        if name.endswith(CHUNKS_SUFFIX):
+            cursor = self.connection.execute("UPDATE documents SET chunks = zeroblob(?) WHERE name = ?", (size, chunks_document(name)))
+            if cursor.rowcount:
+                rowid = self.connection.execute("SELECT rowid FROM documents WHERE name = ?", (chunks_document(name),)).fetchone()[0]
+                self.write_blob("documents", "chunks", rowid, path)
+                return
+        elif name.endswith(".md"):
+            cursor = self.connection.execute("INSERT OR REPLACE INTO documents (name, metadata, markdown) VALUES (?, ?, zeroblob(?))",
+                                             (name, metadata, size))
+            self.write_blob("documents", "markdown", cursor.lastrowid, path)
+            return
+        digest = data_utils.file_hash(path)
+        cursor = self.connection.execute("INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, zeroblob(?))", (digest, size))
+        if cursor.rowcount:
+            self.write_blob("blobs", "data", cursor.lastrowid, path)
+        self.connection.execute("INSERT OR REPLACE INTO files (path, hash) VALUES (?, ?)", (name, digest))
+
+    # Copy a file into the blob of a column of a row, the blob has the size of the file
+    def write_blob(self, table, column, rowid, path):
+        with open(path, "rb") as f:
+            # the incremental blob I/O is available from python 3.11
+            if not hasattr(self.connection, "blobopen"):
+                self.connection.execute(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", (f.read(), rowid))
+                return
+            with self.connection.blobopen(table, column, rowid) as blob:
+                shutil.copyfileobj(f, blob, COPY_SIZE)
+
+    def clear(self):
+        with self.lock, self.connection:
+            for table in ["documents", "files", "blobs"]:
+                self.connection.execute(f"DELETE FROM {table}")
+
+    def list_files(self, output):
+        prefix = output.rstrip(os.sep) + os.sep
+        document = chunks_document(output) if output.endswith(CHUNKS_SUFFIX) else output
+        with self.lock:
+            documents = self.connection.execute("SELECT name, chunks IS NOT NULL FROM documents WHERE name = ? OR substr(name, 1, ?) = ?",
+                                                (document, len(prefix), prefix)).fetchall()
+            files = self.connection.execute("SELECT path FROM files WHERE path = ? OR substr(path, 1, ?) = ?",
+                                            (output, len(prefix), prefix)).fetchall()
+        names = []
+        for name, has_chunks in documents:
+            inside = name.startswith(prefix)
+            if name == output or inside:
+                names.append(name)
+            if has_chunks and (inside or document_chunks(name) == output):
+                names.append(document_chunks(name))
+        return names + [path for path, in files]
+
+    # Delete an output, a markdown file, a chunks file, an object or a folder of outputs
+    # the blobs which are not linked by any file anymore are deleted with it
+    def delete(self, output):
+        prefix = output.rstrip(os.sep) + os.sep
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM documents WHERE name = ? OR substr(name, 1, ?) = ?", (output, len(prefix), prefix))
+            if output.endswith(CHUNKS_SUFFIX):
+                self.connection.execute("UPDATE documents SET chunks = NULL WHERE name = ?", (chunks_document(output),))
+            selection = "FROM files WHERE path = ? OR substr(path, 1, ?) = ?"
+            digests = [digest for digest, in self.connection.execute(f"SELECT DISTINCT hash {selection}", (output, len(prefix), prefix))]
+            self.connection.execute(f"DELETE {selection}", (output, len(prefix), prefix))
+            self.connection.executemany("DELETE FROM blobs WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM files WHERE files.hash = blobs.hash)",
+                                        [(digest,) for digest in digests])
+
+    def documents(self):
+        with self.lock:
+            return [name for name, in self.connection.execute("SELECT name FROM documents ORDER BY name")]
+
+    # the documents are read with their own cursor, in the order of their names
+    def iter_documents(self):
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT name, metadata, markdown FROM documents ORDER BY name")
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(64)
+            if not rows:
+                return
+            for name, metadata, markdown in rows:
+                yield name, json.loads(metadata), bytes(markdown).decode("utf-8")
+
+    # Return a column of a document, raise FileNotFoundError if there is no such document
+    def document_column(self, name, column):
+        with self.lock:
+            row = self.connection.execute(f"SELECT {column} FROM documents WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise FileNotFoundError(name)
+        return row[0]
+
+    def metadata(self, name):
+        return json.loads(self.document_column(name, "metadata"))
+
+    def read_markdown(self, name):
+        return bytes(self.document_column(name, "markdown")).decode("utf-8")
+
+    def iter_chunks(self, name):
+        chunks = self.document_column(name, "chunks")
+        if chunks is not None:
+            for line in io.TextIOWrapper(io.BytesIO(chunks), encoding="utf-8"):
+                yield json.loads(line)
+
+    # Return a binary file object reading an output, a blob of the database read in place where incremental blob I/O is available
+    def open_file(self, path):
+        with self.lock:
+            if path.endswith(CHUNKS_SUFFIX):
+                row = self.connection.execute("SELECT 'documents', 'chunks', rowid FROM documents WHERE name = ? AND chunks IS NOT NULL",
+                                              (chunks_document(path),)).fetchone()
+            elif path.endswith(".md"):
+                row = self.connection.execute("SELECT 'documents', 'markdown', rowid FROM documents WHERE name = ?", (path,)).fetchone()
+            else:
+                row = None
+            if row is None:
+                row = self.connection.execute("SELECT 'blobs', 'data', blobs.rowid FROM files JOIN blobs ON blobs.hash = files.hash "
+                                              "WHERE files.path = ?", (path,)).fetchone()
+            if row is None:
+                raise FileNotFoundError(path)
+            table, column, rowid = row
+            if hasattr(self.connection, "blobopen"):
+                return self.connection.blobopen(table, column, rowid, readonly=True)
+            return io.BytesIO(self.connection.execute(f"SELECT {column} FROM {table} WHERE rowid = ?", (rowid,)).fetchone()[0])
+
+    def export(self, target_dir):
+        with self.lock:
+            paths = [name for name, in self.connection.execute("SELECT name FROM documents")]
+            paths += [document_chunks(name) for name, in self.connection.execute("SELECT name FROM documents WHERE chunks IS NOT NULL")]
+            paths += [path for path, in self.connection.execute("SELECT path FROM files")]
+        for path in paths:
+            target = os.path.join(target_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with self.open_file(path) as source, open(target, "wb") as f:
+                shutil.copyfileobj(source, f, COPY_SIZE)
+        return len(paths)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
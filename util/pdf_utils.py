@@ -0,0 +1,98 @@
+import io
+import os
+import re
+from . import backends
+
+# the name of the images saved by partition_pdf: <figure|table>-<page number>-<number in the document>.jpg
+IMAGE_NAME = re.compile(r"^(figure|table)-(\d+)-(\d+)\.jpg$")
+
+# the element categories saved as figure/table images by partition_pdf
+IMAGE_CATEGORIES = {"Image": "figure", "Table": "table"}
+
+# Return a reader of a pdf file, source is a path or a binary file object
+def open_pdf(source):
+    return backends.get("pypdf").PdfReader(source)
+
+# Split n_pages pages in windows of window_pages pages
+# return a list of (first, last) page numbers, starting at 1 and inclusive
+def page_windows(n_pages, window_pages):
+    return [(first, min(first + window_pages - 1, n_pages)) for first in range(1, n_pages + 1, window_pages)]
+
+# Return the bytes of a pdf document with the pages first..last of a reader
+def extract_pages(reader, first, last):
+    writer = backends.get("pypdf").PdfWriter()
+    for index in range(first - 1, last):
+        writer.add_page(reader.pages[index])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+# Classify the pages of a pdf file for partition_pdf, source is a path or a binary file object
+# a page with a text layer of at least min_chars characters and images covering less than max_image_coverage
+# of its area is a "fast" page, its text can be extracted without layout detection or OCR,
+# the scanned pages and the image pages are "hi_res" pages
+# return the list of the strategies of the pages
+def classify_pages(source, min_chars=32, max_image_coverage=0.5):
+    strategies = []
+    pdfium = backends.get("pdfium")
+    pdf = pdfium.PdfDocument(source)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            n_chars = textpage.count_chars()
+            textpage.close()
+            width, height = page.get_size()
+            image_area = 0
+            for image in page.get_objects(filter=[pdfium.raw.FPDF_PAGEOBJ_IMAGE]):
+                left, bottom, right, top = image.get_pos()
+                image_area += max(right - left, 0) * max(top - bottom, 0)
+            page.close()
+            image_coverage = image_area / (width * height) if width * height else 0
+            strategies.append("fast" if n_chars >= min_chars and image_coverage < max_image_coverage else "hi_res")
+    finally:
+        pdf.close()
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+    return strategies
+
+# Group the consecutive pages with the same strategy in windows of at most window_pages pages (None for no limit)
+# return a list of (first, last, strategy), the page numbers start at 1 and are inclusive
+def strategy_windows(strategies, window_pages=None):
+    windows = []
+    for page_number, strategy in enumerate(strategies, start=1):
+        if windows:
+            first, last, last_strategy = windows[-1]
+            if last_strategy == strategy and (not window_pages or last - first + 1 < window_pages):
+                windows[-1] = (first, page_number, strategy)
+                continue
+        windows.append((page_number, page_number, strategy))
+    return windows
+
+# Return the number of figure and table images partition_pdf numbers in a list of elements
+# partition_pdf numbers every element of the category that has coordinates, even if its image could not be saved
+def count_image_blocks(elements):
+    counts = {"figure": 0, "table": 0}
+    for el in elements:
+        basename = IMAGE_CATEGORIES.get(el.category)
+        coordinates = el.metadata.coordinates
+        if basename is not None and coordinates and coordinates.points:
+            counts[basename] += 1
+    return counts
+
+# Rename the images of the elements of a window so they follow the numbering of the whole document
+# offsets holds the number of figure and table images of the previous windows
+# the numbers only grow, so the images are renamed from the last one to not overwrite an image of the same page
+def renumber_window_images(elements, offsets):
+    for element in reversed(elements):
+        image_path = element.get("image_path")
+        if not image_path:
+            continue
+        match = IMAGE_NAME.match(os.path.basename(image_path))
+        if match is None or not offsets.get(match.group(1)):
+            continue
+        basename, page_number, number = match.groups()
+        new_image_path = os.path.join(os.path.dirname(image_path), f"{basename}-{page_number}-{int(number) + offsets[basename]}.jpg")
+        os.replace(image_path, new_image_path)
+        element["image_path"] = new_image_path
+        if element["content"] == image_path:
+            element["content"] = new_image_path
@@ -0,0 +1,83 @@
+import csv
+import datetime
+from . import backends
+from . import data_utils
+
+# the number of bytes of a csv file read to detect its dialect
+SNIFF_SIZE = 64 * 1024
+
+# Return the text of a cell for a markdown table, the pipes are escaped and the line breaks are replaced by spaces
+def cell_text(value):
+    if value is None:
+        return ""
+    if value.__class__ is not str:
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        elif isinstance(value, datetime.datetime) and value.time() == datetime.time(0):
+            value = value.date()
+        value = str(value)
+    if "|" in value or "\n" in value or "\r" in value:
+        value = value.replace("|", "\\|").replace("\r\n", " ").replace("\n", " ").replace("\r", " ")
+    return value
+
+# Yield the rows of a csv file, source is a path or a binary file object
+# the rows are read one at a time, the dialect is detected from the first bytes of the file
+def iter_csv_rows(source, encoding="utf-8-sig"):
+    with data_utils.open_text(source, encoding) as f:
+        sample = f.read(SNIFF_SIZE)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        for row in csv.reader(f, dialect):
+            yield row
+
+# Yield (sheet name, rows) for the sheets of a xlsx workbook, source is a path or a binary file object
+# the workbook is opened in read only mode, the rows are read from the sheet xml one at a time
+def iter_xlsx_sheets(source):
+    workbook = backends.get("xlsx").load_workbook(source, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield sheet.title, sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+# Yield table elements for the rows of a table, the first non empty row is the header of the table
+# the rows are split in tables of at most table_rows rows, each starting with the header,
+# so only one table is held in memory, the empty rows are skipped, the rows of a table have the width of its widest row
+def table_elements(rows, table_rows=1000):
+    header = None
+    table = []
+    emitted = False
+    for row in rows:
+        cells = [cell_text(value) for value in row]
+        # the trailing empty cells, e.g. of the columns of a sheet which are formatted but empty
+        while cells and cells[-1] == "":
+            cells.pop()
+        if not cells:
+            continue
+        if header is None:
+            header = cells
+            continue
+        if len(cells) < len(header):
+            cells += [""] * (len(header) - len(cells))
+        elif len(cells) > len(header):
+            # a row wider than the header widens the table, the header is a new list as it is shared with the tables yielded
+            header = header + [""] * (len(cells) - len(header))
+            for table_row in table:
+                table_row += [""] * (len(header) - len(table_row))
+        table.append(cells)
+        if len(table) == table_rows:
+            yield {"type": "table", "content": [header] + table}
+            table = []
+            emitted = True
+    # a table with only a header is kept
+    if header is not None and (table or not emitted):
+        yield {"type": "table", "content": [header] + table}
+
+# Yield the elements of a xlsx workbook: a heading with the name of each sheet followed by the tables of its rows
+def workbook_elements(source, table_rows=1000):
+    for title, rows in iter_xlsx_sheets(source):
+        yield {"type": "heading 2", "content": title}
+        yield from table_elements(rows, table_rows)
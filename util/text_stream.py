@@ -0,0 +1,156 @@
+import os
+import re
+import mmap
+import codecs
+from . import chunking
+from . import data_utils
+
+# the number of bytes from the start of a text file used to detect its encoding
+HEAD_SIZE = 64 * 1024
+
+# the number of bytes decoded at once
+BLOCK_SIZE = 1024 * 1024
+
+# the longest paragraph in characters, a longer run of lines without a blank line, e.g. a log, is cut at a line break
+PARAGRAPH_CHARS = 64 * 1024
+
+# the byte order marks and their encodings, the utf-32 marks start with the utf-16 marks and are compared first
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+# the end of a paragraph: a line break followed by blank lines, the lines of spaces and tabs are blank
+# the pattern starts with "\n" so the regex engine skips to the line breaks, the "\r" of a "\r\n" before the break
+# is left at the end of the paragraph and removed with its trailing spaces
+PARAGRAPH_BREAK = re.compile(r"\n(?:[ \t\f\v\r]*\n)+")
+
+# the spaces of a blank line, a paragraph break followed only by them at the end of a block may go on in the next block
+BLANK_SPACES = " \t\f\v\r"
+
+# Detect the encoding of a text file from its first bytes, head
+# return the encoding and the size of the byte order mark to skip
+# without a byte order mark the text is utf-16 if every other byte is a null byte, utf-8 if head decodes as utf-8
+# (a character cut by the end of a full head is allowed), else cp1252, the common encoding of the windows exports
+def detect_encoding(head):
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom)
+    if b"\x00" in head:
+        pairs = len(head) // 2
+        if pairs and head[1::2].count(0) > pairs * 0.4:
+            return "utf-16-le", 0
+        if pairs and head[0::2].count(0) > pairs * 0.4:
+            return "utf-16-be", 0
+    try:
+        # a head shorter than HEAD_SIZE is the whole file, its last character is not cut
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=len(head) < HEAD_SIZE)
+        return "utf-8", 0
+    except UnicodeDecodeError:
+        return "cp1252", 0
+
+# Yield the blocks of bytes of a path or a binary file object
+# a path is memory mapped so the blocks are sliced from the page cache without a read call per block,
+# the pages of a block are dropped from the mapping once it is sliced so the memory of the process stays flat,
+# a binary file object, e.g. a zip member, is read block by block
+def iter_byte_blocks(source, block_size=BLOCK_SIZE):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            # an empty file can not be mapped
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                # the pages can only be dropped by whole pages
+                drop_pages = hasattr(mmap, "MADV_DONTNEED") and block_size % mmap.PAGESIZE == 0
+                for offset in range(0, len(mapped), block_size):
+                    yield mapped[offset:offset + block_size]
+                    if drop_pages:
+                        mapped.madvise(mmap.MADV_DONTNEED, offset, min(block_size, len(mapped) - offset))
+        return
+    with data_utils.open_binary(source) as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+# Yield the text of a path or a binary file object in blocks of about block_size bytes, the file is never decoded at once
+# the encoding is detected from the first HEAD_SIZE bytes, see detect_encoding, the undecodable bytes are replaced
+# and a character cut by the end of a block is decoded with the next block
+def iter_text_blocks(source, block_size=BLOCK_SIZE):
+    blocks = iter_byte_blocks(source, block_size)
+    head = b""
+    for block in blocks:
+        head += block
+        if len(head) >= HEAD_SIZE:
+            break
+    encoding, bom_size = detect_encoding(head[:HEAD_SIZE])
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    yield decoder.decode(head[bom_size:])
+    for block in blocks:
+        yield decoder.decode(block)
+    yield decoder.decode(b"", final=True)
+
+# Yield the (line number, text) of the paragraphs of blocks of text, the paragraphs are separated by blank lines
+# a paragraph longer than max_chars is cut at line breaks, see chunking.split_text, so the memory held is about
+# a block and a paragraph, the line breaks of a paragraph are "\n" and its trailing spaces are removed
+def iter_paragraphs(blocks, max_chars=PARAGRAPH_CHARS):
+    pending = ""
+    line = 1
+    for block in blocks:
+        pending += block
+        start = 0
+        # the spaces of a blank line ending the text start at end, only the last break can be followed by nothing else
+        end = len(pending)
+        while end and pending[end - 1] in BLANK_SPACES:
+            end -= 1
+        for match in PARAGRAPH_BREAK.finditer(pending):
+            # a break at the end of the text, or followed by the spaces of a blank line, may go on in the next block
+            if match.end() >= end:
+                break
+            yield from numbered_pieces(split_paragraph(pending[start:match.start()], max_chars), line)
+            line += pending.count("\n", start, match.end())
+            start = match.end()
+        pending = pending[start:]
+        if len(pending) > max_chars:
+            # the lines without a blank line are yielded as they are read, the last piece may go on in the next block
+            pieces = split_paragraph(pending, max_chars)
+            yield from numbered_pieces(pieces[:-1], line)
+            line += pending.count("\n", 0, len(pending) - len(pieces[-1]))
+            pending = pieces[-1]
+    yield from numbered_pieces(split_paragraph(pending, max_chars), line)
+
+# Return the pieces of a paragraph of at most max_chars characters
+def split_paragraph(text, max_chars):
+    return chunking.split_text(text, max_chars) if len(text) > max_chars else [text]
+
+# Yield the (line number, text) of the pieces of a paragraph, line is the line number of the first piece
+def numbered_pieces(pieces, line):
+    for piece in pieces:
+        text = piece.lstrip("\r\n")
+        first_line = line + piece.count("\n", 0, len(piece) - len(text))
+        text = text.rstrip()
+        # most files have no "\r", finding it is cheaper than replacing
+        yield first_line, text.replace("\r\n", "\n") if "\r" in text else text
+        line += piece.count("\n")
+
+# Yield the elements of the paragraphs of a text file, see iter_paragraphs
+# the paragraphs are separated by a blank line in the markdown, with section_chars the text is split in sections
+# of about section_chars characters at paragraph boundaries, each starting with a heading holding its first line number
+def text_elements(paragraphs, section_chars=None):
+    section = 0
+    size = 0
+    for line, paragraph in paragraphs:
+        if not paragraph:
+            continue
+        if section_chars and (section == 0 or size + len(paragraph) > section_chars):
+            section += 1
+            size = 0
+            yield {"type": "Heading 2", "content": f"Part {section} (line {line})"}
+        size += len(paragraph)
+        yield {"type": "text", "content": paragraph + "\n"}
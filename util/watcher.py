@@ -0,0 +1,349 @@
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+from collections import deque
+from . import backends
+
+# the inotify flags, see inotify(7)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# the events of the files written, touched or moved into a watched folder and of the folders created in it
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# the header of an inotify event: the watch descriptor, the mask, the cookie and the length of the name which follows it
+EVENT_HEADER = struct.Struct("iIII")
+
+# the number of bytes of events read at once
+EVENT_BUFFER = 64 * 1024
+
+# the suffixes of the files still being written by other programs, they are renamed once they are complete
+TEMP_SUFFIXES = (".tmp", ".part", ".partial", ".crdownload", ".download", ".swp", "~")
+
+# Return True if a file is not processed by the watch: a hidden file or a file still being written, see TEMP_SUFFIXES
+def is_ignored(path):
+    name = os.path.basename(path)
+    return name.startswith(".") or name.endswith(TEMP_SUFFIXES)
+
+# Return the (size, mtime_ns) of a file, None if it does not exist anymore
+def file_state(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+# Return the (size, mtime_ns) of the files in a folder and its subfolders by path, the hidden files and folders are left out
+# the folders are read with os.scandir, which gives the type of the entries without a stat call, so only the files are stat-ed
+def scan_states(root):
+    states = {}
+    folders = [root]
+    while folders:
+        try:
+            entries = os.scandir(folders.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        states[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    # the file was deleted while the folder was read
+                    continue
+    return states
+
+# Find the files created or changed in a folder and its subfolders by comparing scans of the folder, see scan_states
+# the folder is scanned at most once every interval seconds
+class PollingWatcher:
+    def __init__(self, root, interval=1.0):
+        self.root = root
+        self.interval = interval
+        self.states = {}
+        self.next_scan = 0.0
+
+    # Return the paths of all the files of the folder, the files found before the watch starts
+    def scan(self):
+        self.states = scan_states(self.root)
+        self.next_scan = time.monotonic() + self.interval
+        return list(self.states)
+
+    # Wait up to timeout seconds and return the paths of the files created or changed since the last scan
+    def changes(self, timeout):
+        wait = self.next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(max(timeout, 0))
+            return []
+        if wait > 0:
+            time.sleep(wait)
+        states = scan_states(self.root)
+        self.next_scan = time.monotonic() + self.interval
+        changed = [path for path, state in states.items() if self.states.get(path) != state]
+        self.states = states
+        return changed
+
+    def close(self):
+        pass
+
+# Find the files created or changed in a folder and its subfolders with the inotify events of linux
+# each folder has its own watch, the new folders are watched as they are created, so a file is reported as soon as it
+# is written, without scanning the folder, raises OSError where inotify is not available
+class InotifyWatcher:
+    def __init__(self, root):
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        if not hasattr(self.libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # the watched folders by watch descriptor
+        self.folders = {}
+
+    # Watch a folder and its subfolders, return the paths of the files already in them
+    # the folder is watched before it is read, so a file created meanwhile is reported by the read or by an event
+    def add_watches(self, folder):
+        paths = []
+        folders = [folder]
+        while folders:
+            folder = folders.pop()
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                # the folder was deleted or can not be read
+                continue
+            self.folders[wd] = folder
+            try:
+                entries = os.scandir(folder)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        folders.append(entry.path)
+                    elif entry.is_file():
+                        paths.append(entry.path)
+        return paths
+
+    def scan(self):
+        return self.add_watches(self.root)
+
+    def changes(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+        paths = []
+        overflow = False
+        while True:
+            try:
+                data = os.read(self.fd, EVENT_BUFFER)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                start = offset + EVENT_HEADER.size
+                name = data[start:start + length].rstrip(b"\0")
+                offset = start + length
+                if mask & IN_Q_OVERFLOW:
+                    # events were dropped, the whole folder is read again
+                    overflow = True
+                    continue
+                if mask & IN_IGNORED:
+                    # the folder was deleted, its watch is removed by the kernel
+                    self.folders.pop(wd, None)
+                    continue
+                folder = self.folders.get(wd)
+                if folder is None or not name or name.startswith(b"."):
+                    continue
+                path = os.path.join(folder, os.fsdecode(name))
+                if not mask & IN_ISDIR:
+                    paths.append(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    paths += self.add_watches(path)
+        if overflow:
+            paths += self.scan()
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+# Return the inotify watcher of a folder, or a polling watcher scanning it every interval seconds where inotify is not available
+def open_watcher(root, interval=1.0):
+    try:
+        return InotifyWatcher(root)
+    except (OSError, AttributeError, TypeError):
+        return PollingWatcher(root, interval)
+
+# The files of a watched folder waiting for their writes to end
+# a file is ready once its size and mtime have not changed for settle seconds, the files dropped in the folder are
+# often written or copied in several writes and a file read before its last write would be converted truncated
+class Debouncer:
+    def __init__(self, settle=0.5):
+        self.settle = settle
+        # the [state, first seen, last change] of the pending files by path
+        self.pending = {}
+
+    def __len__(self):
+        return len(self.pending)
+
+    # Add a file reported by a watcher, a file already pending waits settle seconds from now
+    def add(self, path, now=None):
+        if is_ignored(path):
+            return
+        if now is None:
+            now = time.monotonic()
+        entry = self.pending.get(path)
+        if entry is None:
+            self.pending[path] = [file_state(path), now, now]
+        else:
+            entry[0] = file_state(path)
+            entry[2] = now
+
+    # Remove and return the (path, state, first seen) of the files which have not changed for settle seconds
+    # the files deleted meanwhile are dropped
+    def ready(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        files = []
+        for path, entry in list(self.pending.items()):
+            state = file_state(path)
+            if state is None:
+                del self.pending[path]
+            elif state != entry[0]:
+                entry[0] = state
+                entry[2] = now
+            elif now - entry[2] >= self.settle:
+                files.append((path, state, entry[1]))
+                del self.pending[path]
+        return files
+
+    # Return the seconds until the next pending file may be ready, None if no file is pending
+    def next_timeout(self, now=None):
+        if not self.pending:
+            return None
+        if now is None:
+            now = time.monotonic()
+        return max(min(self.settle - (now - entry[2]) for entry in self.pending.values()), 0)
+
+# Process the files dropped in the raw directory of a file manager as they arrive, without resetting the directories
+# the new and changed files are found by a watcher, see open_watcher, wait in a Debouncer until their writes end
+# and are converted in micro-batches of at most batch_size files with FileManager.process_batch
+# the converter backends are imported and the worker processes started once, when the watch starts
+# the files left in the raw directory by a batch, e.g. the files without a converter, the failed files and the files
+# extracted from archives, are not processed again until they change
+# the time of each batch, its latency (from the first event of its oldest file to its end) and the queue depth
+# (the files pending and ready) are printed and sent as a "batch" event to the metrics of the file manager
+class WatchDaemon:
+    def __init__(self, file_manager, interval=1.0, settle=0.5, batch_size=256, polling=False):
+        self.file_manager = file_manager
+        self.interval = interval
+        self.batch_size = batch_size
+        self.polling = polling
+        self.debouncer = Debouncer(settle)
+        self.watcher = None
+        # the (path, state, first seen) of the files ready to be processed
+        self.ready = deque()
+        # the state of the files left in the raw directory by their batch, by path
+        self.seen = {}
+        self.batches = 0
+
+    # Create the directories, load the converters and queue the files already in the raw directory
+    def start(self):
+        self.file_manager.ensure_directories()
+        names = sorted({name for extension in backends.EXTENSION_BACKENDS for name in backends.extension_backends(extension)})
+        if self.file_manager.image_text_cache is not None:
+            names.append("ocr")
+        # a backend which can not be imported does not keep the others from loading
+        for name in names:
+            self.file_manager.load_backends([name])
+        self.file_manager.open_worker_pool()
+        raw_dir = self.file_manager.raw_dir
+        self.watcher = PollingWatcher(raw_dir, self.interval) if self.polling else open_watcher(raw_dir, self.interval)
+        for path in self.watcher.scan():
+            self.debouncer.add(path)
+
+    # Stop the watcher and the worker processes, and print the summary of the metrics of the watch
+    def stop(self):
+        if self.watcher is not None:
+            self.watcher.close()
+            self.watcher = None
+        self.file_manager.close_worker_pool()
+        if self.file_manager.metrics.enabled:
+            print(self.file_manager.metrics.report())
+
+    # Watch the raw directory until interrupted
+    def run(self):
+        self.start()
+        print(f"Watching {self.file_manager.raw_dir} with {type(self.watcher).__name__}")
+        try:
+            while True:
+                self.step()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    # Return the number of files found and not processed yet
+    def queue_depth(self):
+        return len(self.debouncer) + len(self.ready)
+
+    # Wait for changes up to timeout seconds, by default until the next pending file may be ready or interval seconds,
+    # then process the files ready in batches and return the processed files
+    def step(self, timeout=None):
+        if timeout is None:
+            next_timeout = self.debouncer.next_timeout()
+            timeout = self.interval if next_timeout is None else min(max(next_timeout, 0.01), self.interval)
+        for path in self.watcher.changes(timeout):
+            self.debouncer.add(path)
+        for path, state, first_seen in self.debouncer.ready():
+            if self.seen.get(path) != state:
+                self.ready.append((path, state, first_seen))
+        processed_files = []
+        while self.ready:
+            batch = [self.ready.popleft() for _ in range(min(self.batch_size, len(self.ready)))]
+            processed_files += self.process_batch(batch)
+        return processed_files
+
+    # Process a batch of (path, state, first seen) ready files and report it
+    def process_batch(self, batch):
+        files = [path for path, _, _ in batch]
+        start = time.monotonic()
+        processed_files = self.file_manager.process_batch(files)
+        end = time.monotonic()
+        registry = self.file_manager.registry
+        for path in list(registry.records) + files:
+            state = file_state(path)
+            if state is None:
+                self.seen.pop(path, None)
+            else:
+                self.seen[path] = state
+        self.batches += 1
+        seconds = end - start
+        latency = end - min(first_seen for _, _, first_seen in batch)
+        statuses = registry.status_counts()
+        queue_depth = self.queue_depth()
+        metrics = self.file_manager.metrics
+        if metrics.enabled:
+            metrics.add_time("batch", seconds)
+            metrics.event("batch", files=len(files), statuses=statuses, seconds=seconds, latency=latency, queue_depth=queue_depth)
+        print(f"Batch {self.batches}: {len(files)} files (" + ", ".join(f"{count} {status}" for status, count in statuses.items()) +
+              f") in {seconds:.2f} s, latency {latency:.2f} s, queue depth {queue_depth}")
+        return processed_files